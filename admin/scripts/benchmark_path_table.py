@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import uuid
+import random
+import fnmatch
+import argparse
+
+# Get the root directory of the repository (2 directories above the script location)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(REPO_ROOT)
+
+from scripts.path_table import PathTable
+
+ROOTS = (
+    '/private/var/mobile/Containers/Data/Application/{guid}/Library/Caches/{folder}',
+    '/private/var/mobile/Containers/Data/Application/{guid}/Documents/{folder}',
+    '/private/var/mobile/Containers/Shared/AppGroup/{guid}/Library/{folder}',
+    '/private/var/mobile/Media/DCIM/{number}APPLE',
+    '/private/var/mobile/Library/Caches/com.apple.{folder}/fsCachedData',
+    '/System/Library/PrivateFrameworks/{folder}.framework/Resources',
+)
+FOLDERS = ('com.apple.nsurlsessiond', 'Snapshots', 'WebKit', 'Cookies', 'Preferences', 'Attachments',
+           'Application Support', 'SplashBoard', 'CloudKit', 'Logs', 'Thumbnails', 'Assets')
+
+
+def synthetic_paths(count, seed=1):
+    '''Yields count paths shaped like a full file system extraction, ~30 entries per folder'''
+    rnd = random.Random(seed)
+    guids = [str(uuid.UUID(int=rnd.getrandbits(128))).upper() for _ in range(max(1, count // 2000))]
+    produced = 0
+    while produced < count:
+        folder = rnd.choice(ROOTS).format(guid=rnd.choice(guids), folder=rnd.choice(FOLDERS), number=rnd.randint(100, 199))
+        folder += f'/{rnd.getrandbits(32):08X}'
+        for _ in range(min(rnd.randint(1, 60), count - produced)):
+            yield f'{folder}/IMG_{rnd.randint(0, 99999):05}.{rnd.choice(("HEIC", "JPG", "plist", "db", "ktx"))}'
+            produced += 1
+
+
+def list_size(paths):
+    return sys.getsizeof(paths) + sum(sys.getsizeof(path) for path in paths)
+
+
+def time_search(label, count_hits):
+    start = time.perf_counter()
+    hits = count_hits()
+    seconds = time.perf_counter() - start
+    print(f'  {label}: {hits:,} hits in {seconds:.2f}s')
+    return hits, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory used by the seekers path listing, list of str vs PathTable')
+    parser.add_argument('-n', '--paths', type=int, default=5000000, help='Number of synthetic paths')
+    parser.add_argument('-p', '--pattern', default='*/Library/Caches/*/fsCachedData/*', help='Search pattern to time')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path_list = list(synthetic_paths(args.paths))
+    print(f'list of str: {len(path_list):,} paths built in {time.perf_counter() - start:.2f}s')
+    list_bytes = list_size(path_list)
+
+    start = time.perf_counter()
+    table = PathTable(path_list)
+    print(f'PathTable:   {len(table):,} paths built in {time.perf_counter() - start:.2f}s, '
+          f'{len(table._folders):,} distinct folders')
+    table_bytes = table.memory_size()
+
+    print(f'Memory: list of str {list_bytes / 1048576:,.1f} MB ({list_bytes / len(path_list):.1f} B/path), '
+          f'PathTable {table_bytes / 1048576:,.1f} MB ({table_bytes / len(table):.1f} B/path), '
+          f'{list_bytes / table_bytes:.1f}x smaller')
+
+    # Keys are root/ + path, as the seekers match them
+    print(f'Search {args.pattern}:')
+    pat = fnmatch._compile_pattern(args.pattern)
+    expected, list_seconds = time_search(
+        'list of str             ', lambda: sum(1 for path in path_list if pat('root/' + path) is not None))
+    scanned, scan_seconds = time_search(
+        'PathTable, every path   ', lambda: sum(1 for key in table.iter_normcase('root/') if pat(key) is not None))
+    actual, match_seconds = time_search(
+        'PathTable.match_normcase', lambda: sum(1 for _ in table.match_normcase(args.pattern, 'root/')))
+    print(f'  PathTable search time: {scan_seconds / list_seconds:.2f}x the list of str matching every path, '
+          f'{match_seconds / list_seconds:.2f}x with match_normcase')
+    mismatches = sum(1 for expected_path, path in zip(path_list, table) if expected_path != path)
+    print(f'Hit count {"matches" if expected == scanned == actual else "DIFFERS"}, {mismatches} paths differ')
+
+if __name__ == '__main__':
+    main()
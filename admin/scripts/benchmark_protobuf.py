@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import argparse
+
+# Get the root directory of the repository (2 directories above the script location)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(REPO_ROOT)
+
+import blackboxprotobuf
+from scripts.protobuf_compiled import compile_typedef
+
+BIOME_SAFARI_TYPEDEF = {'1': {'type': 'message', 'message_typedef': {'1': {'type': 'str', 'name': ''}, '2': {'type': 'message', 'message_typedef': {'1': {'type': 'int', 'name': ''}, '2': {'type': 'int', 'name': ''}}, 'name': ''}}, 'name': ''}, '2': {'type': 'double', 'name': ''}, '3': {'type': 'double', 'name': ''}, '4': {'type': 'message', 'message_typedef': {'1': {'type': 'message', 'message_typedef': {'1': {'type': 'int', 'name': ''}, '2': {'type': 'int', 'name': ''}}, 'name': ''}, '3': {'type': 'str', 'name': ''}}, 'name': ''}, '5': {'type': 'str', 'name': ''}, '6': {'type': 'message', 'message_typedef': {'1': {'type': 'str', 'name': ''}, '2': {'type': 'str', 'name': ''}, '3': {'type': 'str', 'name': ''}, '4': {'type': 'str', 'name': ''}, '6': {'type': 'int', 'name': ''}}, 'name': ''}, '7': {'type': 'message', 'message_typedef': {'1': {'type': 'message', 'message_typedef': {}, 'name': ''}, '2': {'type': 'message', 'message_typedef': {'1': {'type': 'message', 'message_typedef': {'1': {'type': 'int', 'name': ''}, '2': {'type': 'int', 'name': ''}}, 'name': ''}, '3': {'type': 'str', 'name': ''}}, 'name': ''}, '3': {'type': 'int', 'name': ''}}, 'name': ''}, '8': {'type': 'fixed64', 'name': ''}, '10': {'type': 'int', 'name': ''}}
+BIOME_SAFARI_FIELDS = ('1.1', '2', '4.3', '5', '6.1', '6.2', '6.4', '7.2.3')
+BIOME_SAFARI_SAMPLE = {
+    '1': {'1': 'com.apple.mobilesafari', '2': {'1': 1, '2': 2}},
+    '2': 729178221.35,
+    '3': 729178224.12,
+    '4': {'1': {'1': 3, '2': 4}, '3': 'https://www.example.com/some/long/path/to/a/page.html?query=value'},
+    '5': '0B4E2B2C-7D7E-4B6D-9A7C-3E1C2D9A8F11',
+    '6': {'1': 'Example Domain', '2': 'https://www.example.com', '3': 'Safari', '4': 'History', '6': 1},
+    '7': {'1': {}, '2': {'1': {'1': 5, '2': 6}, '3': 'Example Domain - A page title'}, '3': 7},
+    '8': 1234567890123,
+    '10': 42,
+}
+
+BIOME_NOTES_TYPEDEF = {'1': {'type': 'str', 'name': ''}, '2': {'type': 'str', 'name': ''}, '3': {'type': 'double', 'name': ''}, '4': {'type': 'int', 'name': ''}, '5': {'type': 'str', 'name': ''}}
+BIOME_NOTES_FIELDS = ('1', '2', '3', '5')
+BIOME_NOTES_SAMPLE = {
+    '1': 'com.apple.mobilenotes',
+    '2': '5A1C3F0E-1B2D-4E5F-8A9B-0C1D2E3F4A5B',
+    '3': 729178221.35,
+    '4': 1,
+    '5': 'Shopping list\n' + '\n'.join(f'- item number {i}' for i in range(40)),
+}
+
+
+def encode_sample(sample, typedef, records):
+    '''Returns records copies of sample encoded with typedef. This blackboxprotobuf version decodes
+       'str' fields but has no encoder for them, so they are encoded as 'bytes' '''
+    def as_bytes(typedef):
+        return {field: dict(spec, type='bytes') if spec['type'] == 'str' else
+                       dict(spec, message_typedef=as_bytes(spec['message_typedef'])) if spec['type'] == 'message' else spec
+                for field, spec in typedef.items()}
+
+    def encode_strings(message):
+        return {field: value.encode('utf-8') if isinstance(value, str) else
+                       encode_strings(value) if isinstance(value, dict) else value
+                for field, value in message.items()}
+
+    return [blackboxprotobuf.encode_message(encode_strings(sample), as_bytes(typedef))] * records
+
+
+def read_segb_payloads(path):
+    '''Returns the written record payloads of the SEGB files found under path'''
+    from scripts.ccl_segb.ccl_segb import read_segb_file
+    from scripts.ccl_segb.ccl_segb_common import EntryState
+
+    payloads = []
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.startswith('.'):
+                continue
+            try:
+                for record in read_segb_file(os.path.join(root, name)):
+                    if record.state == EntryState.Written:
+                        payloads.append(bytes(record.data))
+            except Exception as ex:
+                print(f'Skipping {name}: {ex}')
+    return payloads
+
+
+def get_field(message, path):
+    for part in path.split('.'):
+        message = message[part]
+    return message
+
+
+def benchmark(label, payloads, typedef, fields, repeat):
+    decode = compile_typedef(typedef, fields)
+
+    # Parity check on the requested fields before timing anything
+    mismatches = 0
+    for payload in payloads:
+        expected, _ = blackboxprotobuf.decode_message(payload, typedef)
+        actual = decode(payload)
+        for field in fields:
+            try:
+                if get_field(expected, field) != get_field(actual, field):
+                    mismatches += 1
+            except KeyError:
+                pass
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for payload in payloads:
+            blackboxprotobuf.decode_message(payload, typedef)
+    blackbox_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for payload in payloads:
+            decode(payload)
+    compiled_time = time.perf_counter() - start
+
+    records = len(payloads) * repeat
+    print(f'{label}: {records:,} records')
+    print(f'  blackboxprotobuf.decode_message: {blackbox_time:.3f}s ({records / blackbox_time:,.0f} records/s)')
+    print(f'  compiled decoder:                {compiled_time:.3f}s ({records / compiled_time:,.0f} records/s)')
+    print(f'  speedup: {blackbox_time / compiled_time:.1f}x, field mismatches: {mismatches}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare blackboxprotobuf decoding with the compiled protobuf decoder')
+    parser.add_argument('-n', '--records', type=int, default=10000, help='Number of synthetic records per payload type')
+    parser.add_argument('-r', '--repeat', type=int, default=1, help='Number of times each payload set is decoded')
+    parser.add_argument('--safari', help='Folder with _DKEvent.Safari.History SEGB files to use instead of synthetic records')
+    parser.add_argument('--notes', help='Folder with Notes biome SEGB files to use instead of synthetic records')
+    args = parser.parse_args()
+
+    if args.safari:
+        safari_payloads = read_segb_payloads(args.safari)
+    else:
+        safari_payloads = encode_sample(BIOME_SAFARI_SAMPLE, BIOME_SAFARI_TYPEDEF, args.records)
+
+    if args.notes:
+        notes_payloads = read_segb_payloads(args.notes)
+    else:
+        notes_payloads = encode_sample(BIOME_NOTES_SAMPLE, BIOME_NOTES_TYPEDEF, args.records)
+
+    benchmark('Biome Safari', safari_payloads, BIOME_SAFARI_TYPEDEF, BIOME_SAFARI_FIELDS, args.repeat)
+    benchmark('Biome Notes', notes_payloads, BIOME_NOTES_TYPEDEF, BIOME_NOTES_FIELDS, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
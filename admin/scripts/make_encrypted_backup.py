@@ -0,0 +1,128 @@
+import os
+import sys
+import sqlite3
+import struct
+import hashlib
+import plistlib
+import argparse
+import tempfile
+
+from datetime import datetime
+
+# Get the root directory of the repository (2 directories above the script location)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(REPO_ROOT)
+
+from Crypto.Cipher import AES
+from scripts.itunes_encryption import aes_wrap_key, ZERO_IV
+
+PROTECTION_CLASSES = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11)
+FILE_PROTECTION_CLASS = 3  # NSFileProtectionCompleteUntilFirstUserAuthentication
+MANIFEST_PROTECTION_CLASS = 4
+
+
+def tlv(tag, value):
+    if isinstance(value, int):
+        value = struct.pack('>I', value)
+    return tag + struct.pack('>I', len(value)) + value
+
+
+def pad(data):
+    length = 16 - len(data) % 16
+    return data + bytes([length]) * length
+
+
+def encrypt(key, data):
+    return AES.new(key, AES.MODE_CBC, iv=ZERO_IV).encrypt(pad(data))
+
+
+def make_keybag(password, iterations, passcode_iterations):
+    '''Returns the keybag blob and {protection class: class key}'''
+    salt, passcode_salt = os.urandom(20), os.urandom(20)
+    derived = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), passcode_salt, passcode_iterations, 32)
+    passcode_key = hashlib.pbkdf2_hmac('sha1', derived, salt, iterations, 32)
+    blob = (tlv(b'VERS', 4) + tlv(b'TYPE', 1) + tlv(b'UUID', os.urandom(16)) + tlv(b'HMCK', os.urandom(40))
+            + tlv(b'WRAP', 0) + tlv(b'SALT', salt) + tlv(b'ITER', iterations)
+            + tlv(b'DPWT', 1) + tlv(b'DPIC', passcode_iterations) + tlv(b'DPSL', passcode_salt))
+    class_keys = {}
+    for protection_class in PROTECTION_CLASSES:
+        class_keys[protection_class] = os.urandom(32)
+        blob += (tlv(b'UUID', os.urandom(16)) + tlv(b'CLAS', protection_class) + tlv(b'WRAP', 2)
+                 + tlv(b'KTYP', 0) + tlv(b'WPKY', aes_wrap_key(passcode_key, class_keys[protection_class])))
+    return blob, class_keys
+
+
+def mbfile_blob(relative_path, size, wrapped_key, modified):
+    '''NSKeyedArchiver MBFile, as stored in the file column of Manifest.db'''
+    mbfile = {'$class': plistlib.UID(3), 'RelativePath': plistlib.UID(4), 'EncryptionKey': plistlib.UID(2),
+              'Size': size, 'ProtectionClass': FILE_PROTECTION_CLASS, 'Mode': 0o100644, 'Flags': 0,
+              'Birth': modified, 'LastModified': modified, 'LastStatusChange': modified,
+              'InodeNumber': 0, 'UserID': 501, 'GroupID': 501}
+    archive = {'$version': 100000, '$archiver': 'NSKeyedArchiver', '$top': {'root': plistlib.UID(1)},
+               '$objects': ['$null', mbfile,
+                            {'$class': plistlib.UID(5), 'NS.data': struct.pack('<I', FILE_PROTECTION_CLASS) + wrapped_key},
+                            {'$classname': 'MBFile', '$classes': ['MBFile', 'NSObject']},
+                            relative_path,
+                            {'$classname': 'NSMutableData', '$classes': ['NSMutableData', 'NSData', 'NSObject']}]}
+    return plistlib.dumps(archive, fmt=plistlib.FMT_BINARY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=('Builds a synthetic encrypted iTunes backup. Every folder of the source '
+                                                  'is a backup domain, e.g. source/HomeDomain/Library/SMS/sms.db'))
+    parser.add_argument('source', help='Folder with one subfolder per domain')
+    parser.add_argument('output', help='Backup folder to create')
+    parser.add_argument('-p', '--password', default='password')
+    parser.add_argument('--iterations', type=int, default=10000, help='PBKDF2-SHA1 iterations (ITER)')
+    parser.add_argument('--passcode-iterations', type=int, default=10000,
+                        help='PBKDF2-SHA256 iterations (DPIC), iOS uses 10,000,000')
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=False)
+    keybag, class_keys = make_keybag(args.password, args.iterations, args.passcode_iterations)
+    manifest_key = os.urandom(32)
+
+    handle, manifest_db_path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    db = sqlite3.connect(manifest_db_path)
+    db.execute('CREATE TABLE Files (fileID TEXT PRIMARY KEY, domain TEXT, relativePath TEXT, flags INTEGER, file BLOB)')
+    db.execute('CREATE TABLE Properties (key TEXT PRIMARY KEY, value BLOB)')
+    count = 0
+    for domain in sorted(os.listdir(args.source)):
+        domain_folder = os.path.join(args.source, domain)
+        for folder, _, files in os.walk(domain_folder):
+            for name in files:
+                path = os.path.join(folder, name)
+                relative_path = os.path.relpath(path, domain_folder).replace(os.sep, '/')
+                file_id = hashlib.sha1(f'{domain}-{relative_path}'.encode('utf-8')).hexdigest()
+                with open(path, 'rb') as f:
+                    data = f.read()
+                file_key = os.urandom(32)
+                os.makedirs(os.path.join(args.output, file_id[:2]), exist_ok=True)
+                with open(os.path.join(args.output, file_id[:2], file_id), 'wb') as f:
+                    f.write(encrypt(file_key, data))
+                blob = mbfile_blob(relative_path, len(data), aes_wrap_key(class_keys[FILE_PROTECTION_CLASS], file_key),
+                                   int(os.path.getmtime(path)))
+                db.execute('INSERT INTO Files VALUES (?, ?, ?, 1, ?)', (file_id, domain, relative_path, blob))
+                count += 1
+    db.commit()
+    db.close()
+    with open(manifest_db_path, 'rb') as f:
+        manifest_db = f.read()
+    os.remove(manifest_db_path)
+    with open(os.path.join(args.output, 'Manifest.db'), 'wb') as f:
+        f.write(encrypt(manifest_key, manifest_db))
+
+    manifest = {'BackupKeyBag': keybag, 'IsEncrypted': True, 'Version': '10.0', 'Date': datetime.now(),
+                'ManifestKey': struct.pack('<I', MANIFEST_PROTECTION_CLASS)
+                               + aes_wrap_key(class_keys[MANIFEST_PROTECTION_CLASS], manifest_key),
+                'Lockdown': {'ProductVersion': '17.0', 'DeviceName': 'Synthetic'}}
+    with open(os.path.join(args.output, 'Manifest.plist'), 'wb') as f:
+        plistlib.dump(manifest, f, fmt=plistlib.FMT_BINARY)
+    with open(os.path.join(args.output, 'Info.plist'), 'wb') as f:
+        plistlib.dump({'Device Name': 'Synthetic', 'Product Version': '17.0'}, f)
+    print(f'{count:,} files written to {args.output}, password {args.password!r}')
+
+
+if __name__ == '__main__':
+    main()
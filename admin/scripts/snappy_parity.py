@@ -0,0 +1,74 @@
+import io
+import os
+import sys
+import time
+import pathlib
+import argparse
+
+# Get the root directory of the repository (2 directories above the script location)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(REPO_ROOT)
+
+import scripts.ccl_leveldb as ccl_leveldb
+import scripts.ccl_simplesnappy as ccl_simplesnappy
+
+
+def get_compressed_blocks(ldb_path):
+    '''Returns the raw (still compressed) snappy blocks of a LevelDB table file'''
+    blocks = []
+    table = ccl_leveldb.LdbFile(ldb_path)
+    try:
+        with open(ldb_path, 'rb') as f:
+            data = f.read()
+        handles = [table._index_handle] + [handle for _, handle in table._index]
+        for handle in handles:
+            block_end = handle.offset + handle.length
+            if data[block_end] != 0:
+                blocks.append(data[handle.offset:block_end])
+    finally:
+        table.close()
+    return blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the snappy decoders of ccl_simplesnappy against each other on LevelDB table blocks')
+    parser.add_argument('input_path', help='Folder to search recursively for LevelDB .ldb/.sst files')
+    args = parser.parse_args()
+
+    blocks = []
+    for root, _, files in os.walk(args.input_path):
+        for name in files:
+            if name.lower().endswith(('.ldb', '.sst')):
+                path = pathlib.Path(root, name)
+                try:
+                    blocks.extend(get_compressed_blocks(path))
+                except Exception as ex:
+                    print(f'Skipping {path}: {ex}')
+
+    if not blocks:
+        print('No snappy compressed blocks found.')
+        return
+
+    decoders = [
+        ('decompress (stream)', lambda block: ccl_simplesnappy.decompress(io.BytesIO(block))),
+        ('decompress_buffer', ccl_simplesnappy.decompress_buffer),
+    ]
+    if ccl_simplesnappy.ACCELERATED_BACKEND:
+        decoders.append((f'decompress_bytes ({ccl_simplesnappy.ACCELERATED_BACKEND})', ccl_simplesnappy.decompress_bytes))
+
+    results = {}
+    for label, decoder in decoders:
+        start = time.perf_counter()
+        results[label] = [decoder(block) for block in blocks]
+        elapsed = time.perf_counter() - start
+        total = sum(len(block) for block in results[label])
+        print(f'{label}: {len(blocks):,} blocks, {total:,} bytes in {elapsed:.3f}s ({total / elapsed / 1048576:.1f} MiB/s)')
+
+    reference = results[decoders[0][0]]
+    for label, _ in decoders[1:]:
+        mismatches = sum(1 for expected, actual in zip(reference, results[label]) if expected != actual)
+        print(f'{label}: {mismatches} mismatching blocks')
+
+
+if __name__ == '__main__':
+    main()
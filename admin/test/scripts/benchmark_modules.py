@@ -0,0 +1,223 @@
+import os
+import sys
+import json
+import fnmatch
+import zipfile
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+# Get the root directory of the repository (3 directories above the script location)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from test_module import process_artifact, load_test_cases
+
+CASES_FOLDER = Path('admin/test/cases')
+BENCHMARK_FOLDER = Path('admin/test/results/benchmarks')
+DEFAULT_BASELINE = BENCHMARK_FOLDER / 'baseline.json'
+
+
+def benchmark_key(module_name, artifact_name, case_name, scale):
+    return f'{module_name}.{artifact_name}.{case_name}.x{scale}'
+
+
+def find_benchmarks(patterns, artifact=None, case=None):
+    '''Yields (module, artifact, case, os version, zip path) for every test case with files whose
+       module matches one of the patterns (fnmatch, e.g. Ph* or biome*)'''
+    modules = sorted(path.name[len('testdata.'):-len('.json')] for path in CASES_FOLDER.glob('testdata.*.json'))
+    for module_name in modules:
+        if patterns and not any(fnmatch.fnmatchcase(module_name, pattern) for pattern in patterns):
+            continue
+        for case_name, case_data in load_test_cases(module_name).items():
+            if case and case != case_name:
+                continue
+            for artifact_name, artifact_data in case_data['artifacts'].items():
+                if artifact and artifact != artifact_name or artifact_data.get('file_count', 0) == 0:
+                    continue
+                zip_path = CASES_FOLDER / 'data' / module_name / f'testdata.{module_name}.{artifact_name}.{case_name}.zip'
+                if zip_path.exists():
+                    yield module_name, artifact_name, case_name, case_data.get('os_version'), zip_path
+
+
+def scaled_zip(zip_path, scale, temp_folder):
+    '''Synthetic scale-up of a test case: a zip with scale copies of every file, each copy in its
+       own folder, so that artifacts globbing the files get scale times as many'''
+    if scale == 1:
+        return zip_path
+    scaled_path = temp_folder / f'{zip_path.stem}.x{scale}.zip'
+    with zipfile.ZipFile(zip_path) as source, zipfile.ZipFile(scaled_path, 'w', zipfile.ZIP_STORED) as scaled:
+        for info in source.infolist():
+            if info.is_dir():
+                continue
+            data = source.read(info)
+            for copy in range(scale):
+                scaled.writestr(f'scale_{copy}/{info.filename}', data)
+    return scaled_path
+
+
+def run_once(zip_path, module_name, artifact_name, os_version, verbose):
+    output = sys.stdout if verbose else StringIO()
+    with redirect_stdout(output):
+        _, data, run_time, last_commit, _, _ = process_artifact(
+            zip_path, module_name, artifact_name, None, target_os_version=os_version)
+    return len(data), run_time, last_commit
+
+
+def benchmark_artifact(module_name, artifact_name, case_name, os_version, zip_path, scale, repeat, verbose):
+    '''Runs the artifact repeat times for its time, the fastest counts, then once more with tracemalloc
+       for the peak of the Python allocations (the allocations of C libraries such as sqlite aren't traced)'''
+    result = {'module': module_name, 'artifact': artifact_name, 'case': case_name, 'scale': scale}
+    temp_folder = Path('admin/test/temp')
+    temp_folder.mkdir(parents=True, exist_ok=True)
+    input_path = scaled_zip(zip_path, scale, temp_folder)
+    try:
+        run_times = []
+        for _ in range(repeat):
+            rows, run_time, last_commit = run_once(input_path, module_name, artifact_name, os_version, verbose)
+            run_times.append(run_time)
+        tracemalloc.start()
+        try:
+            run_once(input_path, module_name, artifact_name, os_version, verbose)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    except Exception as ex:
+        result['error'] = f'{type(ex).__name__}: {ex}'
+        return result
+    finally:
+        if input_path != zip_path:
+            input_path.unlink()
+    seconds = min(run_times)
+    result.update({
+        'rows': rows,
+        'seconds': seconds,
+        'median_seconds': statistics.median(run_times),
+        'peak_memory_bytes': peak_memory,
+        'rows_per_second': rows / seconds if seconds else None,
+        'last_commit': last_commit['hash'] if last_commit else None,
+    })
+    return result
+
+
+def compare(results, baseline, threshold, min_seconds, min_memory):
+    '''Returns (regressions, notes) of results against the baseline results, as lines'''
+    regressions, notes = [], []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if 'error' in result:
+            regressions.append(f"{key}: failed, {result['error']}")
+            continue
+        if base is None or 'error' in base:
+            notes.append(f'{key}: no baseline')
+            continue
+        seconds, base_seconds = result['seconds'], base['seconds']
+        if seconds > base_seconds * (1 + threshold) and seconds - base_seconds >= min_seconds:
+            regressions.append(f'{key}: time {base_seconds:.3f}s -> {seconds:.3f}s (+{seconds / base_seconds - 1:.0%})')
+        memory, base_memory = result['peak_memory_bytes'], base['peak_memory_bytes']
+        if memory > base_memory * (1 + threshold) and memory - base_memory >= min_memory:
+            regressions.append(f'{key}: peak memory {base_memory / 2**20:.1f} MB -> {memory / 2**20:.1f} MB '
+                               f'(+{memory / base_memory - 1:.0%})')
+        if result['rows'] != base['rows']:
+            notes.append(f"{key}: {base['rows']:,} rows in the baseline, {result['rows']:,} now")
+    return regressions, notes
+
+
+def get_head_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], universal_newlines=True).strip()
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark modules with their test cases: time, peak memory and rows/sec, compared to a baseline')
+    parser.add_argument('modules', nargs='*', help='Modules to run, wildcards allowed (e.g. "Ph*" knowledgeC "biome*"). '
+                                                   'All the modules with test cases by default')
+    parser.add_argument('-a', '--artifact', help='Only this artifact', default=None)
+    parser.add_argument('-c', '--case', help='Only this test case', default=None)
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Timed runs of each artifact, the fastest counts')
+    parser.add_argument('-s', '--scale', type=int, nargs='+', default=[1],
+                        help='Also run synthetic scale-ups with that many copies of the test case files, e.g. -s 1 10')
+    parser.add_argument('-b', '--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results of this run in the baseline')
+    parser.add_argument('-t', '--threshold', type=float, default=0.25, help='Slowdown or memory growth flagged, 0.25 = 25%%')
+    parser.add_argument('--min-seconds', type=float, default=0.05, help='Time differences below this are noise')
+    parser.add_argument('--min-memory', type=float, default=1.0, help='Memory differences below this many MB are noise')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Show the output of the modules')
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    benchmarks = list(find_benchmarks(args.modules, args.artifact, args.case))
+    if not benchmarks:
+        print('No test cases found for these modules.')
+        sys.exit(1)
+
+    results = {}
+    for module_name, artifact_name, case_name, os_version, zip_path in benchmarks:
+        for scale in args.scale:
+            key = benchmark_key(module_name, artifact_name, case_name, scale)
+            result = benchmark_artifact(module_name, artifact_name, case_name, os_version, zip_path,
+                                        max(1, scale), max(1, args.repeat), args.verbose)
+            results[key] = result
+            if 'error' in result:
+                print(f"{key}: FAILED {result['error']}")
+            else:
+                rate = f"{result['rows_per_second']:,.0f} rows/s" if result['rows_per_second'] is not None else '-'
+                print(f"{key}: {result['seconds']:.3f}s, {result['rows']:,} rows, {rate}, "
+                      f"peak {result['peak_memory_bytes'] / 2**20:.1f} MB")
+
+    metadata = {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'commit': get_head_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+    }
+    BENCHMARK_FOLDER.mkdir(parents=True, exist_ok=True)
+    output_file = BENCHMARK_FOLDER / f"benchmark.{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+    with open(output_file, 'w') as f:
+        json.dump({'metadata': metadata, 'results': results}, f, indent=2)
+    print(f'\nResults saved to {output_file}')
+
+    baseline_path = Path(args.baseline)
+    baseline = {'metadata': {}, 'results': {}}
+    if baseline_path.exists():
+        with open(baseline_path, 'r') as f:
+            baseline = json.load(f)
+
+    regressions = []
+    if baseline['results']:
+        if baseline['metadata'].get('platform') != metadata['platform']:
+            print(f"Warning: the baseline was made on {baseline['metadata'].get('platform')}, timings may not compare")
+        regressions, notes = compare(results, baseline['results'], args.threshold, args.min_seconds, args.min_memory * 2**20)
+        for line in notes:
+            print(f'  {line}')
+        if regressions:
+            print(f'{len(regressions)} regression(s) beyond {args.threshold:.0%} of {baseline_path}:')
+            for line in regressions:
+                print(f'  {line}')
+        else:
+            print(f'No regression beyond {args.threshold:.0%} of {baseline_path}')
+    elif not args.save_baseline:
+        print(f'No baseline in {baseline_path}, run with --save-baseline to make one')
+
+    if args.save_baseline:
+        baseline['metadata'] = metadata
+        baseline['results'].update({key: result for key, result in results.items() if 'error' not in result})
+        with open(baseline_path, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f'Baseline saved to {baseline_path}')
+
+    sys.exit(1 if regressions and not args.save_baseline else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import json
 import argparse
+import getpass
 import io
 import pytz
 import os.path
@@ -9,18 +10,30 @@ import traceback
 import sys
 
 import scripts.plugin_loader as plugin_loader
+import scripts.batch_runner as batch_runner
+import scripts.job_server as job_server
+import scripts.search_files as search_files
 
 from shutil import copyfile
 from scripts.search_files import *
 from scripts.ilapfuncs import *
 from scripts.version_info import ileapp_version
+from scripts.media_previews import preview_service
+from scripts.media_store import media_store
 from time import process_time, gmtime, strftime, perf_counter
 from scripts.lavafuncs import *
 
+_plugins = None  # (loader, available plugins), see load_plugins()
+
 def validate_args(args):
     if args.artifact_paths or args.create_profile_casedata:
         return  # Skip further validation if --artifact_paths is used
 
+    if args.serve is not None:
+        if args.output_path and not os.path.exists(args.output_path):
+            raise argparse.ArgumentError(None, 'OUTPUT folder does not exist! Run the program again.')
+        return  # the jobs are validated when they are submitted
+
     # Ensure other arguments are provided
     mandatory_args = ['input_path', 'output_path', 't']
     for arg in mandatory_args:
@@ -136,13 +149,14 @@ def create_casedata(path):
     print()
     return
 
-def main():
+def build_parser():
     parser = argparse.ArgumentParser(description=f'iLEAPP v{ileapp_version}: iOS Logs, Events, And Plists Parser.')
-    parser.add_argument('-t', choices=['fs', 'tar', 'zip', 'gz', 'itunes'], required=False, action="store",
+    parser.add_argument('-t', choices=['fs', 'tar', 'zip', 'gz', 'itunes', 'batch'], required=False, action="store",
                         help=("Specify the input type. "
                               "'fs' for a folder containing extracted files with normal paths and names, "
                               "'tar', 'zip', or 'gz' for compressed packages containing files with normal names, "
-                              "'itunes' for a folder containing a raw iTunes backup with hashed paths and names."))
+                              "'itunes' for a folder containing a raw iTunes backup with hashed paths and names, "
+                              "'batch' for a jobs file (the input path) with the arguments of one extraction per line."))
     parser.add_argument('-o', '--output_path', required=False, action="store",
                         help='Path to base output folder (this must exist)')
     parser.add_argument('-i', '--input_path', required=False, action="store", help='Path to input file/folder')
@@ -158,19 +172,42 @@ def main():
                         help=("Generate a text file list of artifact paths. "
                               "This argument is meant to be used alone, without any other arguments."))
     parser.add_argument('--custom_output_folder', required=False, action="store", help="Custom name for the output folder")
+    parser.add_argument('--itunes_password', required=False, action="store",
+                        help=("Password of an encrypted iTunes backup. "
+                              "Asked for when the backup is encrypted and this is not provided."))
+    parser.add_argument('--no_hash', required=False, action="store_true",
+                        help=("Do not compute the MD5 and SHA-256 of the extracted files (no _hashes.tsv). "
+                              "Files are then copied by the kernel where possible, which is faster on large extractions."))
+    parser.add_argument('--batch_jobs', required=False, action="store", type=int, default=batch_runner.BATCH_JOBS,
+                        help="Batch and server modes: number of extractions processed at the same time")
+    parser.add_argument('--batch_workers', required=False, action="store", type=int, default=batch_runner.BATCH_WORKERS,
+                        help="Batch and server modes: threads each extraction may use to list and copy files")
+    parser.add_argument('--serve', required=False, action="store", type=int, nargs='?', const=job_server.SERVE_PORT,
+                        metavar='PORT',
+                        help=("Run as a server taking extraction jobs, with the arguments of the command line, "
+                              f"over HTTP on localhost (port {job_server.SERVE_PORT} by default). "
+                              "-o is the output folder of the jobs that don't give one."))
+    return parser
+
+def load_plugins():
+    '''Returns the plugin loader and the plugins that can be selected, loaded once per process'''
+    global _plugins
+    if _plugins is None:
+        available_plugins = []
+        loader = plugin_loader.PluginLoader()
+        for plugin in sorted(loader.plugins, key=lambda p: p.category):
+            if (plugin.module_name == 'iTunesBackupInfo'
+                    or plugin.name == 'lastBuild'
+                    or plugin.module_name == 'logarchive' and plugin.name != 'logarchive'):
+                continue
+            else:
+                available_plugins.append(plugin)
+        _plugins = loader, available_plugins
+    return _plugins
 
-    available_plugins = []
-    loader = plugin_loader.PluginLoader()
-    for plugin in sorted(loader.plugins, key=lambda p: p.category):
-        if (plugin.module_name == 'iTunesBackupInfo'
-                or plugin.name == 'lastBuild'
-                or plugin.module_name == 'logarchive' and plugin.name != 'logarchive'):
-            continue
-        else:
-            available_plugins.append(plugin)
-    selected_plugins = available_plugins.copy()
-    profile_filename = None
-    casedata = {}
+def main():
+    parser = build_parser()
+    loader, available_plugins = load_plugins()
 
     # Check if no arguments were provided
     if len(sys.argv) == 1:
@@ -230,6 +267,28 @@ def main():
             print('OUTPUT folder for storing iLEAPP Profile file does not exist!\nRun the program again.')
             return
 
+    if args.serve is not None:
+        job_server.serve(args.serve, prepare_job_args, run_job, args.output_path, args.batch_jobs, args.batch_workers)
+        return
+
+    if extracttype == 'batch':
+        run_batch(args)
+        return
+
+    if extracttype == 'itunes' and not args.itunes_password and is_encrypted_backup(args.input_path):
+        args.itunes_password = getpass.getpass('The iTunes backup is encrypted, enter its password: ')
+
+    run_job(args)
+
+def run_job(args):
+    '''Processes the extraction described by the parsed command line arguments, returns
+       False if it could not be processed'''
+    loader, available_plugins = load_plugins()
+    extracttype = args.t
+    selected_plugins = available_plugins.copy()
+    profile_filename = None
+    casedata = {}
+
     if args.load_case_data:
         case_data_filename = args.load_case_data
         case_data_load_error = None
@@ -239,21 +298,21 @@ def main():
             except:
                 case_data_load_error = "File was not a valid case data file: invalid format"
                 print(case_data_load_error)
-                return
+                return False
 
         if not case_data_load_error:
             if isinstance(case_data, dict):
                 if case_data.get("leapp") != "case_data":
                     case_data_load_error = "File was not a valid case data file"
                     print(case_data_load_error)
-                    return
+                    return False
                 else:
                     print(f'Case Data loaded: {case_data_filename}')
                     casedata = case_data.get('case_data_values', {})
             else:
                 case_data_load_error = "File was not a valid case data file: invalid format"
                 print(case_data_load_error)
-                return
+                return False
     
     if args.load_profile:
         profile_filename = args.load_profile
@@ -264,14 +323,14 @@ def main():
             except:
                 profile_load_error = "File was not a valid case data file: invalid format"
                 print(profile_load_error)
-                return
+                return False
 
         if not profile_load_error:
             if isinstance(profile, dict):
                 if profile.get("leapp") != "ileapp" or profile.get("format_version") != 1:
                     profile_load_error = "File was not a valid profile file: incorrect LEAPP or version"
                     print(profile_load_error)
-                    return
+                    return False
                 else:
                     profile_plugins = set(profile.get("plugins", []))
                     selected_plugins = [selected_plugin for selected_plugin in available_plugins
@@ -279,13 +338,15 @@ def main():
             else:
                 profile_load_error = "File was not a valid profile file: invalid format"
                 print(profile_load_error)
-                return
+                return False
     
     input_path = args.input_path
     wrap_text = args.wrap_text
     output_path = os.path.abspath(args.output_path)
     time_offset = args.timezone
     custom_output_folder = args.custom_output_folder
+    itunes_password = args.itunes_password
+    search_files.HASH_EXTRACTED_FILES = not args.no_hash
 
     # ios file system extractions contain paths > 260 char, which causes problems
     # This fixes the problem by prefixing \\?\ on each windows path.
@@ -297,13 +358,98 @@ def main():
 
     initialize_lava(input_path, out_params.report_folder_base, extracttype)
 
-    crunch_artifacts(selected_plugins, extracttype, input_path, out_params, wrap_text, loader, casedata, time_offset, profile_filename)
+    crunch_successful = crunch_artifacts(selected_plugins, extracttype, input_path, out_params, wrap_text, loader, casedata,
+                                         time_offset, profile_filename, itunes_password)
 
     lava_finalize_output(out_params.report_folder_base)
+    return crunch_successful
+
+def prepare_job_args(job_argv, default_output_path, job_id):
+    '''Returns (name, parsed arguments) of a batch or server job given as command line arguments,
+       raises argparse.ArgumentError if they are not valid. A job without custom output folder gets
+       one named after job_id, so jobs starting in the same second don't share a report folder'''
+    def raise_error(message):
+        raise argparse.ArgumentError(None, message)
+
+    parser = build_parser()
+    parser.error = raise_error
+    try:
+        job_args = parser.parse_args(job_argv)
+    except SystemExit: # --help
+        raise_error('invalid arguments')
+    if job_args.output_path is None:
+        job_args.output_path = default_output_path
+    if job_args.t == 'batch' or job_args.serve is not None or job_args.artifact_paths or job_args.create_profile_casedata:
+        raise_error('a job must process one extraction')
+    validate_args(job_args)
+    if job_args.t == 'itunes' and not job_args.itunes_password and is_encrypted_backup(job_args.input_path):
+        raise_error('encrypted iTunes backup without --itunes_password')
+    name = os.path.basename(os.path.normpath(job_args.input_path))
+    if not job_args.custom_output_folder:
+        job_args.custom_output_folder = f"iLEAPP_Reports_{strftime('%Y-%m-%d_%H%M%S')}_{job_id}_{name}"
+    return name, job_args
+
+def preload_plugin_modules():
+    '''Imports every plugin module when jobs run in forked processes, so they start with the modules loaded'''
+    if not batch_runner.forks_job_processes():
+        return
+    loader, available_plugins = load_plugins()
+    for plugin in loader.plugins:
+        try:
+            getattr(plugin.method, 'resolve', lambda: None)()
+        except Exception:
+            pass # the job logs the error when it runs the plugin
+
+def run_batch(args):
+    '''Processes every extraction of the jobs file args.input_path, args.batch_jobs at a time, and
+       writes the throughput summary to args.output_path'''
+    batch_stamp = strftime('%Y-%m-%d_%H%M%S')
+    jobs = []
+    for line_number, job_argv in batch_runner.read_jobs_file(args.input_path):
+        job_id = f'{len(jobs) + 1:03}'
+        try:
+            name, job_args = prepare_job_args(job_argv, args.output_path, job_id)
+        except argparse.ArgumentError as ex:
+            print(f'Jobs file line {line_number}: skipped, {ex}')
+            continue
+        jobs.append((job_id, name, job_args))
+    if not jobs:
+        print('No extraction to process in the jobs file.')
+        return False
+
+    preload_plugin_modules()
+    print(f'Batch of {len(jobs)} extractions, {args.batch_jobs} at a time, {args.batch_workers} threads each')
+    runner = batch_runner.JobRunner(run_job, args.batch_jobs, args.batch_workers)
+    summary = batch_runner.BatchSummary()
+    names = {}
+    for job_id, name, job_args in jobs:
+        names[job_id] = name
+        summary.add_job(job_id, name=name, input_path=job_args.input_path,
+                        report_folder=os.path.join(job_args.output_path, job_args.custom_output_folder))
+        runner.submit(job_id, job_args)
+    while runner.busy():
+        for job_id, event, details in runner.poll():
+            summary.record(job_id, event, details)
+            if event == 'started':
+                print(f'[{job_id} {names[job_id]}] started')
+            elif event == 'plugin_finished':
+                print(f"[{job_id} {names[job_id]}] {details['name']} [{details['module']}] {details['seconds']:.2f}s"
+                      + ('' if details['success'] else ' FAILED'))
+            elif event == 'finished':
+                print(f"[{job_id} {names[job_id]}] {'completed' if details['success'] else 'FAILED'}"
+                      + (f", {details['error']}" if details.get('error') else ''))
+
+    for line in summary.format_lines():
+        print(line)
+    summary_path = os.path.join(args.output_path, f'iLEAPP_Batch_{batch_stamp}.json')
+    with open(summary_path, 'wt', encoding='utf-8') as summary_file:
+        json.dump(summary.as_dict(), summary_file, indent=2)
+    print(f'Batch summary: {summary_path}')
+    return all(job['success'] for job in summary.jobs.values())
 
 def crunch_artifacts(
         plugins: typing.Sequence[plugin_loader.PluginSpec], extracttype, input_path, out_params, wrap_text,
-        loader: plugin_loader.PluginLoader, casedata, time_offset, profile_filename):
+        loader: plugin_loader.PluginLoader, casedata, time_offset, profile_filename, itunes_password=None):
     start = process_time()
     start_wall = perf_counter()
  
@@ -328,10 +474,11 @@ def crunch_artifacts(
             seeker = FileSeekerZip(input_path, out_params.data_folder)
 
         elif extracttype == 'itunes':
-            seeker = FileSeekerItunes(input_path, out_params.data_folder)
+            seeker = FileSeekerItunes(input_path, out_params.data_folder, itunes_password)
 
         else:
             logfunc('Error on argument -o (input type)')
+            flush_logs()
             return False
     except Exception as ex:
         logfunc('Had an exception in Seeker - see details below. Terminating Program!')
@@ -339,8 +486,14 @@ def crunch_artifacts(
         traceback.print_exc(file=temp_file)
         logfunc(temp_file.getvalue())
         temp_file.close()
+        flush_logs()
         return False
 
+    try:
+        seeker.build_container_index()
+    except Exception as ex:
+        logfunc(f'Could not build the app container index: {ex}')
+
     # Now ready to run
     # add lastBuild at the start except for iTunes backups
     if extracttype != 'itunes':
@@ -389,77 +542,92 @@ def crunch_artifacts(
 
     # Search for the files per the arguments
     for plugin_number, plugin in enumerate(plugins, start=1):
-        logfunc()
-        logfunc('[{}/{}] {} [{}] artifact started'.format(plugin_number, len(plugins),
-                                                              plugin.name, plugin.module_name))
-        output_types = plugin.artifact_info.get('output_types', '')
-        if isinstance(plugin.search, list) or isinstance(plugin.search, tuple):
-            search_regexes = plugin.search
-        elif plugin.search is None:
-            search_regexes = plugin.search
-        else:
-            search_regexes = [plugin.search]
-        parsed_modules += 1
-        GuiWindow.SetProgressBar(parsed_modules, len(plugins))
-        files_found = []
-        log.write(f'<b>For {plugin.name} module</b>')
-        if search_regexes is None:
-            log.write(f'<ul><li>No search regexes provided for {plugin.name} module.')
-            log.write("<ul><li><i>'_lava_artifacts.db'</i> used as source file.</li></ul></li></ul>")
-            files_found = [os.path.join(out_params.report_folder_base, '_lava_artifacts.db')]
-        else:
-            for artifact_search_regex in search_regexes:
-                found = seeker.search(artifact_search_regex)
-                if not found:
-                    if plugin.name == 'logarchive' and extracttype != 'fs':
-                        src = os.path.join(os.path.dirname(input_path), "logarchive.json")
-                        dst = os.path.join(out_params.data_folder, "logarchive.json")
-                        if os.path.exists(src):
-                            copyfile(src, dst)
-                            files_found.append(dst)
-                    log.write(f'<ul><li>No file found for regex <i>{artifact_search_regex}</i></li></ul>')
-                else:
-                    log.write(f'<ul><li>{len(found)} {"files" if len(found) > 1 else "file"} for regex <i>{artifact_search_regex}</i> located at:')
-                    for pathh in found:
-                        if pathh.startswith('\\\\?\\'):
-                            pathh = pathh[4:]
-                        log.write(f'<ul><li>{pathh}</li></ul>')
-                    log.write(f'</li></ul>')
-                    files_found.extend(found)
-        if files_found:
-            if not lava_only and 'lava_only' in output_types:
-                lava_only = True
-            category_folder = os.path.join(out_params.report_folder_base, '_HTML', plugin.category)
-            if not os.path.exists(category_folder):
+        try:
+            logfunc()
+            logfunc('[{}/{}] {} [{}] artifact started'.format(plugin_number, len(plugins),
+                                                                  plugin.name, plugin.module_name))
+            plugin_start = perf_counter()
+            GuiWindow.post('plugin_started', name=plugin.name, module=plugin.module_name,
+                           number=plugin_number, total=len(plugins))
+            output_types = plugin.artifact_info.get('output_types', '')
+            if isinstance(plugin.search, list) or isinstance(plugin.search, tuple):
+                search_regexes = plugin.search
+            elif plugin.search is None:
+                search_regexes = plugin.search
+            else:
+                search_regexes = [plugin.search]
+            parsed_modules += 1
+            GuiWindow.SetProgressBar(parsed_modules, len(plugins))
+            files_found = []
+            log.write(f'<b>For {plugin.name} module</b>')
+            if search_regexes is None:
+                log.write(f'<ul><li>No search regexes provided for {plugin.name} module.')
+                log.write("<ul><li><i>'_lava_artifacts.db'</i> used as source file.</li></ul></li></ul>")
+                files_found = [os.path.join(out_params.report_folder_base, '_lava_artifacts.db')]
+            else:
+                for artifact_search_regex in search_regexes:
+                    found = seeker.search(artifact_search_regex)
+                    if not found:
+                        if plugin.name == 'logarchive' and extracttype != 'fs':
+                            src = os.path.join(os.path.dirname(input_path), "logarchive.json")
+                            dst = os.path.join(out_params.data_folder, "logarchive.json")
+                            if os.path.exists(src):
+                                copyfile(src, dst)
+                                files_found.append(dst)
+                        log.write(f'<ul><li>No file found for regex <i>{artifact_search_regex}</i></li></ul>')
+                    else:
+                        log.write(f'<ul><li>{len(found)} {"files" if len(found) > 1 else "file"} for regex <i>{artifact_search_regex}</i> located at:')
+                        for pathh in found:
+                            if pathh.startswith('\\\\?\\'):
+                                pathh = pathh[4:]
+                            log.write(f'<ul><li>{pathh}</li></ul>')
+                        log.write(f'</li></ul>')
+                        files_found.extend(found)
+            if files_found:
+                if not lava_only and 'lava_only' in output_types:
+                    lava_only = True
+                category_folder = os.path.join(out_params.report_folder_base, '_HTML', plugin.category)
+                if not os.path.exists(category_folder):
+                    try:
+                        os.makedirs(category_folder)
+                    except (FileExistsError, FileNotFoundError) as ex:
+                        logfunc('Error creating {} report directory at path {}'.format(plugin.name, category_folder))
+                        logfunc('Error was {}'.format(str(ex)))
+                        GuiWindow.post('plugin_finished', name=plugin.name, module=plugin.module_name,
+                                       seconds=perf_counter() - plugin_start, success=False)
+                        continue  # cannot do work
                 try:
-                    os.makedirs(category_folder)
-                except (FileExistsError, FileNotFoundError) as ex:
-                    logfunc('Error creating {} report directory at path {}'.format(plugin.name, category_folder))
+                    plugin.method(files_found, category_folder, seeker, wrap_text, time_offset)
+                    if plugin.name == 'logarchive':
+                        lava_db_path = os.path.join(out_params.report_folder_base, '_lava_artifacts.db')
+                        if does_table_exist_in_db(lava_db_path, 'logarchive'):
+                            loader["logarchive_artifacts"].method([lava_db_path], category_folder, seeker, wrap_text, time_offset)
+                        if does_table_exist_in_db(lava_db_path, 'logarchive_artifacts'):
+                            unifed_logs_artifacts = []
+                            unifed_logs_artifacts = [plugin.name for plugin in loader.plugins
+                                                     if plugin.module_name=='logarchive'
+                                                     and plugin.name != 'logarchive'
+                                                     and plugin.name != 'logarchive_artifacts']
+                            for unifed_log_artifact in unifed_logs_artifacts:
+                                loader[unifed_log_artifact].method([lava_db_path], category_folder, seeker, wrap_text, time_offset)
+                except Exception as ex:
+                    logfunc('Reading {} artifact had errors!'.format(plugin.name))
                     logfunc('Error was {}'.format(str(ex)))
-                    continue  # cannot do work
-            try:
-                plugin.method(files_found, category_folder, seeker, wrap_text, time_offset)
-                if plugin.name == 'logarchive':
-                    lava_db_path = os.path.join(out_params.report_folder_base, '_lava_artifacts.db')
-                    if does_table_exist_in_db(lava_db_path, 'logarchive'):
-                        loader["logarchive_artifacts"].method([lava_db_path], category_folder, seeker, wrap_text, time_offset)
-                    if does_table_exist_in_db(lava_db_path, 'logarchive_artifacts'):
-                        unifed_logs_artifacts = []
-                        unifed_logs_artifacts = [plugin.name for plugin in loader.plugins
-                                                 if plugin.module_name=='logarchive'
-                                                 and plugin.name != 'logarchive'
-                                                 and plugin.name != 'logarchive_artifacts']
-                        for unifed_log_artifact in unifed_logs_artifacts:
-                            loader[unifed_log_artifact].method([lava_db_path], category_folder, seeker, wrap_text, time_offset)
-            except Exception as ex:
-                logfunc('Reading {} artifact had errors!'.format(plugin.name))
-                logfunc('Error was {}'.format(str(ex)))
-                logfunc('Exception Traceback: {}'.format(traceback.format_exc()))
-                continue  # nope
-        else:
-            logfunc(f"No file found")
-        logfunc('{} [{}] artifact completed'.format(plugin.name, plugin.module_name))
+                    logfunc('Exception Traceback: {}'.format(traceback.format_exc()))
+                    GuiWindow.post('plugin_finished', name=plugin.name, module=plugin.module_name,
+                                   seconds=perf_counter() - plugin_start, success=False)
+                    continue  # nope
+            else:
+                logfunc(f"No file found")
+            logfunc('{} [{}] artifact completed'.format(plugin.name, plugin.module_name))
+            GuiWindow.post('plugin_finished', name=plugin.name, module=plugin.module_name,
+                           seconds=perf_counter() - plugin_start, success=True)
+        finally:
+            flush_logs() # also resets the repeated message counts for the next artifact
     log.close()
+    preview_service.shutdown()
+    write_hash_manifest(out_params.report_folder_base, seeker.get_file_hashes())
+    seeker.cleanup()
 
     write_device_info()
     if lava_only:
@@ -474,6 +642,8 @@ def crunch_artifacts(
     run_time_secs =  end_wall - start_wall
     run_time_HMS = strftime('%H:%M:%S', gmtime(run_time_secs))
     logfunc("Processing time (wall)= {}".format(run_time_HMS))
+    if media_store.references:
+        logfunc(media_store.summary())
 
     logfunc('')
     logfunc('Report generation started.')
@@ -484,10 +654,12 @@ def crunch_artifacts(
         if input_path.startswith('\\\\?\\'):
             input_path = input_path[4:]
     
+    flush_logs() # the report includes Screen_Output.html
     report.generate_report(out_params.report_folder_base, run_time_secs, run_time_HMS, extracttype, input_path, casedata, profile_filename, icons, lava_only)
     logfunc('Report generation Completed.')
     logfunc('')
     logfunc(f'Report location: {out_params.report_folder_base}')
+    flush_logs()
 
     return True
 
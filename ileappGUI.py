@@ -1,6 +1,9 @@
 import tkinter as tk
 import typing
 import json
+import queue
+import threading
+import traceback
 import ileapp
 import webbrowser
 import base64
@@ -8,7 +11,7 @@ import base64
 import scripts.plugin_loader as plugin_loader
 
 from PIL import Image, ImageTk
-from tkinter import ttk, filedialog as tk_filedialog, messagebox as tk_msgbox
+from tkinter import ttk, filedialog as tk_filedialog, messagebox as tk_msgbox, simpledialog as tk_simpledialog
 from scripts.version_info import ileapp_version
 from scripts.search_files import *
 from scripts.tz_offset import tzvalues
@@ -201,6 +204,13 @@ def process(casedata):
         input_path = input_entry.get()
         output_folder = output_entry.get()
 
+        itunes_password = None
+        if extracttype == 'itunes' and is_encrypted_backup(input_path):
+            itunes_password = tk_simpledialog.askstring(
+                'Encrypted backup', 'The iTunes backup is encrypted, enter its password:', show='*', parent=main_window)
+            if not itunes_password:
+                return
+
         # ios file system extractions contain paths > 260 char, which causes problems
         # This fixes the problem by prefixing \\?\ on each windows path.
         if is_platform_windows():
@@ -222,40 +232,93 @@ def process(casedata):
         bottom_frame.grid_remove()
         progress_bar.grid(padx=16, sticky='we')
 
+        # Processing runs on a worker thread and reports through GuiWindow.events,
+        # the Tk thread only redraws what poll_processing_events() drains from it
+        GuiWindow.events = queue.SimpleQueue()
+        threading.Thread(
+            target=run_processing, name='processing', daemon=True,
+            args=(selected_modules, extracttype, input_path, out_params, wrap_text, casedata, time_offset,
+                  itunes_password)).start()
+        main_window.after(POLL_INTERVAL_MS, poll_processing_events, out_params)
+
+
+def run_processing(selected_modules, extracttype, input_path, out_params, wrap_text, casedata, time_offset,
+                   itunes_password=None):
+    '''Runs on the processing thread, must not touch the Tk widgets'''
+    crunch_successful = False
+    try:
         initialize_lava(input_path, out_params.report_folder_base, extracttype)
 
         crunch_successful = ileapp.crunch_artifacts(
             selected_modules, extracttype, input_path, out_params, wrap_text, loader,
-            casedata, time_offset, profile_filename)
+            casedata, time_offset, profile_filename, itunes_password)
         
         lava_finalize_output(out_params.report_folder_base)
-
-        if crunch_successful:
-            report_path = os.path.join(out_params.report_folder_base, 'index.html')
-            if report_path.startswith('\\\\?\\'):  # windows
-                report_path = report_path[4:]
-            if report_path.startswith('\\\\'):  # UNC path
-                report_path = report_path[2:]
-            progress_bar.grid_remove()
-            if lava_only_artifacts:
-                message = "You have selected artifacts that are likely to return too much data "
-                message += "to be viewed in a Web browser.\n\n"
-                message += "Please see the 'LAVA only artifacts' tab in the HTML report for a list of these artifacts "
-                message += "and instructions on how to view them."
-                tk_msgbox.showwarning(
-                    title="Important information",
-                    message=message,
-                    parent=main_window)
-            open_report_button = ttk.Button(main_window, text='Open Report & Close', command=lambda: open_report(report_path))
-            open_report_button.grid(ipadx=8)
-        else:
-            log_path = out_params.screen_output_file_path
-            if log_path.startswith('\\\\?\\'):  # windows
-                log_path = log_path[4:]
-            tk_msgbox.showerror(
-                title='Error',
-                message=f'Processing failed  :( \nSee log for error details..\nLog file located at {log_path}',
+    except Exception as ex:
+        logfunc(f'Processing failed: {ex}')
+        logfunc(traceback.format_exc())
+        flush_logs()
+    finally:
+        GuiWindow.post('finished', success=crunch_successful)
+
+
+def poll_processing_events(out_params):
+    '''Drains the processing events on the Tk thread, log lines are inserted in one go'''
+    log_lines = []
+    finished = None
+    while True:
+        try:
+            event, details = GuiWindow.events.get_nowait()
+        except queue.Empty:
+            break
+        if event == 'log':
+            log_lines.append(details['text'])
+        elif event == 'progress':
+            progress_bar.config(value=details['value'])
+        elif event == 'plugin_started':
+            main_window.title(f'iLEAPP version {ileapp_version} - '
+                              f'[{details["number"]}/{details["total"]}] {details["name"]}')
+        elif event == 'finished':
+            finished = details['success']
+    if log_lines:
+        log_text.insert('end', ''.join(log_lines))
+        log_text.see('end')
+    if finished is None:
+        main_window.after(POLL_INTERVAL_MS, poll_processing_events, out_params)
+    else:
+        GuiWindow.events = None
+        main_window.title(f'iLEAPP version {ileapp_version}')
+        processing_finished(finished, out_params)
+
+
+def processing_finished(crunch_successful, out_params):
+    '''Shows the outcome of the processing, on the Tk thread'''
+    if crunch_successful:
+        report_path = os.path.join(out_params.report_folder_base, 'index.html')
+        if report_path.startswith('\\\\?\\'):  # windows
+            report_path = report_path[4:]
+        if report_path.startswith('\\\\'):  # UNC path
+            report_path = report_path[2:]
+        progress_bar.grid_remove()
+        if lava_only_artifacts:
+            message = "You have selected artifacts that are likely to return too much data "
+            message += "to be viewed in a Web browser.\n\n"
+            message += "Please see the 'LAVA only artifacts' tab in the HTML report for a list of these artifacts "
+            message += "and instructions on how to view them."
+            tk_msgbox.showwarning(
+                title="Important information",
+                message=message,
                 parent=main_window)
+        open_report_button = ttk.Button(main_window, text='Open Report & Close', command=lambda: open_report(report_path))
+        open_report_button.grid(ipadx=8)
+    else:
+        log_path = out_params.screen_output_file_path
+        if log_path.startswith('\\\\?\\'):  # windows
+            log_path = log_path[4:]
+        tk_msgbox.showerror(
+            title='Error',
+            message=f'Processing failed  :( \nSee log for error details..\nLog file located at {log_path}',
+            parent=main_window)
 
 
 def select_input(button_type):
@@ -446,6 +509,7 @@ window_width = 890
 window_height = 620
 
 ## Variables
+POLL_INTERVAL_MS = 100
 icon = resource_path('icon.png')
 loader: typing.Optional[plugin_loader.PluginLoader] = None
 loader = plugin_loader.PluginLoader()
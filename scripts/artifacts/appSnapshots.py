@@ -20,18 +20,45 @@ __artifacts_v2__ = {
 }
 
 
+import os
 import inspect
 import hashlib
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from PIL import Image
 from scripts.ktx.ios_ktx2png import KTX_reader, liblzfse
 from scripts.ilapfuncs import artifact_processor, check_in_media, lava_get_full_media_info, logfunc, convert_unix_ts_to_utc
 
+SNAPSHOT_FORMAT = 'png'  # 'png' (lossless) or 'jpeg' (much faster to encode, lossy)
+PREVIEW_MAX_SIZE = None  # e.g. (512, 512) to save downscaled previews instead of full size snapshots
+SNAPSHOT_CACHE_FOLDER = None  # Folder to keep converted snapshots in between runs, keyed by the hash of the KTX file
+MAX_WORKERS = min(8, os.cpu_count() or 1)
 
-def save_ktx_to_png_if_valid(ktx_path, save_to_path):
-    '''Excludes all white or all black blank images'''
+
+def get_file_sha1(file_path):
+    with open(file_path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def get_converted_suffix():
+    return '.jpg' if SNAPSHOT_FORMAT == 'jpeg' else '.png'
+
+
+def get_cache_path(ktx_hash):
+    if not SNAPSHOT_CACHE_FOLDER:
+        return None
+    variant = f'_{PREVIEW_MAX_SIZE[0]}x{PREVIEW_MAX_SIZE[1]}' if PREVIEW_MAX_SIZE else ''
+    return os.path.join(SNAPSHOT_CACHE_FOLDER, ktx_hash + variant + get_converted_suffix())
+
+
+def save_ktx_to_image_if_valid(ktx_path, save_to_path, cache_path=None):
+    '''Converts an iOS KTX (ASTC 4x4) snapshot to SNAPSHOT_FORMAT.
+       Returns (converted, error message), runs on worker threads so it doesn't log itself'''
+    if cache_path and os.path.exists(cache_path):
+        shutil.copyfile(cache_path, save_to_path)
+        return True, None
 
     with open(ktx_path, 'rb') as f:
         ktx = KTX_reader()
@@ -43,15 +70,51 @@ def save_ktx_to_png_if_valid(ktx_path, save_to_path):
                 # if sum(dec_img.convert("L").getextrema()) in (0, 2):
                 #     logfunc('Skipping image as it is blank')
                 #     return False
-                    
-                dec_img.save(save_to_path, "PNG", compress_type=3)
-                #                                    ^
-                # as per https://github.com/python-pillow/Pillow/issues/5986
 
-                return True
+                if PREVIEW_MAX_SIZE:
+                    dec_img.thumbnail(PREVIEW_MAX_SIZE)
+                if SNAPSHOT_FORMAT == 'jpeg':
+                    dec_img.convert('RGB').save(save_to_path, "JPEG", quality=90)
+                else:
+                    dec_img.save(save_to_path, "PNG", compress_type=3)
+                    #                                    ^
+                    # as per https://github.com/python-pillow/Pillow/issues/5986
+
+                if cache_path:
+                    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                    shutil.copyfile(save_to_path, cache_path)
+                return True, None
         except (OSError, ValueError, liblzfse.error) as ex:
-            logfunc(f'Had an exception - {str(ex)}')
-    return False
+            return False, f'Had an exception - {str(ex)}'
+    return False, None
+
+
+def convert_snapshots(ktx_paths):
+    '''Converts the KTX files on a thread pool, identical textures are only converted once.
+       Returns {ktx path: converted file path or None}'''
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        hashes = list(executor.map(get_file_sha1, ktx_paths))
+
+        # First file with a given texture gets the converted file, the others share it
+        unique = {}
+        for ktx_path, ktx_hash in zip(ktx_paths, hashes):
+            unique.setdefault(ktx_hash, ktx_path)
+        futures = {}
+        for ktx_hash, ktx_path in unique.items():
+            converted_path = Path(ktx_path).with_suffix(get_converted_suffix())
+            futures[ktx_hash] = (converted_path, executor.submit(
+                save_ktx_to_image_if_valid, ktx_path, converted_path, get_cache_path(ktx_hash)))
+
+        converted = {}
+        for ktx_hash, (converted_path, future) in futures.items():
+            is_converted, error = future.result()
+            if error:
+                logfunc(error)
+            converted[ktx_hash] = converted_path if is_converted else None
+
+    if len(unique) < len(ktx_paths):
+        logfunc(f'Converted {len(unique)} unique snapshots out of {len(ktx_paths)} KTX files')
+    return {ktx_path: converted[ktx_hash] for ktx_path, ktx_hash in zip(ktx_paths, hashes)}
 
 
 @artifact_processor
@@ -70,6 +133,10 @@ def applicationSnapshots(files_found, report_folder, seeker, wrap_text, timezone
     for path in paths:
         paths_found = seeker.search(path)
         files_found.extend(paths_found)
+
+    ktx_paths = [file_found for file_found in files_found 
+                 if file_found.lower().endswith('.ktx') and Path(file_found).stat().st_size >= 2500] # smaller ones are blank
+    converted_paths = convert_snapshots(ktx_paths)
     
     for file_found in files_found:
         media_path = Path(file_found)
@@ -82,16 +149,14 @@ def applicationSnapshots(files_found, report_folder, seeker, wrap_text, timezone
         if dash_pos > 0:
             app_name = app_name[0:dash_pos]
         if file_found.lower().endswith('.ktx'):
-            if media_path.stat().st_size < 2500: # too small, they are blank
-                continue
-            png_path = media_path.with_suffix((".png"))
-            if save_ktx_to_png_if_valid(media_path, png_path):
-                media_item = check_in_media(artifact_info, report_folder, seeker, files_found, file_found, 
-                                            app_name, png_path)
+            converted_path = converted_paths.get(file_found)
+            if converted_path:
+                media_item = check_in_media(artifact_info, report_folder, seeker, (file_found,), file_found, 
+                                            app_name, converted_path)
             else:
                 continue
         else:
-            media_item = check_in_media(artifact_info, report_folder, seeker, files_found, file_found, app_name)
+            media_item = check_in_media(artifact_info, report_folder, seeker, (file_found,), file_found, app_name)
         last_modified_date = convert_unix_ts_to_utc(lava_get_full_media_info(media_item)[-1])
         data_list.append([last_modified_date, app_name, file_found, media_item])
     
@@ -178,8 +178,6 @@ from scripts.ilapfuncs import get_file_path, get_sqlite_db_records, get_plist_co
     convert_plist_date_to_utc, convert_unix_ts_to_utc, convert_ts_int_to_utc, check_in_media, artifact_processor, logfunc
 
 
-# booking app id
-booking_app_identifier = None
 # constants
 LINE_BREAK = '\n'
 COMMA_SEP = ', '
@@ -413,7 +411,6 @@ def append_tag_value(target, tag, value):
 def booking_preferences(files_found, report_folder, seeker, wrap_text, timezone_offset):
 
     source_path = None
-    global booking_app_identifier
 
     # all files
     for file_found in files_found:
@@ -427,9 +424,6 @@ def booking_preferences(files_found, report_folder, seeker, wrap_text, timezone_
             # source path
             source_path = file_found
 
-            # Library/Preferences/com.booking.BookingApp.plist
-            booking_app_identifier = Path(file_found).parents[2].name
-
         except Exception as e:
             logfunc(f"Error: {str(e)}")
             pass
@@ -1156,7 +1150,7 @@ def booking_booked(files_found, report_folder, seeker, wrap_text, timezone_offse
 
 
     # Documents
-    documents = seeker.search(f"*/{booking_app_identifier}/Documents/Booking #*", return_on_first_hit=False)
+    documents = seeker.search_in_container('com.booking.BookingApp', 'Documents/Booking #*')
 
     # all files
     for file_found in files_found:
@@ -8,7 +8,7 @@ __artifacts_v2__ = {
         "requirements": "none",
         "category": "Burner",
         "notes": "App version tested: 4.0.18, 4.3.3, 5.3.8, 5.4.11",
-        "paths": ('*/mobile/Containers/Shared/AppGroup/*/Phoenix.sqlite*'),
+        "paths": ('*/mobile/Containers/Shared/AppGroup/*/Phoenix.sqlite*',),
         "output_types": ["lava", "tsv", "timeline"]
     },
     "get_burner_messages": {
@@ -20,8 +20,7 @@ __artifacts_v2__ = {
         "requirements": "none",
         "category": "Burner",
         "notes": "App version tested: 4.0.18, 4.3.3, 5.3.8, 5.4.11",
-        "paths": ('*/mobile/Containers/Shared/AppGroup/*/Phoenix.sqlite*',
-                  '*/mobile/Containers/Data/Application/*/.com.apple.mobile_container_manager.metadata.plist'),
+        "paths": ('*/mobile/Containers/Shared/AppGroup/*/Phoenix.sqlite*',),
         "output_types": ["lava", "tsv"],
         "data_views": {
             "chat": {
@@ -44,7 +43,7 @@ __artifacts_v2__ = {
         "requirements": "none",
         "category": "Burner",
         "notes": "App version tested: 4.0.18, 4.3.3, 5.3.8, 5.4.11",
-        "paths": ('*/mobile/Containers/Shared/AppGroup/*/Phoenix.sqlite*'),
+        "paths": ('*/mobile/Containers/Shared/AppGroup/*/Phoenix.sqlite*',),
         "output_types": ["lava", "tsv"]
     },
     "get_burner_numbers": {
@@ -56,14 +55,13 @@ __artifacts_v2__ = {
         "requirements": "none",
         "category": "Burner",
         "notes": "App version tested: 4.0.18, 4.3.3, 5.3.8, 5.4.11",
-        "paths": ('*/mobile/Containers/Shared/AppGroup/*/Phoenix.sqlite*'),
+        "paths": ('*/mobile/Containers/Shared/AppGroup/*/Phoenix.sqlite*',),
         "output_types": ["lava", "tsv", "timeline"]
 
     }
 }
 
 import os
-import plistlib
 import shutil
 
 from pathlib import Path
@@ -397,26 +395,18 @@ def get_burner_messages(files_found, report_folder, seeker, wrap_text, timezone_
     report_file = 'Unknown'
 
     mediafilepaths = []
-    for file_foundm in files_found:
-        if file_foundm.endswith('.com.apple.mobile_container_manager.metadata.plist'):
-            report_file = file_foundm
-            with open(file_foundm, 'rb') as f:
-                pl = plistlib.load(f)
-                if pl['MCMMetadataIdentifier'] == 'com.adhoclabs.burner':
-                    fulldir = (os.path.dirname(file_foundm))
-                    identifier = (os.path.basename(fulldir))
-
-                    # outgoingPhotos
-                    media_files = seeker.search(f'*/{identifier}/Library/Caches/outgoingPhotos/**')
-
-                    # thumbnails
-                    temp = seeker.search(f'*/{identifier}/Library/Caches/thumbnails/**')
-                    if len(temp) > 0:
-                        media_files.extend(temp)
-                    mediafilepaths = media_files
-                    break
-
-                f.close()
+    for container in seeker.get_containers('com.adhoclabs.burner', 'Data'):
+        report_file = seeker.find_exact(f'{container.path}/.com.apple.mobile_container_manager.metadata.plist', True) or report_file
+
+        # outgoingPhotos
+        media_files = seeker.search_under(container.path, 'Library/Caches/outgoingPhotos/**')
+
+        # thumbnails
+        temp = seeker.search_under(container.path, 'Library/Caches/thumbnails/**')
+        if len(temp) > 0:
+            media_files.extend(temp)
+        mediafilepaths = media_files
+        break
 
 
 
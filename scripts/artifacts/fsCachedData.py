@@ -2,15 +2,17 @@ import os
 import datetime
 
 from packaging import version
-from scripts.filetype import guess_mime
+from scripts.filetype import guess_mime_batch
 from scripts.artifact_report import ArtifactHtmlReport
 from scripts.ilapfuncs import logfunc, logdevinfo, timeline, tsv, is_platform_windows, open_sqlite_db_readonly, media_to_html
 
 
 def get_fsCachedData(files_found, report_folder, seeker, wrap_text, timezone_offset):
     data_list = []  
+    mimes = dict(zip(files_found, guess_mime_batch(files_found)))
     
     for file_found in files_found:
+        mime = mimes.get(file_found)
         file_found = str(file_found)
         
         filename = os.path.basename(file_found)
@@ -21,7 +23,6 @@ def get_fsCachedData(files_found, report_folder, seeker, wrap_text, timezone_off
         #ext = (mime.split('/')[1])
             
         if os.path.isfile(file_found):
-            mime = guess_mime(file_found)
             media = media_to_html(file_found, files_found, report_folder)
             data_list.append((utc_modified_date, media, mime, filename, file_found))
         
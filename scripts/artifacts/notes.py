@@ -3,13 +3,13 @@
 # and used under terms of the MIT License.
 
 from os.path import dirname, join
-from PIL import Image
 import imghdr
 import zlib
 import binascii
 
 from scripts.artifact_report import ArtifactHtmlReport
 from scripts.ilapfuncs import logfunc, tsv, timeline, open_sqlite_db_readonly, does_column_exist_in_db
+from scripts.media_previews import make_preview
 
 
 def get_notes(files_found, report_folder, seeker, wrap_text, timezone_offset):
@@ -252,10 +252,8 @@ def ReadLengthField(blob):
 
 
 def save_original_attachment_as_thumbnail(file, store_path):
-    image = Image.open(file)
     thumbnail_max_size = (350, 350)
-    image.thumbnail(thumbnail_max_size)
-    image.save(store_path)
+    make_preview(file, store_path, thumbnail_max_size)
 
 __artifacts__ = {
     "notes": (
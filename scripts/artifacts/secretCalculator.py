@@ -33,10 +33,10 @@ def get_secretCalculator(files_found, report_folder, seeker, wrap_text, timezone
                 else:
                     split_on = '/private/'
                 p = str(pathlib.Path(file_found).parent).split(split_on, 1)
-                file = f'**{p[1]}/Library/data.sqlite'
+                file = f'{p[1]}/Library/data.sqlite'
                 if is_platform_windows():
                     file.replace('/', '\\')
-                db_file = seeker.search(file, return_on_first_hit=True)
+                db_file = seeker.find_by_suffix(file, return_on_first_hit=True)
                 if not db_file:
                     logfunc(' [!] Unable to extract db file: "{}"'.format(db_file))
                     return
@@ -65,7 +65,7 @@ def get_secretCalculator(files_found, report_folder, seeker, wrap_text, timezone
                         fileNameToSearch = f'/private/{p[1]}/Library/Data/{row[2]}.mov'
                         if is_platform_windows():
                             fileNameToSearch.replace('/', '\\')
-                        seekerResults = seeker.search(f'**{fileNameToSearch}', return_on_first_hit=True)
+                        seekerResults = seeker.find_by_suffix(fileNameToSearch, return_on_first_hit=True)
                         thumb = None
                         attachmentFile = None
                         if seekerResults:
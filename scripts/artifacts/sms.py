@@ -125,7 +125,7 @@ def sms(files_found, report_folder, seeker, wrap_text, timezone_offset):
     def copyAttachments(rec):
         pathToAttachment = None
         if rec["Attachment Path"]:
-            pathToAttachment = seeker.search('*'+rec["Attachment Path"].replace('~', '', 1), return_on_first_hit=True)
+            pathToAttachment = seeker.find_by_suffix(rec["Attachment Path"].replace('~', '', 1), return_on_first_hit=True)
             if not pathToAttachment:
                 logfunc(' [!] Unable to extract attachment file: "{}"'.format(rec["Attachment Path"]))
                 return
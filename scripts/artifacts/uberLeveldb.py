@@ -30,7 +30,7 @@ def get_uberloc(files_found, report_folder, seeker, wrap_text, timezone_offset):
     for in_db_dir in in_dirs:
         leveldb_records = scripts.ccl_leveldb.RawLevelDb(in_db_dir)
         
-        for record in leveldb_records.iterate_records_raw():
+        for record in leveldb_records.iterate_records_raw(max_workers=2):
             #print(record.seq, record.user_key, record.value)
             record_sequence = record.seq
             record_key = record.user_key
@@ -1,9 +1,12 @@
 import os
 import re
+import mmap
 import string
+import hashlib
 
 from pathlib import Path
 from html import escape
+from concurrent.futures import ThreadPoolExecutor
 
 from scripts.artifact_report import ArtifactHtmlReport
 from scripts.ilapfuncs import logfunc, is_platform_windows
@@ -14,9 +17,91 @@ not_control_char_re = re.compile(f'[^{control_chars}]' + '{4,}')
 printable_chars_for_re = string.printable.replace('\\', '\\\\').replace('[', '\\[').replace(']', '\\]')
 ascii_chars_re = re.compile(f'[{printable_chars_for_re}]' + '{4,}')
 
+# Bytes versions of the above, these run directly over the mmap of the file
+ascii_bytes_re = re.compile(f'[{printable_chars_for_re}]'.encode('ascii') + b'{4,}')
+utf16le_bytes_re = re.compile(f'(?:[{printable_chars_for_re}]\x00)'.encode('ascii') + b'{4,}')
+
+WINDOW_SIZE = 16 * 1024 * 1024  # bytes scanned per regex pass, matches crossing a window are rescanned
+DEDUP_MODE = 'hash'  # 'hash' keeps a 16 byte digest per unique string, 'exact' keeps the strings, 'none' keeps everything
+EXTRACT_UTF16 = False  # Also extract UTF-16LE strings (slower, these are written after the ASCII strings)
+MAX_WORKERS = 2  # the regex holds the GIL, a second thread only overlaps reading the next file
+
+
+def iter_strings(buffer, pattern, char_width=1, window=WINDOW_SIZE):
+    '''Yields the matches of pattern over buffer, looking at one window of the buffer at a time'''
+    size = len(buffer)
+    overlap = 4 * char_width - 1  # a shorter run at the end of a window can't have matched yet
+    window = max(window, overlap + 1)
+    pos = 0
+    while pos < size:
+        endpos = min(pos + window, size)
+        carry = None
+        for match in pattern.finditer(buffer, pos, endpos):
+            if endpos < size and match.end() >= endpos - (char_width - 1):
+                # Run may continue past the window, scan it again with the next one
+                carry = match.start()
+                break
+            yield match.group()
+        if endpos == size:
+            break
+        if carry is None:
+            pos = endpos - overlap
+        elif carry > pos:
+            pos = carry
+        else:
+            # A single run fills the whole window, widen it until the run ends
+            window *= 2
+
+
+def _open_buffer(path):
+    with open(path, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return f.read()
+
+
+def extract_strings(file_found, outputpath):
+    '''Writes the unique strings of file_found to outputpath, returns the number of strings written'''
+    passes = [(ascii_bytes_re, 1, 'ascii')]
+    if EXTRACT_UTF16:
+        passes.append((utf16le_bytes_re, 2, 'utf-16-le'))
+
+    seen = set() # For deduplication of strings found
+    count = 0
+    buffer = _open_buffer(file_found)
+    try:
+        with open(outputpath, 'w') as g:
+            for pattern, char_width, encoding in passes:
+                for match in iter_strings(buffer, pattern, char_width):
+                    text = match.decode(encoding)
+                    if DEDUP_MODE == 'hash':
+                        key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+                    elif DEDUP_MODE == 'exact':
+                        key = text
+                    else:
+                        key = None
+                    if key is not None:
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                    g.write(text + '\n')
+                    count += 1
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+
+    if not count:
+        try:
+            os.remove(outputpath) # delete empty file
+        except OSError:
+            pass
+    return count
+
+
 def get_walStrings(files_found, report_folder, seeker, wrap_text, timezone_offset):
     x = 1
-    data_list = []
+    jobs = []
     for file_found in files_found:
         filesize = Path(file_found).stat().st_size
         if filesize == 0:
@@ -28,31 +113,32 @@ def get_walStrings(files_found, report_folder, seeker, wrap_text, timezone_offse
         level2, level1 = (os.path.split(outputpath))
         level2 = (os.path.split(level2)[1])
         final = level2 + '/' + level1
-        
-        unique_items = set() # For deduplication of strings found
-        out_lines = []
-        with open(file_found, errors="ignore") as f:  # Python 3.x
-            data =  f.read()
-            #for match in not_control_char_re.finditer(data): # This gets all unicode chars, can include lot of garbage if you only care about English, will miss out other languages
-            for match in ascii_chars_re.findall(data): # Matches ONLY Ascii (old behavior) , good if you only care about English
-                if match not in unique_items:
-                    out_lines.append(match)
-                    unique_items.add(match)
-
-        if unique_items:
-            with open(outputpath, 'w') as g:
-                g.write('\n'.join(out_lines) + '\n')
+
+        jobs.append((filesize, file_found, journalName, outputpath, final))
+        x = x + 1
+
+    # Largest files first so a big WAL doesn't end up running alone at the end
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {}
+        for job in sorted(jobs, key=lambda job: job[0], reverse=True):
+            futures[job[1]] = executor.submit(extract_strings, job[1], job[3])
+
+    data_list = []
+    for filesize, file_found, journalName, outputpath, final in jobs:
+        try:
+            count = futures[file_found].result()
+        except (OSError, ValueError) as ex:
+            logfunc(f'Error reading {file_found}: {ex}')
+            continue
+        if count:
             out = (f'<a href="{final}" style = "color:blue" target="_blank">{journalName}</a>')
             data_list.append((out, file_found))
-        else:
-            try:
-                os.remove(outputpath) # delete empty file
-            except OSError:
-                pass
-        x = x + 1
 
     location =''
-    description = 'ASCII strings extracted from SQLite journal and WAL files.'
+    if EXTRACT_UTF16:
+        description = 'ASCII and UTF-16 strings extracted from SQLite journal and WAL files.'
+    else:
+        description = 'ASCII strings extracted from SQLite journal and WAL files.'
     report = ArtifactHtmlReport('Strings - SQLite Journal & WAL')
     report.start_artifact_report(report_folder, 'Strings - SQLite Journal & WAL', description)
     report.add_script()
@@ -65,4 +151,4 @@ __artifacts__ = {
         "SQLite Journaling",
         ('**/*-wal','**/*-journal'),
         get_walStrings)
-}
\ No newline at end of file
+}
@@ -0,0 +1,259 @@
+# Processing of several extractions from one ileapp invocation.
+#
+# Each job runs in its own process: the reporting code keeps per-extraction state
+# in module globals (output paths, device info, LAVA db), so jobs can't share one.
+# Where fork is available the job processes are forked from the batch process
+# after the plugins are discovered and their modules imported, so every job
+# starts warm. Elsewhere they are spawned and only reuse the plugin manifest.
+# The job server has HTTP threads running, so its jobs come from a forkserver
+# instead: forking a threaded process copies locks other threads may hold.
+#
+# A job process reports through the GuiWindow events that crunch_artifacts()
+# already posts (plugin_started, plugin_finished, records, ...), forwarded to
+# the parent through a pipe of its own, plus a final finished event. Each job
+# has its own pipe so that terminating a cancelled job can't leave a shared
+# channel half written or locked for the others.
+#
+# Usage:
+#   runner = JobRunner(run_job, max_jobs=2, worker_budget=4)  # run_job(args) -> bool
+#   runner.submit('job-1', args)
+#   while runner.busy():
+#       for job_id, event, details in runner.poll():
+#           ...
+
+import multiprocessing
+import multiprocessing.connection
+import shlex
+import sys
+import threading
+import traceback
+
+from collections import deque
+from time import perf_counter, sleep, time
+
+import scripts.search_files as search_files
+
+from scripts.ilapfuncs import GuiWindow, flush_logs
+from scripts.media_previews import preview_service
+
+BATCH_JOBS = 2  # extractions processed at the same time
+BATCH_WORKERS = 4  # list/copy/preview threads of each extraction
+POLL_INTERVAL = 0.5  # seconds
+
+
+def read_jobs_file(path):
+    '''Yields (line number, arguments) for every job of a jobs file: one extraction per line, with
+       the ileapp command line arguments quoted like in a POSIX shell. Blank lines and lines
+       starting with # are skipped'''
+    with open(path, 'rt', encoding='utf-8') as jobs_file:
+        for line_number, line in enumerate(jobs_file, start=1):
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line_number, shlex.split(line)
+
+
+def _process_context(threaded=False):
+    '''fork keeps the imported plugin modules, but isn't safe on macOS and doesn't exist on Windows.
+       A threaded parent gets forkserver, whose server process imports the main module once'''
+    if sys.platform.startswith('linux'):
+        if threaded:
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['__main__'])
+            return context
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def forks_job_processes(threaded=False):
+    return _process_context(threaded).get_start_method() == 'fork'
+
+
+class _JobEvents:
+    '''Stands in for the GUI event queue in a job process, forwards the events to the batch process
+       through the job's pipe. The log lines already go to the Screen_Output.html of the job'''
+    def __init__(self, connection, job_id):
+        self._connection = connection
+        self._job_id = job_id
+        self._lock = threading.Lock()  # events are posted from the worker threads too
+
+    def put(self, item):
+        event, details = item
+        if event != 'log':
+            self.send(event, details)
+
+    def send(self, event, details):
+        with self._lock:
+            self._connection.send((self._job_id, event, details))
+
+
+def _run_job_process(target, job_id, args, connection, worker_budget):
+    '''Entry point of a job process'''
+    threading.current_thread().name = f'ileapp-job-{job_id}' # when forked, it has the name of the forking thread
+    events = GuiWindow.events = _JobEvents(connection, job_id)
+    if worker_budget:
+        search_files.COPY_WORKERS = search_files.WALK_WORKERS = worker_budget
+        preview_service.max_workers = worker_budget
+    success = False
+    error = None
+    try:
+        success = bool(target(args))
+    except BaseException as ex:
+        error = f'{type(ex).__name__}: {ex}'
+        traceback.print_exc()
+    finally:
+        try:
+            flush_logs()
+        except Exception:
+            pass
+        events.send('finished', {'success': success, 'error': error})
+        connection.close()
+
+
+class JobRunner:
+    '''Runs target(args) for every submitted job in a child process, max_jobs at a time. threaded
+       tells that the caller runs other threads, job processes are then not forked from it'''
+    def __init__(self, target, max_jobs=BATCH_JOBS, worker_budget=BATCH_WORKERS, threaded=False):
+        self.target = target
+        self.max_jobs = max(1, max_jobs)
+        self.worker_budget = worker_budget
+        self._context = _process_context(threaded)
+        self._pending = deque()
+        self._running = {}    # job id: (process, read end of its pipe)
+        self._cancelled = {}  # job id: terminated process, not exited yet
+
+    def submit(self, job_id, args):
+        self._pending.append((job_id, args))
+
+    def busy(self):
+        return bool(self._pending or self._running or self._cancelled)
+
+    def poll(self, timeout=POLL_INTERVAL):
+        '''Starts queued jobs in the free slots and returns the events received, as
+           (job id, event, details). Waits up to timeout for the first one'''
+        events = []
+        while self._pending and len(self._running) + len(self._cancelled) < self.max_jobs:
+            job_id, args = self._pending.popleft()
+            connection, child_connection = self._context.Pipe(duplex=False)
+            process = self._context.Process(
+                target=_run_job_process, name=f'ileapp-job-{job_id}',
+                args=(self.target, job_id, args, child_connection, self.worker_budget))
+            process.start()
+            child_connection.close() # so that the pipe reaches EOF when the process exits
+            self._running[job_id] = (process, connection)
+            events.append((job_id, 'started', {'pid': process.pid}))
+
+        jobs = {connection: job_id for job_id, (_, connection) in self._running.items()}
+        jobs.update({process.sentinel: job_id for job_id, process in self._cancelled.items()})
+        if jobs:
+            for ready in multiprocessing.connection.wait(list(jobs), 0 if events else timeout):
+                job_id = jobs[ready]
+                if job_id in self._cancelled:
+                    self._cancelled.pop(job_id).join()
+                    events.append((job_id, 'finished', {'success': False, 'error': 'cancelled'}))
+                else:
+                    events.extend(self._receive(job_id))
+        elif not events:
+            sleep(timeout)
+        return events
+
+    def _receive(self, job_id):
+        '''Returns the events waiting in the pipe of a running job, and its finished event once its
+           process is done'''
+        process, connection = self._running[job_id]
+        events = []
+        try:
+            while connection.poll():
+                events.append(connection.recv())
+                if events[-1][1] == 'finished':
+                    break
+            else:
+                return events
+        except (EOFError, OSError):
+            events.append((job_id, 'finished', {'success': False, 'error': 'job process exited without reporting'}))
+        del self._running[job_id]
+        connection.close()
+        process.join()
+        return events
+
+    def cancel(self, job_id):
+        '''Removes a queued job, or terminates its process. Returns 'queued' or 'running' for what
+           was cancelled, None if the job is unknown or done. A terminated job still gets its
+           finished event, once its process has exited'''
+        for pending in self._pending:
+            if pending[0] == job_id:
+                self._pending.remove(pending)
+                return 'queued'
+        if job_id not in self._running:
+            return None
+        process, connection = self._running.pop(job_id)
+        process.terminate()
+        connection.close() # whatever the process was writing is dropped with its pipe
+        self._cancelled[job_id] = process
+        return 'running'
+
+
+class BatchSummary:
+    '''Throughput of a batch, built from the events of its jobs'''
+    def __init__(self):
+        self.started = time()
+        self._start = perf_counter()
+        self.jobs = {}     # job id: dict
+        self.modules = {}  # (module, artifact): dict
+
+    def add_job(self, job_id, **details):
+        self.jobs[job_id] = dict(details, success=None, error=None, seconds=None, plugins=0, records=0)
+
+    def record(self, job_id, event, details):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        if event == 'started':
+            job['start'] = perf_counter()
+        elif event == 'plugin_finished':
+            job['plugins'] += 1
+            module = self.modules.setdefault((details['module'], details['name']), {
+                'module': details['module'], 'artifact': details['name'],
+                'jobs': 0, 'failures': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            module['jobs'] += 1
+            module['failures'] += 0 if details.get('success') else 1
+            module['total_seconds'] += details['seconds']
+            module['max_seconds'] = max(module['max_seconds'], details['seconds'])
+        elif event == 'records':
+            job['records'] += details.get('count', 0)
+        elif event == 'finished':
+            job['success'] = details.get('success', False)
+            job['error'] = details.get('error')
+            job['seconds'] = perf_counter() - job.get('start', self._start)
+
+    def as_dict(self):
+        wall_seconds = perf_counter() - self._start
+        done = [job for job in self.jobs.values() if job['success'] is not None]
+        modules = sorted(self.modules.values(), key=lambda module: module['total_seconds'], reverse=True)
+        for module in modules:
+            module['mean_seconds'] = module['total_seconds'] / module['jobs']
+        return {
+            'started': self.started,
+            'wall_seconds': wall_seconds,
+            'jobs_total': len(self.jobs),
+            'jobs_succeeded': sum(1 for job in done if job['success']),
+            'jobs_failed': sum(1 for job in done if not job['success']),
+            'devices_per_hour': len(done) * 3600 / wall_seconds if wall_seconds else 0.0,
+            'jobs': [{key: value for key, value in job.items() if key != 'start'} for job in self.jobs.values()],
+            'modules': modules,
+        }
+
+    def format_lines(self, top=15):
+        summary = self.as_dict()
+        lines = [f"Batch completed: {summary['jobs_succeeded']} of {summary['jobs_total']} extractions processed "
+                 f"in {summary['wall_seconds']:.1f}s, {summary['devices_per_hour']:.2f} devices/hour"]
+        for job in summary['jobs']:
+            status = 'OK' if job['success'] else f"FAILED {job['error'] or ''}".rstrip()
+            seconds = f"{job['seconds']:.1f}s" if job['seconds'] is not None else 'not run'
+            lines.append(f"  {job['name']}: {status}, {seconds}, {job['plugins']} artifacts, {job['records']:,} records")
+        if summary['modules']:
+            lines.append('Most expensive artifacts (total over all extractions):')
+            for module in summary['modules'][:top]:
+                lines.append(f"  {module['total_seconds']:8.2f}s total {module['mean_seconds']:7.2f}s mean "
+                             f"{module['max_seconds']:7.2f}s max  {module['artifact']} [{module['module']}]"
+                             + (f", {module['failures']} failed" if module['failures'] else ''))
+        return lines
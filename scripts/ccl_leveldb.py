@@ -25,10 +25,13 @@ import struct
 import re
 import os
 import io
+import mmap
 import pathlib
 import dataclasses
 import enum
-from collections import namedtuple
+import threading
+import concurrent.futures
+from collections import namedtuple, OrderedDict, deque
 from types import MappingProxyType
 
 import scripts.ccl_simplesnappy as ccl_simplesnappy
@@ -198,6 +201,43 @@ class Block:
                 yield RawBlockEntry(key, value, start_offset)
 
 
+class BlockCache:
+    """Thread-safe LRU cache of decompressed table blocks, bounded by the total size of the cached blocks"""
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._blocks = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key) -> typing.Optional[typing.Tuple[bytes, bool]]:
+        with self._lock:
+            value = self._blocks.get(key)
+            if value is not None:
+                self._blocks.move_to_end(key)
+            return value
+
+    def put(self, key, raw: bytes, was_compressed: bool):
+        if len(raw) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._blocks:
+                return
+            self._blocks[key] = (raw, was_compressed)
+            self._size += len(raw)
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._blocks.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+            self._size = 0
+
+
+# Shared by all LdbFile instances, so reopening the same database does not decompress its blocks again
+block_cache = BlockCache(64 * 1024 * 1024)
+
+
 class LdbFile:
     """A leveldb table (.ldb or .sst) file."""
     BLOCK_TRAILER_SIZE = 5
@@ -212,13 +252,20 @@ class LdbFile:
         self.file_no = int(file.stem, 16)
 
         self._f = file.open("rb")
-        self._f.seek(-LdbFile.FOOTER_SIZE, os.SEEK_END)
-
-        self._meta_index_handle = BlockHandle.from_stream(self._f)
-        self._index_handle = BlockHandle.from_stream(self._f)
-        self._f.seek(-8, os.SEEK_END)
-        magic, = struct.unpack("<Q", self._f.read(8))
+        stat = os.fstat(self._f.fileno())
+        if stat.st_size < LdbFile.FOOTER_SIZE:
+            self._f.close()
+            raise ValueError(f"File too small to be a table file: {file}")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        # blocks are cached per file content, keyed on the path, size and modification time
+        self._cache_id = (str(file.resolve()), stat.st_size, stat.st_mtime_ns)
+
+        with io.BytesIO(self._mm[-LdbFile.FOOTER_SIZE:]) as footer:
+            self._meta_index_handle = BlockHandle.from_stream(footer)
+            self._index_handle = BlockHandle.from_stream(footer)
+        magic, = struct.unpack("<Q", self._mm[-8:])
         if magic != LdbFile.MAGIC:
+            self.close()
             raise ValueError(f"Invalid magic number in {file}")
 
         self._index = self._read_index()
@@ -230,18 +277,24 @@ class LdbFile:
         # 0    1     CompressionType (0 = none, 1 = snappy)
         # 1    4     CRC32
 
-        self._f.seek(handle.offset)
-        raw_block = self._f.read(handle.length)
-        trailer = self._f.read(LdbFile.BLOCK_TRAILER_SIZE)
+        cache_key = (self._cache_id, handle.offset)
+        cached = block_cache.get(cache_key)
+        if cached is not None:
+            raw_block, is_compressed = cached
+            return Block(raw_block, is_compressed, self, handle.offset)
+
+        block_end = handle.offset + handle.length
+        raw_block = self._mm[handle.offset:block_end]
+        trailer = self._mm[block_end:block_end + LdbFile.BLOCK_TRAILER_SIZE]
 
         if len(raw_block) != handle.length or len(trailer) != LdbFile.BLOCK_TRAILER_SIZE:
             raise ValueError(f"Could not read all of the block at offset {handle.offset} in file {self.path}")
 
         is_compressed = trailer[0] != 0
         if is_compressed:
-            with io.BytesIO(raw_block) as buff:
-                raw_block = ccl_simplesnappy.decompress(buff)
+            raw_block = ccl_simplesnappy.decompress_bytes(raw_block)
 
+        block_cache.put(cache_key, raw_block, is_compressed)
         return Block(raw_block, is_compressed, self, handle.offset)
 
     def _read_index(self) -> typing.Tuple[typing.Tuple[bytes, BlockHandle], ...]:
@@ -261,6 +314,7 @@ class LdbFile:
                     block.was_compressed)
 
     def close(self):
+        self._mm.close()
         self._f.close()
 
 
@@ -570,9 +624,39 @@ class RawLevelDb:
     def in_dir_path(self) -> pathlib.Path:
         return self._in_dir
 
-    def iterate_records_raw(self, *, reverse=False) -> typing.Iterable[Record]:
-        for file_containing_records in sorted(self._files, reverse=reverse, key=lambda x: x.file_no):
-            yield from file_containing_records
+    def iterate_records_raw(self, *, reverse=False, max_workers=1) -> typing.Iterable[Record]:
+        """Iterate the records of every data file, ordered by file number.
+        With max_workers > 1 the next max_workers table files are read and decompressed in a thread pool while the
+        records of the current one are yielded, so at most max_workers + 1 tables are held in memory; the records
+        are still yielded in the same order as the serial iteration."""
+        files = sorted(self._files, reverse=reverse, key=lambda x: x.file_no)
+        tables = [file for file in files if isinstance(file, LdbFile)]
+        if max_workers <= 1 or len(tables) < 2:
+            for file_containing_records in files:
+                yield from file_containing_records
+            return
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(tables)))
+        upcoming = iter(tables)
+        ahead = deque()
+
+        def read_ahead():
+            table = next(upcoming, None)
+            if table is not None:
+                ahead.append(executor.submit(list, table))
+
+        try:
+            for _ in range(max_workers):
+                read_ahead()
+            for file_containing_records in files:
+                if isinstance(file_containing_records, LdbFile):
+                    records = ahead.popleft().result()
+                    read_ahead()
+                    yield from records
+                else:
+                    yield from file_containing_records
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
     def close(self):
         for file in self._files:
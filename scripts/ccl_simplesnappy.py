@@ -189,6 +189,129 @@ def decompress(data: typing.BinaryIO) -> bytes:
     return result
 
 
+def _read_le_varint_from_buffer(data: bytes, pos: int) -> typing.Tuple[int, int]:
+    """Reads a varint at pos in data, returns a tuple of the (unsigned) value and the offset after the varint"""
+    result = 0
+    shift = 0
+    while shift < 70:
+        tmp = data[pos]
+        pos += 1
+        result |= ((tmp & 0x7f) << shift)
+        if (tmp & 0x80) == 0:
+            return result, pos
+        shift += 7
+    raise ValueError("Varint is too long")
+
+
+def decompress_buffer(data: typing.Union[bytes, bytearray, memoryview]) -> bytes:
+    """Decompresses snappy compressed data held in memory.
+    Same result as decompress(), but works with offsets into the buffer and writes into a preallocated output
+    rather than reading the input a byte at a time from a stream"""
+    if not isinstance(data, bytes):
+        data = bytes(data)
+    end = len(data)
+
+    try:
+        uncompressed_length, pos = _read_le_varint_from_buffer(data, 0)
+        out = bytearray(uncompressed_length)
+        out_pos = 0
+
+        while pos < end:
+            type_byte = data[pos]
+            pos += 1
+            tag = type_byte & 0x03
+
+            if tag == ElementType.Literal:
+                length = type_byte >> 2
+                if length < 60:  # embedded in tag
+                    length += 1
+                else:  # 60-63: length is stored in the next 1-4 bytes
+                    size_bytes = length - 59
+                    if pos + size_bytes > end:
+                        raise ValueError("Couldn't read literal length")
+                    length = int.from_bytes(data[pos:pos + size_bytes], "little") + 1
+                    pos += size_bytes
+
+                if pos + length > end:
+                    raise ValueError("Couldn't read enough literal data")
+                if out_pos + length > uncompressed_length:
+                    raise ValueError("Wrong data length in uncompressed data")
+                out[out_pos:out_pos + length] = data[pos:pos + length]
+                pos += length
+                out_pos += length
+
+            else:
+                if tag == ElementType.CopyOneByte:
+                    length = ((type_byte & 0x1C) >> 2) + 4
+                    offset = ((type_byte & 0xE0) << 3) | data[pos]
+                    pos += 1
+                elif tag == ElementType.CopyTwoByte:
+                    length = 1 + (type_byte >> 2)
+                    offset = data[pos] | (data[pos + 1] << 8)
+                    pos += 2
+                else:  # CopyFourByte
+                    length = 1 + (type_byte >> 2)
+                    if pos + 4 > end:
+                        raise ValueError("Couldn't read backreference offset")
+                    offset = int.from_bytes(data[pos:pos + 4], "little")
+                    pos += 4
+
+                if offset == 0:
+                    raise ValueError("Offset cannot be 0")
+                source = out_pos - offset
+                if source < 0:
+                    raise ValueError("Backreference offset points before the start of the data")
+                if out_pos + length > uncompressed_length:
+                    raise ValueError("Wrong data length in uncompressed data")
+
+                if offset >= length:
+                    out[out_pos:out_pos + length] = out[source:source + length]
+                else:
+                    # overlapping copy: the referenced run repeats until length is reached
+                    out[out_pos:out_pos + length] = (out[source:out_pos] * (length // offset + 1))[:length]
+                out_pos += length
+
+    except IndexError:
+        raise ValueError("Unexpected end of compressed data")
+
+    if out_pos != uncompressed_length:
+        raise ValueError("Wrong data length in uncompressed data")
+
+    return bytes(out)
+
+
+# Optional compiled snappy implementations, used by decompress_bytes() when one of them is installed
+try:
+    import cramjam
+
+    def _accelerated_decompress(data):
+        return bytes(cramjam.snappy.decompress_raw(data))
+
+    ACCELERATED_BACKEND = "cramjam"
+except ImportError:
+    try:
+        import snappy
+
+        def _accelerated_decompress(data):
+            return snappy.uncompress(data)
+
+        ACCELERATED_BACKEND = "python-snappy"
+    except ImportError:
+        _accelerated_decompress = None
+        ACCELERATED_BACKEND = None
+
+
+def decompress_bytes(data: typing.Union[bytes, bytearray, memoryview]) -> bytes:
+    """Decompresses snappy compressed data held in memory, using a compiled snappy implementation if one is
+    installed, otherwise decompress_buffer()"""
+    if _accelerated_decompress is None:
+        return decompress_buffer(data)
+    try:
+        return _accelerated_decompress(data)
+    except Exception as ex:
+        raise ValueError(f"Could not decompress snappy data: {ex}") from ex
+
+
 def main(path):
     import pathlib
     import hashlib
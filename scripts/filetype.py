@@ -28,7 +28,10 @@ SOFTWARE.
 
 # -*- coding: utf-8 -*-
 import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
+from scripts.filetypes import application, archive, audio, document, font, image, text, video
 from scripts.filetypes import ARCHIVE as archive_matchers
 from scripts.filetypes import AUDIO as audio_matchers
 from scripts.filetypes import APPLICATION as application_matchers
@@ -118,6 +121,91 @@ def get_bytes(obj):
     raise TypeError('Unsupported type as file input: %s' % type(obj))
 
 
+# Leading bytes a matcher requires at offset 0. A matcher can only match
+# buffers starting with one of these bytes, so it is only tried for them.
+_LEADING_BYTES = {
+    image.Dwg: b'A', image.Xcf: b'g', image.Jpeg: b'\xff', image.Jpx: b'\x00',
+    image.Apng: b'\x89', image.Png: b'\x89', image.Gif: b'G', image.Webp: b'R',
+    image.Tiff: b'IM', image.Cr2: b'IM', image.Bmp: b'B', image.Jxr: b'I',
+    image.Psd: b'8', image.Ico: b'\x00', image.Qoi: b'q',
+    video.M4v: b'\x00', video.Mkv: b'\x1a', video.Avi: b'R', video.Wmv: b'0',
+    video.Mpeg: b'\x00', video.Webm: b'\x1a', video.Flv: b'F',
+    audio.Aac: b'\xff', audio.Midi: b'M', audio.Mp3: b'I\xff', audio.Ogg: b'O',
+    audio.Flac: b'f', audio.Wav: b'R', audio.Amr: b'#', audio.Aiff: b'F',
+    font.Woff: b'w', font.Woff2: b'w', font.Ttf: b'\x00', font.Otf: b'O',
+    document.Doc: b'\xd0', document.Xls: b'\xd0', document.Ppt: b'\xd0',
+    document.Docx: b'P', document.Xlsx: b'P', document.Pptx: b'P',
+    document.Odt: b'P', document.Ods: b'P', document.Odp: b'P',
+    archive.Br: b'\xce', archive.Rpm: b'\xed', archive.Epub: b'P', archive.Zip: b'P',
+    archive.Rar: b'R', archive.Gz: b'\x1f', archive.Bz2: b'B', archive.SevenZ: b'7',
+    archive.Pdf: b'%\xef', archive.Exe: b'M', archive.Swf: b'FCZ', archive.Rtf: b'{',
+    archive.Nes: b'N', archive.Crx: b'C', archive.Cab: b'MI', archive.Ps: b'%',
+    archive.Xz: b'\xfd', archive.Sqlite: b'S', archive.Deb: b'!', archive.Ar: b'!',
+    archive.Z: b'\x1f', archive.Lzop: b'\x89', archive.Lz: b'L', archive.Elf: b'\x7f',
+    archive.Lz4: b'\x04', archive.Zstd: bytes(range(0x22, 0x29)) + bytes(range(0x50, 0x60)),
+    application.Wasm: b'\x00',
+    text.Json: b'[{', text.Plist: b'<',
+}
+
+# ISO-BMFF matchers only match buffers with an 'ftyp' box at offset 4.
+# M4a also matches a leading 'M4A ' so it is indexed both ways.
+_FTYP_MATCHERS = (image.Heic, image.Avif, video.Mp4, video.Mov, video.M3gp, audio.M4a)
+_FTYP_LEADING_BYTES = {audio.M4a: b'M'}
+
+
+class MatcherTable(object):
+    """
+    Matcher list compiled into a dispatch table indexed by the
+    leading byte of the buffer (and whether it has an ISO-BMFF
+    'ftyp' box), so only the matchers that can possibly match
+    are tried. Candidates keep the order of the matcher list,
+    so the result is the same as trying every matcher in turn.
+    Matchers with a signature at another offset (tar, dicom,
+    eot...) are tried for every buffer.
+    """
+    def __init__(self, matchers):
+        self.matchers = tuple(matchers)
+        # -1 is the key for an empty buffer
+        all_keys = range(-1, 256)
+        plain = {key: [] for key in all_keys}
+        ftyp = {key: [] for key in all_keys}
+        for matcher in self.matchers:
+            kind = type(matcher)
+            if kind in _FTYP_MATCHERS:
+                plain_keys = _FTYP_LEADING_BYTES.get(kind, b'')
+                ftyp_keys = all_keys
+            elif kind in _LEADING_BYTES:
+                plain_keys = ftyp_keys = _LEADING_BYTES[kind]
+            else:
+                plain_keys = ftyp_keys = all_keys
+            for key in plain_keys:
+                plain[key].append(matcher)
+            for key in ftyp_keys:
+                ftyp[key].append(matcher)
+        self._plain = {key: tuple(value) for key, value in plain.items()}
+        self._ftyp = {key: tuple(value) for key, value in ftyp.items()}
+
+    def candidates(self, buf):
+        key = buf[0] if buf else -1
+        if buf[4:8] == b'ftyp':
+            return self._ftyp[key]
+        return self._plain[key]
+
+    def match(self, buf):
+        for matcher in self.candidates(buf):
+            if matcher.match(buf):
+                return matcher
+        return None
+
+
+_TYPES_TABLE = MatcherTable(TYPES)
+
+
+@lru_cache(maxsize=None)
+def _get_table(matchers):
+    return MatcherTable(matchers)
+
+
 # match.py
 
 def match(obj, matchers=TYPES):
@@ -136,11 +224,12 @@ def match(obj, matchers=TYPES):
     """
     buf = get_bytes(obj)
 
-    for matcher in matchers:
-        if matcher.match(buf):
-            return matcher
+    if matchers is TYPES:
+        table = _TYPES_TABLE
+    else:
+        table = _get_table(tuple(matchers))
 
-    return None
+    return table.match(buf)
 
 
 def image_match(obj):
@@ -321,6 +410,50 @@ def guess_extension(obj):
     return kind.extension if kind else kind
 
 
+def _read_signature(path):
+    try:
+        with open(path, 'rb', buffering=0) as fp:
+            return fp.read(_NUM_SIGNATURE_BYTES)
+    except OSError:
+        return None
+
+
+def guess_batch(paths, max_workers=8):
+    """
+    Infers the type of many files at once. Signatures are read
+    from disk by a thread pool, one unbuffered read per file.
+
+    Args:
+        paths: iterable of paths to files.
+        max_workers: number of concurrent reads.
+
+    Returns:
+        List of matched type instances (or None when the file
+        did not match or could not be read), in the order of paths.
+    """
+    paths = list(paths)
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+        signatures = list(executor.map(_read_signature, paths))
+    return [_TYPES_TABLE.match(buf) if buf else None for buf in signatures]
+
+
+def guess_mime_batch(paths, max_workers=8):
+    """
+    Infers the MIME type of many files at once.
+
+    Args:
+        paths: iterable of paths to files.
+        max_workers: number of concurrent reads.
+
+    Returns:
+        List of matched MIME types as strings (or None), in the
+        order of paths.
+    """
+    return [kind.mime if kind else None for kind in guess_batch(paths, max_workers)]
+
+
 def get_type(mime=None, ext=None):
     """
     Returns the file type instance searching by
@@ -0,0 +1,161 @@
+# Random access to gzip compressed files.
+#
+# A gzip stream can only be decompressed from its start, so every backward seek
+# (tarfile seeks to each member it extracts) means decompressing the archive
+# again from offset 0. IndexedGzipReader records checkpoints while it
+# decompresses: every CHECKPOINT_SPAN bytes of output it keeps a copy of the
+# zlib decompressor and the compressed offset it had reached, and a seek
+# resumes from the closest checkpoint before the target.
+#
+# When the indexed_gzip package is installed it is used instead. Its index can
+# be exported to a file and imported by later runs, the zlib checkpoints only
+# live as long as the reader.
+#
+# Usage:
+#   reader = open_indexed_gzip('/path/to/archive.tar.gz', index_path)  # index_path may not exist yet
+#   reader.seek(offset); reader.read(size)
+#   save_gzip_index(reader, index_path)
+
+import io
+import os
+import zlib
+
+from bisect import bisect_right
+
+try:
+    import indexed_gzip
+except ImportError:
+    indexed_gzip = None
+
+CHECKPOINT_SPAN = 32 * 1024 * 1024  # uncompressed bytes between checkpoints, each costs ~40 KB of memory
+READ_SIZE = 256 * 1024
+OUTPUT_CHUNK = 1024 * 1024
+BUFFER_SIZE = 1024 * 1024
+
+
+class IndexedGzipReader(io.RawIOBase):
+    def __init__(self, path, span=CHECKPOINT_SPAN):
+        self.name = path
+        self._raw = open(path, 'rb')
+        self._span = span
+        # (uncompressed offset, compressed offset, decompressor copy or None at the start of a gzip member)
+        self._checkpoints = [(0, 0, None)]
+        self._checkpoint_offsets = [0]
+        self._pos = 0
+        self._restore(self._checkpoints[0])
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            while self._decode(): # the uncompressed size is only known at the end
+                pass
+            offset += self._output_start + len(self._output)
+        if offset < 0:
+            raise ValueError(f'negative seek position {offset}')
+        self._pos = offset
+        return self._pos
+
+    def readinto(self, buffer):
+        size = len(buffer)
+        self._position_decoder(self._pos)
+        copied = 0
+        while copied < size:
+            offset = self._pos - self._output_start
+            if 0 <= offset < len(self._output):
+                length = min(size - copied, len(self._output) - offset)
+                buffer[copied:copied + length] = self._output[offset:offset + length]
+                copied += length
+                self._pos += length
+            elif not self._decode():
+                break
+        return copied
+
+    def close(self):
+        if not self.closed:
+            self._raw.close()
+        super().close()
+
+    def _restore(self, checkpoint):
+        out_offset, in_offset, decompressor = checkpoint
+        self._raw.seek(in_offset)
+        self._input = b''
+        self._decompressor = decompressor.copy() if decompressor is not None else zlib.decompressobj(31)
+        self._output_start = out_offset
+        self._output = b''
+
+    def _position_decoder(self, pos):
+        '''Restores the closest checkpoint when pos is behind the decoder, or a checkpoint is ahead of it'''
+        decoder_pos = self._output_start + len(self._output)
+        if self._output_start <= pos < decoder_pos:
+            return
+        checkpoint = self._checkpoints[bisect_right(self._checkpoint_offsets, pos) - 1]
+        if pos < self._output_start or checkpoint[0] > decoder_pos:
+            self._restore(checkpoint)
+
+    def _decode(self):
+        '''Decompresses the next chunk into _output, returns False at the end of the file'''
+        while True:
+            if self._decompressor.eof:
+                # The file can hold several gzip members, possibly followed by zero padding
+                self._input = self._input.lstrip(b'\0')
+                while not self._input:
+                    data = self._raw.read(READ_SIZE)
+                    if not data:
+                        return False
+                    self._input = data.lstrip(b'\0')
+                self._decompressor = zlib.decompressobj(31)
+            if not self._input:
+                self._input = self._raw.read(READ_SIZE)
+                if not self._input:
+                    raise EOFError('Compressed file ended before the end-of-stream marker was reached')
+            chunk = self._decompressor.decompress(self._input, OUTPUT_CHUNK)
+            if self._decompressor.eof:
+                self._input = self._decompressor.unused_data
+            else:
+                self._input = self._decompressor.unconsumed_tail
+            if chunk:
+                self._output_start += len(self._output)
+                self._output = chunk
+                self._add_checkpoint()
+                return True
+
+    def _add_checkpoint(self):
+        out_offset = self._output_start + len(self._output)
+        if out_offset - self._checkpoint_offsets[-1] >= self._span:
+            in_offset = self._raw.tell() - len(self._input)
+            self._checkpoints.append((out_offset, in_offset, self._decompressor.copy()))
+            self._checkpoint_offsets.append(out_offset)
+
+
+def open_indexed_gzip(path, index_path=None):
+    '''Returns a seekable reader of the decompressed content of path. With indexed_gzip
+       installed, the index saved at index_path by an earlier run is loaded if it exists'''
+    if indexed_gzip is None:
+        return io.BufferedReader(IndexedGzipReader(path), buffer_size=BUFFER_SIZE)
+    reader = indexed_gzip.IndexedGzipFile(path, spacing=CHECKPOINT_SPAN, readbuf_size=BUFFER_SIZE)
+    if index_path and os.path.exists(index_path):
+        try:
+            reader.import_index(index_path)
+        except Exception: # damaged or from another version, rebuilt while reading
+            reader.close()
+            reader = indexed_gzip.IndexedGzipFile(path, spacing=CHECKPOINT_SPAN, readbuf_size=BUFFER_SIZE)
+    return reader
+
+
+def save_gzip_index(reader, index_path):
+    '''Saves the index of a reader from open_indexed_gzip() to index_path, returns False if
+       the reader can't export it (no indexed_gzip)'''
+    if not hasattr(reader, 'export_index'):
+        return False
+    reader.export_index(index_path)
+    return True
@@ -12,6 +12,7 @@ import re
 import shutil
 import sqlite3
 import sys
+import threading
 import xml
 
 from datetime import *
@@ -24,15 +25,17 @@ import scripts.artifact_report as artifact_report
 import pytz
 import simplekml
 from scripts.filetype import guess_mime, guess_extension
+from scripts.media_previews import preview_service, make_preview, PREVIEW_FOLDER_NAME
+from scripts.media_store import media_store, MEDIA_FOLDER_NAME
+from scripts.log_writer import log_writer, INFO
 from functools import wraps
 
 # LEAPP version unique imports
 import binascii
-from PIL import Image
 
 from scripts.lavafuncs import lava_process_artifact, lava_insert_sqlite_data, lava_get_media_item, \
     lava_insert_sqlite_media_item, lava_insert_sqlite_media_references, lava_get_media_references, \
-    lava_get_full_media_info
+    lava_get_full_media_info, lava_insert_sqlite_file_hashes
 
 os.path.basename = lru_cache(maxsize=None)(os.path.basename)
 
@@ -87,10 +90,30 @@ class OutputParameters:
 class GuiWindow:
     '''This only exists to hold window handle if script is run from GUI'''
     window_handle = None  # static variable
+    # When processing runs on a worker thread, the GUI widgets are only updated by the Tk thread:
+    # progress goes through this queue as (event, details) tuples, drained with after()
+    events = None
+
+    @staticmethod
+    def post(event, **details):
+        '''Sends a progress event to the GUI: log, progress, plugin_started, plugin_finished, records, finished'''
+        if GuiWindow.events is not None:
+            details.setdefault('worker', threading.current_thread().name)
+            GuiWindow.events.put((event, details))
+
+    @staticmethod
+    def write_log(text):
+        '''Replaces sys.stdout.write while the GUI runs the processing on a worker thread'''
+        if GuiWindow.events is not None:
+            GuiWindow.events.put(('log', {'text': text}))
+        else:
+            sys.__stdout__.write(text)
 
     @staticmethod
     def SetProgressBar(n, total):
-        if GuiWindow.window_handle:
+        if GuiWindow.events is not None:
+            GuiWindow.post('progress', value=n, total=total)
+        elif GuiWindow.window_handle:
             progress_bar = GuiWindow.window_handle.nametowidget('!progressbar')
             progress_bar.config(value=n)
 
@@ -131,19 +154,25 @@ class MediaReferences():
         self.media_path = media_ref_info[5]
 
 
-def logfunc(message=""):
-    def redirect_logs(string):
-        log_text.insert('end', string)
-        log_text.see('end')
-        log_text.update()
+def logfunc(message="", level=INFO):
+    if not log_writer.accept(message, level):
+        return
+
+    if GuiWindow.events is not None:
+        sys.stdout.write = GuiWindow.write_log
+    elif GuiWindow.window_handle:
+        log_writer.attach_gui(GuiWindow.window_handle.nametowidget('logs_frame.log_text'))
+        sys.stdout.write = log_writer.write_gui
 
-    if GuiWindow.window_handle:
-        log_text = GuiWindow.window_handle.nametowidget('logs_frame.log_text')
-        sys.stdout.write = redirect_logs
+    print(message)
+    log_writer.write(OutputParameters.screen_output_file_path, message + '<br>' + OutputParameters.nl)
 
-    with open(OutputParameters.screen_output_file_path, 'a', encoding='utf8') as a:
-        print(message)
-        a.write(message + '<br>' + OutputParameters.nl)
+def flush_logs():
+    '''Writes out the buffered log output, called at the end of each artifact'''
+    for line in log_writer.repeat_summary():
+        print(line)
+        log_writer.write(OutputParameters.screen_output_file_path, line + '<br>' + OutputParameters.nl)
+    log_writer.flush()
 
 
 def strip_tuple_from_headers(data_headers):
@@ -192,21 +221,22 @@ def check_in_media(artifact_info, report_folder, seeker, files_found, file_path,
             lava_media_ref = lava_get_media_references(media_ref_id)
             if lava_media_ref:
                 return media_ref_id
-            media_path = Path(report_folder).joinpath(media_ref_id).with_suffix(extraction_path.suffix)
-            try:
-                media_path.hardlink_to(extraction_path)
-            except OSError:
-                shutil.copy2(extraction_path, media_path)
+            # converted files don't have the content hash of the extracted file
+            content_hash = None if converted_file_path else file_info.sha256
+            media_path = media_store.store_file(media_id, extraction_path, 
+                                                Path(report_folder).parent.joinpath(MEDIA_FOLDER_NAME), content_hash)
             lava_media_item = lava_get_media_item(media_id)
             if not lava_media_item:
                 media_item = MediaItem(media_id)
                 media_item.source_path = file_info.source_path
-                media_item.extraction_path = f"./{Path(report_folder).stem}/{media_ref_id}{extraction_path.suffix}"
+                media_item.extraction_path = f"./{MEDIA_FOLDER_NAME}/{media_path.name}"
                 media_item.mimetype = guess_mime(extraction_path)
                 media_item.metadata = "not implemented yet"
                 media_item.created_at = file_info.creation_date
                 media_item.updated_at = file_info.modification_date
                 lava_insert_sqlite_media_item(media_item)
+                preview_service.submit(media_id, extraction_path, media_item.mimetype, 
+                                       Path(report_folder).parent.joinpath(PREVIEW_FOLDER_NAME))
             set_media_references(media_ref_id, media_id, artifact_info, name, media_path)
             return media_ref_id
         else:
@@ -225,28 +255,28 @@ def check_in_embedded_media(artifact_info, report_folder, seeker, source_file, d
         lava_media_ref = lava_get_media_references(media_ref_id)
         if lava_media_ref:
             return media_ref_id
-        media_path = Path(report_folder).joinpath(media_ref_id).with_suffix(f".{guess_extension(data)}")
+        store_folder = Path(report_folder).parent.joinpath(MEDIA_FOLDER_NAME)
+        media_path = store_folder.joinpath(media_id).with_suffix(f".{guess_extension(data)}")
+        try:
+            media_path = media_store.store_data(media_id, data, media_path.suffix, store_folder)
+        except Exception as ex:
+            logfunc(f'Could not copy embedded media into {media_path} ' + str(ex))
         lava_media_item = lava_get_media_item(media_id)
         if not lava_media_item:
             media_item = MediaItem(media_id)
             media_item.source_path = source_path
-            media_item.extraction_path = media_path
+            media_item.extraction_path = f"./{MEDIA_FOLDER_NAME}/{media_path.name}"
             media_item.mimetype = guess_mime(data)
             media_item.metadata = "not implemented yet"
             media_item.created_at = 0
             media_item.updated_at = 0
-            try:
-                with open(media_item.extraction_path, "wb") as file:
-                    file.write(data)
-            except Exception as ex:
-                logfunc(f'Could not copy embedded media into {media_item.extraction_path} ' + str(ex))
             lava_insert_sqlite_media_item(media_item)
         set_media_references(media_ref_id, media_id, artifact_info, name, media_path)
         return media_ref_id
     else:
         return None
 
-def html_media_tag(media_path, mimetype, style, title=''):
+def html_media_tag(media_path, mimetype, style, title='', preview_path=None):
     def relative_paths(source):
         splitter = '\\' if is_platform_windows() else '/'
         first_split = source.split(splitter)
@@ -270,7 +300,8 @@ def html_media_tag(media_path, mimetype, style, title=''):
         thumb = f'<video width="320" height="240" controls="controls"><source src="{media_path}" type="video/mp4" preload="none">Your browser does not support the video tag.</video>'
     elif 'image' in mimetype:
         image_style = style if style else "max-height:300px; max-width:400px;"
-        thumb = f'<a href="{media_path}" target="_blank"><img title="{title}"  src="{media_path}" style="{image_style}"></img></a>'
+        image_src = quote(relative_paths(str(preview_path))) if preview_path else media_path
+        thumb = f'<a href="{media_path}" target="_blank"><img title="{title}"  src="{image_src}" style="{image_style}" loading="lazy"></img></a>'
     elif 'audio' in mimetype:
         thumb = f'<audio controls><source src="{media_path}" type="audio/ogg"><source src="{media_path}" type="audio/mpeg">Your browser does not support the audio element.</audio>'
     else:
@@ -297,12 +328,14 @@ def get_data_list_with_media(media_header_info, data_list):
                     for item in media_ref_id:
                         media_item = lava_get_full_media_info(item)
                         html_code += html_media_tag(
-                            media_item['media_path'], media_item['type'], style, media_item['name'])
+                            media_item['media_path'], media_item['type'], style, media_item['name'],
+                            preview_service.get(media_item['media_item_id']))
                         path_list.append(media_item[6])
                     txt_code = ' | '.join(path_list)
                 else:
                     media_item = lava_get_full_media_info(media_ref_id)
-                    html_code = html_media_tag(media_item['media_path'], media_item['type'], style, media_item['name'])
+                    html_code = html_media_tag(media_item['media_path'], media_item['type'], style, media_item['name'],
+                                               preview_service.get(media_item['media_item_id']))
                     txt_code = media_item[6]
                 html_data[idx] = html_code
                 txt_data[idx] = txt_code
@@ -342,6 +375,7 @@ def artifact_processor(func):
             else:
                 html_data_list = data_list
             logfunc(f"Found {len(data_list):,} {'records' if len(data_list)>1 else 'record'} for {artifact_name}")
+            GuiWindow.post('records', artifact=artifact_name, count=len(data_list))
             icons.setdefault(category, {artifact_name: icon}).update({artifact_name: icon})
 
             # Strip tuples from headers for HTML, TSV, and timeline
@@ -641,6 +675,26 @@ def tsv(report_folder, data_headers, data_list, tsvname, source_file=None):
         for i in data_list:
             tsv_writer.writerow(i)
             
+def write_hash_manifest(report_folder_base, file_hashes):
+    '''Writes the hashes of the extracted files to _hashes.tsv and the LAVA database'''
+    if not file_hashes:
+        return
+    rows = []
+    for extraction_path, source_path, size, md5, sha256 in file_hashes:
+        try:
+            extraction_path = os.path.relpath(extraction_path, report_folder_base)
+        except ValueError:
+            pass
+        rows.append((extraction_path, source_path, size, md5, sha256))
+    rows.sort()
+
+    with codecs.open(os.path.join(report_folder_base, '_hashes.tsv'), 'w', 'utf-8-sig') as tsvfile:
+        tsv_writer = csv.writer(tsvfile, delimiter='\t')
+        tsv_writer.writerow(('Extraction Path', 'Source Path', 'Size', 'MD5', 'SHA-256'))
+        tsv_writer.writerows(rows)
+    lava_insert_sqlite_file_hashes(rows)
+    logfunc(f'Hashes of {len(rows):,} extracted files written to _hashes.tsv')
+
 def timeline(report_folder, tlactivity, data_list, data_headers):
     report_folder = report_folder.rstrip('/')
     report_folder = report_folder.rstrip('\\')
@@ -1211,9 +1265,7 @@ def generate_thumbnail(imDirectory, imFilename, seeker, report_folder):
         files = seeker.search(media_root+imDirectory+'/'+imFilename, return_on_first_hit=True)
         if files:
             try:
-                im = Image.open(files)
-                im.thumbnail(thumb_size)
-                im.save(os.path.join(report_folder, thumbname))
+                make_preview(files, os.path.join(report_folder, thumbname), thumb_size)
             except:
                 pass #unsupported format
     return htmlThumbTag
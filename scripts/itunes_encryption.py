@@ -0,0 +1,244 @@
+# Encrypted iTunes/Finder backups.
+#
+# Manifest.plist of an encrypted backup holds the backup keybag: the class keys,
+# each wrapped (RFC 3394) with a key derived from the backup password. Every
+# file has its own key, wrapped with the key of its protection class and stored
+# in its Manifest.db row, and is AES-256-CBC encrypted with a zero IV. Manifest.db
+# itself is encrypted with ManifestKey from Manifest.plist.
+#
+# The password is derived and the class keys unwrapped once. Manifest.db is
+# decrypted in memory, and a file is only decrypted, by chunks, when it is
+# extracted. Unwrapped file keys are cached for the life of the EncryptedBackup.
+#
+# Usage:
+#   backup = EncryptedBackup('/path/to/backup', password)  # BackupPasswordError if wrong
+#   db = backup.open_manifest_db()
+#   key = backup.file_key(file_id, protection_class, wrapped_key)
+#   with DecryptingReader(path, key, size) as f: f.read()
+
+import hashlib
+import io
+import os
+import plistlib
+import sqlite3
+import struct
+import tempfile
+
+try:
+    from Crypto.Cipher import AES
+except ImportError:
+    AES = None
+
+WRAP_PASSCODE = 2
+READ_SIZE = 1024 * 1024  # multiple of the AES block size
+ZERO_IV = b'\0' * 16
+_KEY_WRAP_IV = 0xA6A6A6A6A6A6A6A6
+_CLASS_KEY_TAGS = (b'CLAS', b'WRAP', b'WPKY', b'KTYP', b'PBKY')
+
+
+class BackupPasswordError(Exception):
+    '''The backup is encrypted and the password is missing or wrong'''
+
+
+def is_encrypted_backup(directory):
+    '''Returns True if Manifest.plist of the backup in directory says it is encrypted'''
+    try:
+        with open(os.path.join(directory, 'Manifest.plist'), 'rb') as f:
+            return bool(plistlib.load(f).get('IsEncrypted', False))
+    except Exception:
+        return False
+
+
+def aes_unwrap_key(kek, wrapped):
+    '''RFC 3394 AES key unwrap, returns None if the integrity check fails (wrong kek)'''
+    count = len(wrapped) // 8 - 1
+    check = int.from_bytes(wrapped[:8], 'big')
+    blocks = [wrapped[8 * i:8 * i + 8] for i in range(1, count + 1)]
+    aes = AES.new(kek, AES.MODE_ECB)
+    for j in range(5, -1, -1):
+        for i in range(count, 0, -1):
+            block = aes.decrypt((check ^ (count * j + i)).to_bytes(8, 'big') + blocks[i - 1])
+            check = int.from_bytes(block[:8], 'big')
+            blocks[i - 1] = block[8:]
+    if check != _KEY_WRAP_IV:
+        return None
+    return b''.join(blocks)
+
+
+def aes_wrap_key(kek, key):
+    '''RFC 3394 AES key wrap, the reverse of aes_unwrap_key()'''
+    count = len(key) // 8
+    check = _KEY_WRAP_IV
+    blocks = [key[8 * i:8 * i + 8] for i in range(count)]
+    aes = AES.new(kek, AES.MODE_ECB)
+    for j in range(6):
+        for i in range(1, count + 1):
+            block = aes.encrypt(check.to_bytes(8, 'big') + blocks[i - 1])
+            check = int.from_bytes(block[:8], 'big') ^ (count * j + i)
+            blocks[i - 1] = block[8:]
+    return check.to_bytes(8, 'big') + b''.join(blocks)
+
+
+def _strip_padding(data):
+    '''Removes PKCS#7 padding, data is returned as is if it doesn't end with valid padding'''
+    if data:
+        length = data[-1]
+        if 1 <= length <= 16 and data[-length:] == bytes([length]) * length:
+            return data[:-length]
+    return data
+
+
+class Keybag:
+    '''Backup keybag from Manifest.plist, a list of 4 byte tag, 4 byte big endian length, value'''
+    def __init__(self, data):
+        self.attributes = {}
+        self.class_keys = {}  # protection class: {tag: value}, KEY holds the unwrapped key
+        class_key = None
+        offset = 0
+        while offset + 8 <= len(data):
+            tag = data[offset:offset + 4]
+            length, = struct.unpack('>I', data[offset + 4:offset + 8])
+            value = data[offset + 8:offset + 8 + length]
+            offset += 8 + length
+            if length == 4:
+                value, = struct.unpack('>I', value)
+            if tag == b'UUID' and b'UUID' in self.attributes:
+                # each class key starts with its own UUID
+                if class_key:
+                    self.class_keys[class_key[b'CLAS']] = class_key
+                class_key = {b'UUID': value}
+            elif tag in _CLASS_KEY_TAGS and class_key is not None:
+                class_key[tag] = value
+            elif tag not in self.attributes:
+                self.attributes[tag] = value
+        if class_key:
+            self.class_keys[class_key[b'CLAS']] = class_key
+
+    def unlock(self, password):
+        '''Unwraps the class keys with the key derived from password'''
+        if isinstance(password, str):
+            password = password.encode('utf-8')
+        if b'DPSL' in self.attributes:  # iOS 10.2 and later add a PBKDF2-SHA256 round
+            password = hashlib.pbkdf2_hmac('sha256', password, self.attributes[b'DPSL'],
+                                           self.attributes[b'DPIC'], 32)
+        passcode_key = hashlib.pbkdf2_hmac('sha1', password, self.attributes[b'SALT'],
+                                           self.attributes[b'ITER'], 32)
+        for class_key in self.class_keys.values():
+            if b'WPKY' not in class_key or not class_key.get(b'WRAP', 0) & WRAP_PASSCODE:
+                continue
+            key = aes_unwrap_key(passcode_key, class_key[b'WPKY'])
+            if key is None:
+                raise BackupPasswordError('Wrong password for the encrypted backup')
+            class_key[b'KEY'] = key
+
+    def unwrap(self, protection_class, wrapped_key):
+        class_key = self.class_keys.get(protection_class, {}).get(b'KEY')
+        if class_key is None:
+            raise KeyError(f'No key for protection class {protection_class} in the backup keybag')
+        key = aes_unwrap_key(class_key, wrapped_key)
+        if key is None:
+            raise ValueError(f'Could not unwrap a key of protection class {protection_class}')
+        return key
+
+
+class EncryptedBackup:
+    def __init__(self, directory, password):
+        if AES is None:
+            raise ImportError('pycryptodome is needed to read encrypted backups')
+        if not password:
+            raise BackupPasswordError('The backup is encrypted, a password is needed')
+        self.directory = directory
+        with open(os.path.join(directory, 'Manifest.plist'), 'rb') as f:
+            manifest = plistlib.load(f)
+        self._manifest_key = manifest.get('ManifestKey')
+        self.keybag = Keybag(manifest['BackupKeyBag'])
+        self.keybag.unlock(password)
+        self._file_keys = {}
+        self._temp_paths = []
+
+    def read_manifest_db(self):
+        '''Returns the decrypted content of Manifest.db'''
+        with open(os.path.join(self.directory, 'Manifest.db'), 'rb') as f:
+            data = f.read()
+        if not self._manifest_key:  # iOS 10.0 and 10.1 didn't encrypt it
+            return data
+        protection_class, = struct.unpack('<I', self._manifest_key[:4])
+        key = self.keybag.unwrap(protection_class, self._manifest_key[4:])
+        return _strip_padding(AES.new(key, AES.MODE_CBC, iv=ZERO_IV).decrypt(data))
+
+    def open_manifest_db(self):
+        '''Returns a sqlite connection to the decrypted Manifest.db, kept in memory when
+           sqlite3 can deserialize (Python 3.11+), in a temporary file otherwise'''
+        data = bytearray(self.read_manifest_db())
+        if data[18:20] == b'\2\2':  # WAL mode, which a deserialized db can't open
+            data[18:20] = b'\1\1'
+        if hasattr(sqlite3.Connection, 'deserialize'):
+            db = sqlite3.connect(':memory:')
+            db.deserialize(bytes(data))
+            return db
+        handle, path = tempfile.mkstemp(suffix='.db', prefix='Manifest-')
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        self._temp_paths.append(path)
+        return sqlite3.connect(path)
+
+    def file_key(self, file_id, protection_class, wrapped_key):
+        '''Returns the unwrapped key of a file from the EncryptionKey of its Manifest.db row,
+           whose first 4 bytes are the protection class again'''
+        key = self._file_keys.get(file_id)
+        if key is None:
+            key = self._file_keys[file_id] = self.keybag.unwrap(protection_class, wrapped_key[4:])
+        return key
+
+    def close(self):
+        for path in self._temp_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._temp_paths.clear()
+
+
+class DecryptingReader(io.RawIOBase):
+    '''Reads a file of an encrypted backup decrypted, by READ_SIZE chunks. The last block is held
+       back until the end of the file for its padding, and the output is cut to size if given'''
+    def __init__(self, path, key, size=None):
+        self.name = path
+        self._raw = open(path, 'rb')
+        self._cipher = AES.new(key, AES.MODE_CBC, iv=ZERO_IV)
+        self._remaining = size
+        self._held = b''
+        self._output = memoryview(b'')
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._output and not self._eof:
+            self._decrypt_next()
+        length = min(len(buffer), len(self._output))
+        buffer[:length] = self._output[:length]
+        self._output = self._output[length:]
+        return length
+
+    def close(self):
+        if not self.closed:
+            self._raw.close()
+        super().close()
+
+    def _decrypt_next(self):
+        data = self._raw.read(READ_SIZE)
+        if data:
+            data = self._held + data
+            keep = len(data) % 16 or 16
+            self._held = data[-keep:]
+            output = self._cipher.decrypt(data[:-keep])
+        else:
+            self._eof = True
+            output = self._held[:len(self._held) - len(self._held) % 16]
+            output = _strip_padding(self._cipher.decrypt(output)) if output else b''
+        if self._remaining is not None:
+            output = output[:self._remaining]
+            self._remaining -= len(output)
+        self._output = memoryview(output)
@@ -0,0 +1,294 @@
+# Extraction jobs over a local HTTP API (ileapp.py --serve).
+#
+# The server runs the submitted jobs with the batch JobRunner: one process per
+# extraction, --batch_jobs at a time, started from a forkserver. It only
+# listens on localhost, and every request must carry the token printed at startup
+# (or taken from the ILEAPP_SERVE_TOKEN environment variable):
+#   Authorization: Bearer <token>
+# To keep web pages open in a browser on the machine from using it, requests
+# carrying an Origin header or a Host other than localhost are refused as well,
+# and jobs must be posted as JSON.
+#
+#   POST   /jobs              {"args": ["-t", "fs", "-i", "/path", ...]} or {"command": "-t fs -i /path"}
+#                             -> 201 job status, 400 {"error": ...} if the arguments are not valid
+#   GET    /jobs              -> status of every job
+#   GET    /jobs/<id>         -> job status
+#   GET    /jobs/<id>/events  -> the job events, one JSON object per line, streamed until the job
+#                                finishes. ?since=N skips the first N, ?follow=0 returns at once
+#   DELETE /jobs/<id>         -> 202, cancels a queued or running job
+#
+# The events are those of crunch_artifacts() (plugin_started, plugin_finished, records,
+# progress) plus started and finished, each with its sequence number and time.
+
+import hmac
+import json
+import os
+import queue
+import secrets
+import shlex
+import threading
+
+from argparse import ArgumentError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import time
+from urllib.parse import urlsplit, parse_qs
+
+from scripts.batch_runner import BATCH_JOBS, BATCH_WORKERS, JobRunner
+
+SERVE_HOST = '127.0.0.1'
+SERVE_PORT = 8765
+STREAM_KEEPALIVE = 15  # seconds between blank lines while a streamed job is quiet
+_HIDDEN_ARGUMENTS = ('itunes_password',)
+_LOCAL_HOSTS = ('127.0.0.1', 'localhost', '[::1]')
+TOKEN_VARIABLE = 'ILEAPP_SERVE_TOKEN'
+
+
+class JobService:
+    '''Jobs submitted to the server, and the thread that runs them through a JobRunner and
+       records their events. Only that thread touches the runner'''
+    def __init__(self, prepare_job, run_job, default_output_path=None, max_jobs=BATCH_JOBS, worker_budget=BATCH_WORKERS):
+        self._prepare_job = prepare_job
+        self._default_output_path = default_output_path
+        self._runner = JobRunner(run_job, max_jobs, worker_budget, threaded=True)
+        self.max_jobs = self._runner.max_jobs
+        self._requests = queue.SimpleQueue()  # ('submit', job id, args) or ('cancel', job id)
+        self._jobs = {}
+        self._next_id = 1
+        self._submit_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._dispatch, name='job-dispatcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, job_argv):
+        '''Returns the status of the new job, raises ArgumentError if job_argv isn't valid'''
+        with self._submit_lock: # job ids are only taken by valid jobs
+            job_id = str(self._next_id)
+            name, job_args = self._prepare_job(job_argv, self._default_output_path, job_id)
+            self._next_id += 1
+        arguments = {key: value for key, value in vars(job_args).items()
+                     if value is not None and key not in _HIDDEN_ARGUMENTS}
+        job = {'id': job_id, 'name': name, 'status': 'queued', 'arguments': arguments,
+               'submitted': time(), 'started': None, 'finished': None, 'success': None, 'error': None,
+               'plugins_done': 0, 'plugins_total': None, 'records': 0, 'events': []}
+        with self._condition:
+            self._jobs[job_id] = job
+        self._requests.put(('submit', job_id, job_args))
+        return self.status(job_id)
+
+    def cancel(self, job_id):
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job['finished'] is not None:
+                return False
+            job['status'] = 'cancelling'
+        self._requests.put(('cancel', job_id))
+        return True
+
+    def status(self, job_id=None):
+        '''Returns the status of job_id, None if unknown. The status of every job without job_id'''
+        with self._condition:
+            if job_id is None:
+                return [self._job_status(job) for job in self._jobs.values()]
+            job = self._jobs.get(job_id)
+            return self._job_status(job) if job is not None else None
+
+    @staticmethod
+    def _job_status(job):
+        status = {key: value for key, value in job.items() if key != 'events'}
+        status['event_count'] = len(job['events'])
+        return status
+
+    def events(self, job_id, since=0, timeout=None):
+        '''Returns (events from number since, finished), waits up to timeout for one if there are none'''
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None, True
+            if timeout and len(job['events']) <= since and job['finished'] is None:
+                self._condition.wait(timeout)
+            return job['events'][since:], job['finished'] is not None
+
+    def close(self):
+        '''Stops taking jobs and terminates the running ones'''
+        with self._condition:
+            unfinished = [job_id for job_id, job in self._jobs.items() if job['finished'] is None]
+        for job_id in unfinished:
+            self.cancel(job_id)
+        self._requests.put(('stop',))
+        self._thread.join()
+
+    def _dispatch(self):
+        stopping = False
+        while not stopping or self._runner.busy():
+            synthetic = []
+            while True:
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request[0] == 'submit':
+                    self._runner.submit(request[1], request[2])
+                elif request[0] == 'cancel' and self._runner.cancel(request[1]) == 'queued':
+                    synthetic.append((request[1], 'finished', {'success': False, 'error': 'cancelled'}))
+                elif request[0] == 'stop':
+                    stopping = True
+            events = synthetic + self._runner.poll()
+            if events:
+                with self._condition:
+                    for job_id, event, details in events:
+                        self._record(job_id, event, details)
+                    self._condition.notify_all()
+
+    def _record(self, job_id, event, details):
+        job = self._jobs.get(job_id)
+        if job is None or job['finished'] is not None:
+            return
+        now = time()
+        job['events'].append(dict(details, seq=len(job['events']), event=event, time=now))
+        if event == 'started':
+            job['started'] = now
+            if job['status'] == 'queued':
+                job['status'] = 'running'
+        elif event == 'plugin_started':
+            job['plugins_total'] = details.get('total')
+        elif event == 'plugin_finished':
+            job['plugins_done'] += 1
+        elif event == 'records':
+            job['records'] += details.get('count', 0)
+        elif event == 'finished':
+            job['finished'] = now
+            job['success'] = bool(details.get('success'))
+            job['error'] = details.get('error')
+            if job['status'] == 'cancelling':
+                job['status'] = 'cancelled'
+                job['error'] = 'cancelled'
+            else:
+                job['status'] = 'completed' if job['success'] else 'failed'
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'iLEAPP'
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def _send_json(self, code, value):
+        body = json.dumps(value).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _refused(self):
+        '''Sends 401 and returns True for requests without the server token, 403 for those that
+           could come from a web page (cross-site request or DNS rebinding)'''
+        authorization = self.headers.get('Authorization') or ''
+        if not hmac.compare_digest(authorization.encode('utf-8'), f'Bearer {self.server.token}'.encode('utf-8')):
+            self._send_json(401, {'error': 'missing or wrong token, expected Authorization: Bearer <token>'})
+            return True
+        host = (self.headers.get('Host') or '').strip().lower()
+        if host.startswith('['):
+            host = host[:host.find(']') + 1]
+        else:
+            host = host.split(':', 1)[0]
+        if host not in _LOCAL_HOSTS or self.headers.get('Origin') is not None:
+            self._send_json(403, {'error': 'requests must come from localhost, not from a web page'})
+            return True
+        return False
+
+    def _route(self):
+        '''Returns (path parts, query) of the request'''
+        url = urlsplit(self.path)
+        return [part for part in url.path.split('/') if part], parse_qs(url.query)
+
+    def do_POST(self):
+        if self._refused():
+            return
+        parts, _ = self._route()
+        if parts != ['jobs']:
+            return self._send_json(404, {'error': 'not found'})
+        if self.headers.get_content_type() != 'application/json':
+            return self._send_json(415, {'error': 'expected Content-Type: application/json'})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            job_argv = request['args'] if 'args' in request else shlex.split(request['command'])
+            if not isinstance(job_argv, list) or not all(isinstance(arg, str) for arg in job_argv):
+                raise ValueError('args must be a list of strings')
+        except (ValueError, KeyError, TypeError) as ex:
+            return self._send_json(400, {'error': f'expected {{"args": [...]}} or {{"command": "..."}}: {ex}'})
+        try:
+            status = self.service.submit(job_argv)
+        except ArgumentError as ex:
+            return self._send_json(400, {'error': str(ex)})
+        self._send_json(201, status)
+
+    def do_GET(self):
+        if self._refused():
+            return
+        parts, query = self._route()
+        if parts == ['jobs']:
+            return self._send_json(200, self.service.status())
+        if len(parts) == 2 and parts[0] == 'jobs':
+            status = self.service.status(parts[1])
+            return self._send_json(200, status) if status else self._send_json(404, {'error': 'unknown job'})
+        if len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'events':
+            return self._stream_events(parts[1], query)
+        self._send_json(404, {'error': 'not found'})
+
+    def do_DELETE(self):
+        if self._refused():
+            return
+        parts, _ = self._route()
+        if len(parts) == 2 and parts[0] == 'jobs' and self.service.cancel(parts[1]):
+            return self._send_json(202, self.service.status(parts[1]))
+        self._send_json(404, {'error': 'unknown or finished job'})
+
+    def _stream_events(self, job_id, query):
+        '''Writes the events as JSON lines, until the job finishes unless follow=0'''
+        try:
+            since = int(query.get('since', ['0'])[0])
+        except ValueError:
+            since = 0
+        follow = query.get('follow', ['1'])[0] not in ('0', 'false')
+        events, finished = self.service.events(job_id, since)
+        if events is None:
+            return self._send_json(404, {'error': 'unknown job'})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        try:
+            while True:
+                for event in events:
+                    self.wfile.write(json.dumps(event).encode('utf-8') + b'\n')
+                since += len(events)
+                if finished or not follow:
+                    break
+                if not events:
+                    self.wfile.write(b'\n')
+                self.wfile.flush()
+                events, finished = self.service.events(job_id, since, STREAM_KEEPALIVE)
+        except (BrokenPipeError, ConnectionResetError):
+            pass # the client went away, the job goes on
+
+
+def serve(port, prepare_job, run_job, default_output_path=None, max_jobs=BATCH_JOBS, worker_budget=BATCH_WORKERS):
+    '''Serves the job API on localhost until interrupted. prepare_job(args, default output path, job id)
+       returns (name, parsed arguments) or raises ArgumentError, run_job(parsed arguments) runs a job'''
+    server = ThreadingHTTPServer((SERVE_HOST, port), JobRequestHandler)
+    server.daemon_threads = True
+    server.token = os.environ.get(TOKEN_VARIABLE) or secrets.token_urlsafe(24)
+    service = server.service = JobService(prepare_job, run_job, default_output_path, max_jobs, worker_budget)
+    print(f'iLEAPP job server listening on http://{SERVE_HOST}:{server.server_address[1]}/jobs, '
+          f'{service.max_jobs} jobs at a time. Ctrl+C to stop.')
+    if not os.environ.get(TOKEN_VARIABLE):
+        print(f'Token: {server.token}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print('Stopping, unfinished jobs are cancelled')
+        service.close()
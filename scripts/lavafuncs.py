@@ -73,6 +73,12 @@ def initialize_lava(input_path, output_path, input_type):
                             lmi.updated_at 
                         FROM _lava_media_references as lmr 
                         LEFT JOIN _lava_media_items as lmi ON lmr.media_item_id = lmi.id''')
+    cursor.execute('''CREATE TABLE _lava_file_hashes (
+                        extraction_path TEXT PRIMARY KEY, 
+                        source_path TEXT, 
+                        size INTEGER, 
+                        md5 TEXT, 
+                        sha256 TEXT)''')
     
 def lava_process_artifact(category, module_name, artifact_name, data, record_count=None, data_views=None):
     global lava_data
@@ -233,6 +239,14 @@ def lava_insert_sqlite_media_item(media_item):
     except sqlite3.IntegrityError as e:
         print(str(e))
 
+def lava_insert_sqlite_file_hashes(file_hashes):
+    '''Inserts (extraction_path, source_path, size, md5, sha256) rows'''
+    cursor = lava_db.cursor()
+    cursor.executemany('''INSERT OR REPLACE INTO _lava_file_hashes 
+                ("extraction_path", "source_path", "size", "md5", "sha256") 
+                VALUES (?, ?, ?, ?, ?)''', file_hashes)
+    lava_db.commit()
+
 def lava_get_media_references(media_ref):
     global lava_db
     cursor = lava_db.cursor()
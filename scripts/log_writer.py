@@ -0,0 +1,150 @@
+# Buffered writer behind logfunc().
+#
+# logfunc() used to open Screen_Output.html, write one line and close it for
+# every message, and to redraw the GUI log for every line. Messages now go to a
+# queue drained by a writer thread that keeps the log file open, and GUI lines
+# are collected and shown together. ileapp flushes both at the end of each
+# artifact (flush_logs), and at least every GUI_FLUSH_INTERVAL for the GUI.
+#
+# The same message logged more than REPEAT_LIMIT times before a flush is only
+# counted, the count is written when the logs are flushed.
+#
+# Usage:
+#   if log_writer.accept(message, level):
+#       log_writer.write(path, message + '<br>\n')
+#   log_writer.flush()
+
+import atexit
+import os
+import queue
+import threading
+
+from logging import INFO
+from time import monotonic
+
+LOG_LEVEL = INFO  # messages below this level are dropped
+REPEAT_LIMIT = 20
+GUI_FLUSH_INTERVAL = 0.25  # seconds
+FILE_BUFFER_SIZE = 64 * 1024
+
+_STOP = object()
+
+
+class LogWriter:
+    def __init__(self, level=LOG_LEVEL, repeat_limit=REPEAT_LIMIT):
+        self.level = level
+        self.repeat_limit = repeat_limit
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._repeats = {}
+        self._gui_widget = None
+        self._gui_pending = []
+        self._gui_flushed = monotonic()
+
+    def accept(self, message, level=INFO):
+        '''Returns False if message should be dropped for its level or for being repeated too often'''
+        if level < self.level:
+            return False
+        if not message or self.repeat_limit is None:
+            return True
+        count = self._repeats.get(message, 0) + 1
+        self._repeats[message] = count
+        return count <= self.repeat_limit
+
+    def write(self, path, text):
+        '''Queues text to be appended to the file at path'''
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+                    self._thread.start()
+        self._queue.put((path, text))
+
+    def attach_gui(self, widget):
+        '''Shows the printed output in the GUI log widget (a Tk Text) instead of the console'''
+        self._gui_widget = widget
+
+    def write_gui(self, string):
+        '''Replaces sys.stdout.write when running from the GUI, must be called on the Tk thread'''
+        self._gui_pending.append(string)
+        if monotonic() - self._gui_flushed >= GUI_FLUSH_INTERVAL:
+            self.flush_gui()
+
+    def flush_gui(self):
+        self._gui_flushed = monotonic()
+        if not self._gui_pending or self._gui_widget is None:
+            return
+        text = ''.join(self._gui_pending)
+        self._gui_pending.clear()
+        self._gui_widget.insert('end', text)
+        self._gui_widget.see('end')
+        self._gui_widget.update()
+
+    def repeat_summary(self):
+        '''Returns the lines for the messages dropped as repeats since the last call, and resets the counts'''
+        lines = [f'(Repeated {count - self.repeat_limit:,} more times, not shown) {message}'
+                 for message, count in self._repeats.items()
+                 if self.repeat_limit is not None and count > self.repeat_limit]
+        self._repeats.clear()
+        return lines
+
+    def flush(self):
+        '''Waits until the queued text is written and flushed to the files'''
+        self.flush_gui()
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        self.flush()
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._thread = None
+
+    def _after_fork(self):
+        '''Runs in a forked child: the writer thread of the parent doesn't exist there, and its
+           queue may hold the parent's lines or a lock taken at the time of the fork'''
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._repeats = {}
+        self._gui_pending = []
+
+    def _run(self):
+        handles = {}
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            if isinstance(item, threading.Event):
+                for handle in handles.values():
+                    try:
+                        handle.flush()
+                    except OSError:
+                        pass
+                item.set()
+                continue
+            path, text = item
+            try:
+                handle = handles.get(path)
+                if handle is None:
+                    # one run writes one log, so only the current file stays open
+                    for old_handle in handles.values():
+                        old_handle.close()
+                    handles.clear()
+                    handle = handles[path] = open(path, 'a', encoding='utf8', buffering=FILE_BUFFER_SIZE)
+                handle.write(text)
+            except OSError:
+                pass # log folder not created (yet) or removed
+        for handle in handles.values():
+            handle.close()
+
+
+log_writer = LogWriter()
+atexit.register(log_writer.close)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=log_writer._after_fork)
@@ -0,0 +1,82 @@
+# Preview (thumbnail) service for the media shown in the HTML reports.
+#
+# check_in_media() hands every new image to preview_service, which makes a
+# small preview on a worker thread and stores it once per media item, keyed
+# by the media id (SHA-1) that check_in_media already computes. When the HTML
+# table is written, the report shows the preview and links to the original
+# instead of loading every full resolution image in the page.
+#
+# Usage:
+#   preview_service.submit(media_id, extraction_path, mimetype, preview_folder)
+#   preview_path = preview_service.get(media_id)  # None -> show the original
+
+import os
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+PREVIEW_SIZE = (300, 300)
+PREVIEW_FOLDER_NAME = '_previews'
+
+
+def make_preview(source_path, preview_path, size=PREVIEW_SIZE):
+    '''Saves a downscaled copy of the image at source_path to preview_path,
+       the output format follows the extension of preview_path'''
+    with Image.open(source_path) as image:
+        image.thumbnail(size)
+        if os.path.splitext(preview_path)[1].lower() in ('.jpg', '.jpeg') and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.save(preview_path)
+    return preview_path
+
+
+def _make_media_preview(source_path, preview_folder, media_id, size):
+    with Image.open(source_path) as image:
+        if image.width <= size[0] and image.height <= size[1]:
+            return None # already small, the original is the preview
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    os.makedirs(preview_folder, exist_ok=True)
+    preview_path = os.path.join(preview_folder, media_id + ('.png' if has_alpha else '.jpg'))
+    return make_preview(source_path, preview_path, size)
+
+
+class PreviewService:
+    def __init__(self, size=PREVIEW_SIZE, max_workers=None):
+        self.size = size
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, media_id, source_path, mimetype, preview_folder):
+        '''Queues the preview of an image media item, does nothing for other types'''
+        if not mimetype or 'image' not in mimetype:
+            return
+        with self._lock:
+            if media_id in self._futures:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            self._futures[media_id] = self._executor.submit(
+                _make_media_preview, str(source_path), str(preview_folder), media_id, self.size)
+
+    def get(self, media_id):
+        '''Returns the preview path of media_id, waiting for it if needed. None if there is no preview'''
+        future = self._futures.get(media_id)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception: # unsupported or broken image, the report shows the original
+            return None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._futures.clear()
+
+
+preview_service = PreviewService()
@@ -0,0 +1,95 @@
+# Content store for the media items referenced by the reports.
+#
+# Every media item gets exactly one physical file under _HTML/_media, named
+# after its media id, and every artifact reference points at that file. Files
+# whose content is already in the store (same SHA-256 as computed by the
+# seekers while extracting) reuse the existing copy. New files are hardlinked
+# from the extraction when the filesystem allows it and copied otherwise.
+#
+# Usage:
+#   media_path = media_store.store_file(media_id, extraction_path, store_folder, sha256)
+#   media_path = media_store.store_data(media_id, data, '.jpg', store_folder)
+#   logfunc(media_store.summary())
+
+import os
+import shutil
+
+from pathlib import Path
+from time import perf_counter
+
+MEDIA_FOLDER_NAME = '_media'
+
+
+class MediaStore:
+    def __init__(self):
+        self._paths = {}    # media id -> stored file
+        self._content = {}  # sha256 -> stored file
+        self.references = 0
+        self.files = 0
+        self.linked = 0
+        self.copied = 0
+        self.bytes_stored = 0
+        self.bytes_copied = 0
+        self.bytes_deduplicated = 0
+        self.copy_time = 0.0
+
+    def _reuse(self, media_id, media_path, size):
+        self._paths[media_id] = media_path
+        self.bytes_deduplicated += size
+        return media_path
+
+    def store_file(self, media_id, source_path, store_folder, sha256=None):
+        '''Returns the stored file of media_id, linking or copying source_path into the store the first time'''
+        self.references += 1
+        media_path = self._paths.get(media_id)
+        size = os.path.getsize(source_path)
+        if media_path:
+            return self._reuse(media_id, media_path, size)
+        if sha256 and sha256 in self._content:
+            return self._reuse(media_id, self._content[sha256], size)
+
+        os.makedirs(store_folder, exist_ok=True)
+        media_path = Path(store_folder).joinpath(media_id).with_suffix(Path(source_path).suffix)
+        start = perf_counter()
+        try:
+            os.link(source_path, media_path)
+            self.linked += 1
+        except OSError:
+            shutil.copy2(source_path, media_path)
+            self.copied += 1
+            self.bytes_copied += size
+        self.copy_time += perf_counter() - start
+        self.files += 1
+        self.bytes_stored += size
+        self._paths[media_id] = media_path
+        if sha256:
+            self._content[sha256] = media_path
+        return media_path
+
+    def store_data(self, media_id, data, suffix, store_folder):
+        '''Returns the stored file of media_id, writing data to the store the first time'''
+        self.references += 1
+        media_path = self._paths.get(media_id)
+        if media_path:
+            return self._reuse(media_id, media_path, len(data))
+
+        os.makedirs(store_folder, exist_ok=True)
+        media_path = Path(store_folder).joinpath(media_id).with_suffix(suffix)
+        start = perf_counter()
+        with open(media_path, 'wb') as f:
+            f.write(data)
+        self.copy_time += perf_counter() - start
+        self.copied += 1
+        self.files += 1
+        self.bytes_stored += len(data)
+        self.bytes_copied += len(data)
+        self._paths[media_id] = media_path
+        return media_path
+
+    def summary(self):
+        return (f'Media store: {self.references:,} references to {self.files:,} files '
+                f'({self.bytes_stored / 1048576:,.1f} MB, {self.linked:,} hardlinked, {self.copied:,} copied '
+                f'in {self.copy_time:.2f}s), {self.bytes_deduplicated / 1048576:,.1f} MB not duplicated')
+
+
+media_store = MediaStore()
@@ -0,0 +1,154 @@
+# Compact table of the paths listed by the file seekers.
+#
+# Full file system extractions list millions of paths, and most of them share
+# long folder prefixes. Instead of one Python str per path, PathTable keeps
+# every folder prefix once, the names of all entries in a single UTF-8 blob,
+# and per entry only a folder id and the end offset of its name (arrays of
+# machine integers). Paths are rebuilt when they are read; an iteration decodes
+# the names once, so it costs a temporary str of their size.
+#
+# Usage:
+#   paths = PathTable()
+#   paths.append('/private/var/mobile/Library/SMS/sms.db')
+#   paths[0], len(paths), list(paths)
+#   for index, key in enumerate(paths.iter_normcase('root/')): ...
+#   for index, key in paths.match_normcase(normcase('*/SMS/sms.db*'), 'root/'): ...
+#
+# match_normcase() doesn't run the pattern on every path: a path can only match
+# if it contains every literal part of the pattern, and a literal without
+# separators is either in the folder or in the name. So the literal found in the
+# fewest folders is looked for once per folder, and in the names blob with find(),
+# and only those paths are matched.
+
+import os
+import re
+import sys
+
+from array import array
+from bisect import bisect_right
+from fnmatch import _compile_pattern
+from itertools import compress, islice
+
+_SEPARATORS = ('/', os.sep) if os.sep != '/' else ('/',)
+_NORMCASE_IS_IDENTITY = os.path.normcase('A/') == 'A/'
+_MIN_LITERAL = 3  # shorter literals select too many paths to be worth looking up
+
+
+def _literals(pattern):
+    '''Returns the parts of a glob pattern that every matching path contains, without wildcards
+       or separators. What follows a [...] set is left out rather than parsed'''
+    runs = re.split(r'[*?/\\]', pattern.split('[', 1)[0])
+    return [run for run in runs if len(run) >= _MIN_LITERAL]
+
+
+class PathTable:
+    def __init__(self, paths=()):
+        self._folders = []             # folder prefixes, including their trailing separator
+        self._folder_ids = {}
+        self._entry_folders = array('I')
+        self._name_ends = array('I', [0])
+        self._names = bytearray()
+        for path in paths:
+            self.append(path)
+
+    def append(self, path):
+        cut = max(path.rfind(separator) for separator in _SEPARATORS) + 1
+        folder = path[:cut]
+        folder_id = self._folder_ids.get(folder)
+        if folder_id is None:
+            folder_id = self._folder_ids[folder] = len(self._folders)
+            self._folders.append(folder)
+        self._entry_folders.append(folder_id)
+        self._names += path[cut:].encode('utf-8', 'surrogateescape')
+        try:
+            self._name_ends.append(len(self._names))
+        except OverflowError: # more than 4 GB of names
+            self._name_ends = array('Q', self._name_ends)
+            self._name_ends.append(len(self._names))
+
+    def __len__(self):
+        return len(self._entry_folders)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self._entry_folders)
+        name = self._names[self._name_ends[index]:self._name_ends[index + 1]]
+        return self._folders[self._entry_folders[index]] + name.decode('utf-8', 'surrogateescape')
+
+    def __iter__(self):
+        return self._iter_paths(self._folders)
+
+    def iter_normcase(self, prefix=''):
+        '''Yields prefix + os.path.normcase() of every path, in order. The prefix is added to the folders
+           once rather than to every path'''
+        if _NORMCASE_IS_IDENTITY:
+            folders = [prefix + folder for folder in self._folders] if prefix else self._folders
+            return self._iter_paths(folders)
+        return self._iter_paths([prefix + os.path.normcase(folder) for folder in self._folders], lower=True)
+
+    def _iter_paths(self, folders, lower=False):
+        names = self._names
+        start = 0
+        if names.isascii():
+            # Decoded in one piece for the whole iteration, the byte offsets are character offsets too.
+            # Searches iterate every path, this keeps them as fast as over a list of str
+            names = names.decode('ascii')
+            if lower:
+                names = names.lower()
+            for folder_id, end in zip(self._entry_folders, islice(self._name_ends, 1, None)):
+                yield folders[folder_id] + names[start:end]
+                start = end
+        else:
+            for folder_id, end in zip(self._entry_folders, islice(self._name_ends, 1, None)):
+                name = names[start:end].decode('utf-8', 'surrogateescape')
+                yield folders[folder_id] + (name.lower() if lower else name)
+                start = end
+
+    def match_normcase(self, pattern, prefix=''):
+        '''Yields (index, key) of the paths whose key, prefix + os.path.normcase(path), matches the
+           normcased glob pattern, in order'''
+        match = _compile_pattern(pattern)
+        literals = _literals(pattern)
+        if not literals or not (_NORMCASE_IS_IDENTITY or self._names.isascii()):
+            for index, key in enumerate(self.iter_normcase(prefix)):
+                if match(key) is not None:
+                    yield index, key
+            return
+        if _NORMCASE_IS_IDENTITY:
+            folders = [prefix + folder for folder in self._folders]
+            names = self._names
+        else:
+            folders = [prefix + os.path.normcase(folder) for folder in self._folders]
+            names = self._names.lower() # ASCII, as str.lower()
+        entry_folders = self._entry_folders
+        name_ends = self._name_ends
+
+        folder_hits = None
+        for candidate in sorted(literals, key=len, reverse=True):
+            hits = {folder_id for folder_id, folder in enumerate(folders) if candidate in folder}
+            if folder_hits is None or len(hits) < len(folder_hits):
+                literal, folder_hits = candidate, hits
+        candidates = set(compress(range(len(entry_folders)), map(folder_hits.__contains__, entry_folders))
+                         if folder_hits else ())
+        needle = literal.encode('utf-8', 'surrogateescape')
+        position = names.find(needle)
+        while position >= 0:
+            index = bisect_right(name_ends, position) - 1
+            if position + len(needle) <= name_ends[index + 1]:
+                candidates.add(index)
+                position = names.find(needle, name_ends[index + 1])
+            else: # across two names
+                position = names.find(needle, position + 1)
+
+        for index in sorted(candidates):
+            name = names[name_ends[index]:name_ends[index + 1]].decode('utf-8', 'surrogateescape')
+            key = folders[entry_folders[index]] + name
+            if match(key) is not None:
+                yield index, key
+
+    def memory_size(self):
+        '''Returns the approximate number of bytes used by the table'''
+        return (sys.getsizeof(self._folders) + sys.getsizeof(self._folder_ids)
+                + sum(sys.getsizeof(folder) for folder in self._folders)
+                + sys.getsizeof(self._entry_folders) + sys.getsizeof(self._name_ends)
+                + sys.getsizeof(self._names))
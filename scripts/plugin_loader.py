@@ -1,3 +1,7 @@
+import ast
+import sys
+import marshal
+import hashlib
 import pathlib
 import dataclasses
 import typing
@@ -7,6 +11,11 @@ import importlib.util
 # a bit long-winded to make compatible with PyInstaller
 PLUGINPATH = pathlib.Path(__file__).resolve().parent / pathlib.Path("artifacts")
 
+# Artifact definitions read from the plugins without importing them, rebuilt for the files
+# whose size/mtime and content hash changed. Marshal format, so tied to the Python version
+PLUGIN_MANIFEST_PATH = pathlib.Path(__file__).resolve().parent / ".plugin_manifest"
+PLUGIN_MANIFEST_FORMAT = 1
+
 
 @dataclasses.dataclass(frozen=True)
 class PluginSpec:
@@ -18,9 +27,94 @@ class PluginSpec:
     artifact_info: dict  # Add this line to include artifact_info
 
 
+class PluginMethod:
+    """Stands in for the function of a plugin, imports the plugin module the first time it is called"""
+    _modules: dict = {}
+
+    def __init__(self, module_path: pathlib.Path, function_name: str, artifact_info: typing.Optional[dict] = None):
+        self.module_path = module_path
+        self.function_name = function_name
+        self.artifact_info = artifact_info
+        self._func = None
+
+    def resolve(self) -> typing.Callable:
+        if self._func is None:
+            mod = PluginMethod._modules.get(self.module_path)
+            if mod is None:
+                mod = PluginMethod._modules[self.module_path] = PluginLoader.load_module_lazy(self.module_path)
+            func = getattr(mod, self.function_name)
+            if self.artifact_info is not None:
+                func.artifact_info = self.artifact_info  # Attach artifact_info to the function
+            self._func = func
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        return f'PluginMethod({self.module_path.stem}.{self.function_name})'
+
+
+def _extract_artifacts(source: str):
+    """Returns (version, [(name, category, search, function name, artifact_info)], warnings) from the
+       source of a plugin, read with ast. None if the artifacts aren't literals and need an import"""
+    tree = ast.parse(source)
+    artifacts_node = None
+    top_level_names = set()
+    decorated_functions = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            top_level_names.add(node.name)
+            if node.decorator_list:
+                decorated_functions.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            top_level_names.update((alias.asname or alias.name).split('.')[0] for alias in node.names)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    top_level_names.add(target.id)
+                    if target.id == '__artifacts_v2__' or (target.id == '__artifacts__' and artifacts_node is None):
+                        artifacts_node = (target.id, node.value)
+    if artifacts_node is None:
+        return 0, [], []
+
+    variable, value = artifacts_node
+    artifacts = []
+    warnings = []
+    try:
+        if variable == '__artifacts_v2__':
+            for name, artifact in ast.literal_eval(value).items():
+                # 1. a wrapped function with the name of the dictionary, 2. the declared function
+                if name in decorated_functions:
+                    func_name = name
+                elif artifact.get('function') in top_level_names:
+                    func_name = artifact['function']
+                else:
+                    warnings.append(name)
+                    continue
+                artifacts.append((name, artifact.get('category'), artifact.get('paths'), func_name, artifact))
+            return 2, artifacts, warnings
+
+        if not isinstance(value, ast.Dict):
+            return None
+        for key_node, artifact_node in zip(value.keys, value.values):
+            if not (isinstance(artifact_node, ast.Tuple) and len(artifact_node.elts) == 3
+                    and isinstance(artifact_node.elts[2], ast.Name)):
+                return None
+            category = ast.literal_eval(artifact_node.elts[0])
+            search = ast.literal_eval(artifact_node.elts[1])
+            artifacts.append((ast.literal_eval(key_node), category, search, artifact_node.elts[2].id, None))
+        return 1, artifacts, warnings
+    except (ValueError, TypeError, AttributeError, SyntaxError):
+        return None
+
+
 class PluginLoader:
-    def __init__(self, plugin_path: typing.Optional[pathlib.Path] = None):
+    def __init__(self, plugin_path: typing.Optional[pathlib.Path] = None,
+                 manifest_path: typing.Optional[pathlib.Path] = None):
         self._plugin_path = plugin_path or PLUGINPATH
+        self._manifest_path = manifest_path or (PLUGIN_MANIFEST_PATH if plugin_path is None else None)
         self._plugins: dict[str, PluginSpec] = {}
         self._load_plugins()
 
@@ -33,55 +127,113 @@ class PluginLoader:
         loader.exec_module(mod)
         return mod
 
-    def _load_plugins(self):
-        for py_file in self._plugin_path.glob("*.py"):
-            mod = PluginLoader.load_module_lazy(py_file)
-            mod_artifacts = getattr(mod, '__artifacts_v2__', None) or getattr(mod, '__artifacts__', None)
-            if mod_artifacts is None:
-                continue  # no artifacts defined in this plugin
-
-            version = 2 if '__artifacts_v2__' in dir(mod) else 1  # determine the version
-
-            for name, artifact in mod_artifacts.items():
-                if version == 2:
-                    category = artifact.get('category')
-                    search = artifact.get('paths')
-                    
-                    func = None
-                    # 1. Look for a wrapped function with the name of the dictionary
-                    for item_name in dir(mod):
-                        item = getattr(mod, item_name)
-                        if callable(item) and item_name == name and hasattr(item, '__wrapped__'):
-                            func = item
-                            break
-                    
-                    # 2. If no wrapped function, look for declared function
-                    if func is None:
-                        func_name = artifact.get('function')
-                        if func_name:
-                            func = getattr(mod, func_name, None)
-                    
-                    # 3. If neither above work, log the failure
-                    if func is None:
-                        print(f"Warning: No matching function found for artifact '{name}' in module '{py_file.stem}'")
-                        continue
-
-                    # Store the entire artifact dictionary as artifact_info
-                    artifact_info = artifact
-                    if func:
-                        func.artifact_info = artifact_info  # Attach artifact_info to the function
+    def _read_manifest(self) -> dict:
+        if self._manifest_path is None:
+            return {}
+        try:
+            with open(self._manifest_path, 'rb') as f:
+                manifest = marshal.load(f)
+            if manifest.get('format') == PLUGIN_MANIFEST_FORMAT and manifest.get('python') == sys.version_info[:2]:
+                return manifest['modules']
+        except Exception:  # missing, damaged, or written by another Python version
+            pass
+        return {}
+
+    def _write_manifest(self, modules: dict):
+        try:
+            temp_path = self._manifest_path.with_suffix('.tmp')
+            with open(temp_path, 'wb') as f:
+                marshal.dump({'format': PLUGIN_MANIFEST_FORMAT, 'python': sys.version_info[:2], 'modules': modules}, f)
+            temp_path.replace(self._manifest_path)
+        except OSError:
+            pass  # read-only install, the plugins are read with ast again next time
 
-                else:
-                    # 4. If no v2, then use v1
-                    category, search, func = artifact
-                    artifact_info = {'category': category, 'paths': search}
+    @staticmethod
+    def _manifest_entry(py_file: pathlib.Path, cached: typing.Optional[dict]) -> dict:
+        """Returns the manifest entry of py_file, reusing cached when the file didn't change"""
+        stat = py_file.stat()
+        if cached and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+            return cached
+        source = py_file.read_bytes()
+        sha256 = hashlib.sha256(source).hexdigest()
+        if cached and cached['sha256'] == sha256:
+            return dict(cached, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        extracted = _extract_artifacts(source.decode('utf-8'))
+        entry = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': sha256, 'static': extracted is not None}
+        if extracted is not None:
+            entry['version'], entry['artifacts'], entry['warnings'] = extracted
+        return entry
 
-                if name in self._plugins:
-                    raise KeyError(f"Duplicate plugin: '{name}' in module '{py_file.stem}'")
+    def _load_plugins(self):
+        cached_modules = self._read_manifest()
+        modules = {}
+        for py_file in self._plugin_path.glob("*.py"):
+            entry = modules[py_file.stem] = self._manifest_entry(py_file, cached_modules.get(py_file.stem))
+            if entry['static']:
+                for name in entry['warnings']:
+                    print(f"Warning: No matching function found for artifact '{name}' in module '{py_file.stem}'")
+                for name, category, search, func_name, artifact_info in entry['artifacts']:
+                    if entry['version'] == 1:
+                        artifact_info = {'category': category, 'paths': search}
+                        func = PluginMethod(py_file, func_name)
+                    else:
+                        func = PluginMethod(py_file, func_name, artifact_info)
+                    self._add_plugin(PluginSpec(name, py_file.stem, category, search, func, artifact_info))
+            else:
+                self._import_plugins(py_file)
+        if modules != cached_modules and self._manifest_path is not None:
+            self._write_manifest(modules)
+
+    def _add_plugin(self, plugin: PluginSpec):
+        if plugin.name in self._plugins:
+            raise KeyError(f"Duplicate plugin: '{plugin.name}' in module '{plugin.module_name}'")
+        self._plugins[plugin.name] = plugin
+
+    def _import_plugins(self, py_file: pathlib.Path):
+        """Imports a plugin whose artifacts can't be read statically and reads them from the module"""
+        mod = PluginLoader.load_module_lazy(py_file)
+        mod_artifacts = getattr(mod, '__artifacts_v2__', None) or getattr(mod, '__artifacts__', None)
+        if mod_artifacts is None:
+            return  # no artifacts defined in this plugin
+
+        version = 2 if '__artifacts_v2__' in dir(mod) else 1  # determine the version
+
+        for name, artifact in mod_artifacts.items():
+            if version == 2:
+                category = artifact.get('category')
+                search = artifact.get('paths')
                 
-                # Add artifact_info to PluginSpec
-                self._plugins[name] = PluginSpec(name, py_file.stem, category, search, func, artifact_info)
-
+                func = None
+                # 1. Look for a wrapped function with the name of the dictionary
+                for item_name in dir(mod):
+                    item = getattr(mod, item_name)
+                    if callable(item) and item_name == name and hasattr(item, '__wrapped__'):
+                        func = item
+                        break
+                
+                # 2. If no wrapped function, look for declared function
+                if func is None:
+                    func_name = artifact.get('function')
+                    if func_name:
+                        func = getattr(mod, func_name, None)
+                
+                # 3. If neither above work, log the failure
+                if func is None:
+                    print(f"Warning: No matching function found for artifact '{name}' in module '{py_file.stem}'")
+                    continue
+
+                # Store the entire artifact dictionary as artifact_info
+                artifact_info = artifact
+                if func:
+                    func.artifact_info = artifact_info  # Attach artifact_info to the function
+
+            else:
+                # 4. If no v2, then use v1
+                category, search, func = artifact
+                artifact_info = {'category': category, 'paths': search}
+
+            # Add artifact_info to PluginSpec
+            self._add_plugin(PluginSpec(name, py_file.stem, category, search, func, artifact_info))
 
     @property
     def plugins(self) -> typing.Iterable[PluginSpec]:
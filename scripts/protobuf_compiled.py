@@ -0,0 +1,212 @@
+# Schema-compiled protobuf decoding for blackboxprotobuf style typedefs.
+#
+# blackboxprotobuf.decode_message() walks the whole typedef and builds the
+# whole message tree for every record, even though most modules only read a
+# couple of fields out of it. compile_typedef() turns a typedef (and the list
+# of field paths a module actually reads) into a decoder function once, which
+# then only decodes the requested fields and skips everything else on the wire.
+#
+# The returned dictionaries have the same shape as the ones returned by
+# blackboxprotobuf (string keys, nested dicts for messages, lists for repeated
+# fields), so existing lookups like protostuff['4']['3'] keep working.
+#
+# Usage:
+#   decode = compile_typedef(typedef, ('1.1', '2', '4.3'))
+#   protostuff = decode(record.data)
+
+import struct
+
+from scripts.parse3 import GetDynamicWireFormat, RetrieveInt
+
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_LENGTH_DELIMITED = 2
+WIRE_FIXED32 = 5
+
+_double = struct.Struct('<d').unpack_from
+_float = struct.Struct('<f').unpack_from
+_uint64 = struct.Struct('<Q').unpack_from
+_int64 = struct.Struct('<q').unpack_from
+_uint32 = struct.Struct('<I').unpack_from
+_int32 = struct.Struct('<i').unpack_from
+
+
+class ProtobufDecodeError(ValueError):
+    pass
+
+
+def _read_varint(data, pos, end):
+    if pos >= end:
+        raise ProtobufDecodeError(f'Truncated varint at offset {pos}')
+    value = data[pos]
+    if value < 0x80:
+        return value, pos + 1
+    value, pos, success = RetrieveInt(data, pos, end)
+    if not success:
+        raise ProtobufDecodeError(f'Truncated varint at offset {pos}')
+    return value, pos
+
+
+def _to_int64(value):
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _zigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def _decode_str(data, start, end):
+    return bytes(data[start:end]).decode('utf-8')
+
+
+def _decode_bytes(data, start, end):
+    return bytes(data[start:end])
+
+
+def _decode_bytes_hex(data, start, end):
+    return bytes(data[start:end]).hex()
+
+
+# type name -> (wire type, converter)
+# varint converters take the raw value, fixed converters take (data, offset),
+# length delimited converters take (data, start, end)
+_SCALAR_TYPES = {
+    'uint': (WIRE_VARINT, None),
+    'int': (WIRE_VARINT, _to_int64),
+    'sint': (WIRE_VARINT, _zigzag),
+    'bool': (WIRE_VARINT, bool),
+    'enum': (WIRE_VARINT, None),
+    'fixed64': (WIRE_FIXED64, lambda data, pos: _uint64(data, pos)[0]),
+    'sfixed64': (WIRE_FIXED64, lambda data, pos: _int64(data, pos)[0]),
+    'double': (WIRE_FIXED64, lambda data, pos: _double(data, pos)[0]),
+    'fixed32': (WIRE_FIXED32, lambda data, pos: _uint32(data, pos)[0]),
+    'sfixed32': (WIRE_FIXED32, lambda data, pos: _int32(data, pos)[0]),
+    'float': (WIRE_FIXED32, lambda data, pos: _float(data, pos)[0]),
+    'str': (WIRE_LENGTH_DELIMITED, _decode_str),
+    'bytes': (WIRE_LENGTH_DELIMITED, _decode_bytes),
+    'bytes_hex': (WIRE_LENGTH_DELIMITED, _decode_bytes_hex),
+}
+
+
+def _build_field_tree(typedef, fields):
+    '''Returns {field_number: (type definition, subtree or None)} for the requested field paths'''
+    if fields is None:
+        return {key: (value, None) for key, value in typedef.items()}
+    tree = {}
+    for path in fields:
+        parts = path.split('.') if isinstance(path, str) else list(path)
+        node = tree
+        current_typedef = typedef
+        for index, part in enumerate(parts):
+            part = str(part)
+            field_typedef = current_typedef.get(part)
+            if field_typedef is None:
+                raise KeyError(f"Field path '{path}' is not defined in the typedef")
+            is_last = index == len(parts) - 1
+            existing = node.get(part)
+            if is_last:
+                # Whole field requested, this overrides any partial selection
+                node[part] = (field_typedef, None)
+                break
+            if field_typedef.get('type') != 'message':
+                raise KeyError(f"Field path '{path}' goes through non-message field '{part}'")
+            if existing is None:
+                existing = (field_typedef, {})
+                node[part] = existing
+            elif existing[1] is None:
+                # Whole message already requested
+                break
+            node = existing[1]
+            current_typedef = field_typedef.get('message_typedef', {})
+    return tree
+
+
+def _compile_message(field_tree):
+    '''Builds the decoder for one message level'''
+    handlers = {}
+    for key, (field_typedef, subtree) in field_tree.items():
+        field_number = int(key)
+        field_type = field_typedef.get('type')
+        if field_type == 'message':
+            if subtree is None:
+                subtree = _build_field_tree(field_typedef.get('message_typedef', {}), None)
+            handlers[field_number] = (key, WIRE_LENGTH_DELIMITED, _compile_message(subtree), True)
+        elif field_type in _SCALAR_TYPES:
+            wire_type, converter = _SCALAR_TYPES[field_type]
+            handlers[field_number] = (key, wire_type, converter, False)
+        else:
+            raise ValueError(f"Unsupported protobuf type '{field_type}' for field {key}")
+
+    def decode_message(data, start, end):
+        result = {}
+        pos = start
+        while pos < end:
+            pos, wire_type, field_number = GetDynamicWireFormat(data, pos, end)
+            if pos is None:
+                raise ProtobufDecodeError('Truncated field tag')
+            handler = handlers.get(field_number)
+            if wire_type == WIRE_VARINT:
+                value, pos = _read_varint(data, pos, end)
+                if handler is None or handler[1] != WIRE_VARINT:
+                    continue
+                converter = handler[2]
+                if converter is not None:
+                    value = converter(value)
+            elif wire_type == WIRE_LENGTH_DELIMITED:
+                length, pos = _read_varint(data, pos, end)
+                field_end = pos + length
+                if field_end > end:
+                    raise ProtobufDecodeError(f'Length delimited field {field_number} overruns its message')
+                if handler is None or handler[1] != WIRE_LENGTH_DELIMITED:
+                    pos = field_end
+                    continue
+                value = handler[2](data, pos, field_end)
+                pos = field_end
+            elif wire_type == WIRE_FIXED64:
+                if pos + 8 > end:
+                    raise ProtobufDecodeError(f'Truncated 64-bit field {field_number}')
+                if handler is None or handler[1] != WIRE_FIXED64:
+                    pos += 8
+                    continue
+                value = handler[2](data, pos)
+                pos += 8
+            elif wire_type == WIRE_FIXED32:
+                if pos + 4 > end:
+                    raise ProtobufDecodeError(f'Truncated 32-bit field {field_number}')
+                if handler is None or handler[1] != WIRE_FIXED32:
+                    pos += 4
+                    continue
+                value = handler[2](data, pos)
+                pos += 4
+            else:
+                raise ProtobufDecodeError(f'Unsupported wire type {wire_type} for field {field_number}')
+
+            key = handler[0]
+            if key in result:
+                # Repeated field, same representation as blackboxprotobuf
+                existing = result[key]
+                if isinstance(existing, list):
+                    existing.append(value)
+                else:
+                    result[key] = [existing, value]
+            else:
+                result[key] = value
+        return result
+
+    return decode_message
+
+
+def compile_typedef(typedef, fields=None):
+    '''Compiles a blackboxprotobuf typedef into a decoder function.
+
+    typedef: dict --> blackboxprotobuf message typedef
+    fields: iterable --> dotted field paths to decode (e.g. '4.3'), None decodes
+                         every field in the typedef. Fields on the wire that are
+                         not requested are skipped without being decoded.
+    Returns a function taking the raw message bytes and returning a dict.'''
+    decode_message = _compile_message(_build_field_tree(typedef, fields))
+
+    def decode(data):
+        return decode_message(data, 0, len(data))
+
+    return decode
@@ -1,42 +1,503 @@
 import time as timex
-import fnmatch
 import os
 import tarfile
+import gzip
+import json
 import hashlib
+import plistlib
+import stat
 import struct
+import threading
+import zipfile
+import zlib
 
 from pathlib import Path
 from scripts.ilapfuncs import *
-from shutil import copyfile
+from shutil import copyfile, copyfileobj
 from zipfile import ZipFile
 
+from array import array
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from fnmatch import _compile_pattern
-from functools import lru_cache
+from itertools import islice
 
 from scripts.builds_ids import get_root_path_from_domain
-normcase = lru_cache(maxsize=None)(os.path.normcase)
+from scripts.path_table import PathTable
+from scripts.gzip_index import open_indexed_gzip, save_gzip_index
+from scripts.itunes_encryption import BackupPasswordError, DecryptingReader, EncryptedBackup, is_encrypted_backup
+normcase = os.path.normcase  # not cached, a cache would keep every listed path alive
+
+CONTAINER_METADATA_PLIST = '.com.apple.mobile_container_manager.metadata.plist'
+HASH_EXTRACTED_FILES = True  # MD5 and SHA-256 of every extracted file, computed while copying it. --no_hash turns it off for kernel copies
+COPY_BUFFER_SIZE = 1024 * 1024
+COPY_WORKERS = 8  # files copied at the same time by FileSeekerDir, helps most on network shares
+COPY_MAX_IN_FLIGHT = 64  # copies queued ahead of the one being registered
+WALK_WORKERS = 8  # folders read at the same time while building the FileSeekerDir listing
+WALK_PROGRESS_INTERVAL = 5  # seconds between progress lines while building the listing
+TAR_INDEX_BESIDE_ARCHIVE = True  # save the tar.gz member list (and indexed_gzip checkpoints) next to the archive for later runs
+TAR_MEMBER_INDEX_SUFFIX = '.ileapp-members.json.gz'
+GZIP_INDEX_SUFFIX = '.ileapp-gzidx'
+
+ENTRY_OTHER = 0
+ENTRY_FILE = 1
+ENTRY_DIR = 2
+
+_MBFILE_PROPERTIES = ('Birth', 'LastModified', 'Size', 'ProtectionClass', 'EncryptionKey')
+
+_copy_buffers = threading.local()  # one COPY_BUFFER_SIZE buffer per copying thread, reused for every file
+
+def copy_stream_hashed(fsrc, fdst):
+    '''Copies file object fsrc to fdst, returns the size, MD5 and SHA-256 of the bytes copied'''
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    size = 0
+    buffer = getattr(_copy_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _copy_buffers.buffer = bytearray(COPY_BUFFER_SIZE)
+    view = memoryview(buffer)
+    while True:
+        length = fsrc.readinto(buffer)
+        if not length:
+            break
+        chunk = view[:length]
+        md5.update(chunk)
+        sha256.update(chunk)
+        fdst.write(chunk)
+        size += length
+    return {'size': size, 'md5': md5.hexdigest(), 'sha256': sha256.hexdigest()}
+
+def copy_file_fast(src, dst):
+    '''Copies src to dst in the kernel with copy_file_range where available,
+       shutil.copyfile (sendfile/fcopyfile) otherwise'''
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                copied = 0
+                while True:
+                    length = os.copy_file_range(fsrc.fileno(), fdst.fileno(), 64 * COPY_BUFFER_SIZE)
+                    if not length:
+                        break
+                    copied += length
+                # some virtual filesystems report EOF right away
+                if copied == os.fstat(fsrc.fileno()).st_size:
+                    return
+        except OSError:
+            pass
+    copyfile(src, dst)
+
+def copy_file_hashed(src, dst):
+    '''Copies src to dst, returns the hashes of the file when HASH_EXTRACTED_FILES is set'''
+    if not HASH_EXTRACTED_FILES:
+        copy_file_fast(src, dst)
+        return {}
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        return copy_stream_hashed(fsrc, fdst)
+
+def hash_file(path):
+    '''Returns the size, MD5 and SHA-256 of an already extracted file'''
+    if not HASH_EXTRACTED_FILES:
+        return {}
+    with open(path, 'rb') as f:
+        md5 = hashlib.md5()
+        sha256 = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = f.read(COPY_BUFFER_SIZE)
+            if not chunk:
+                break
+            md5.update(chunk)
+            sha256.update(chunk)
+            size += len(chunk)
+    return {'size': size, 'md5': md5.hexdigest(), 'sha256': sha256.hexdigest()}
+
+def _scan_directory(directory):
+    '''Runs on the walk threads. Returns the (path, is_dir, kind, size, mtime, ctime) entries of
+       directory, where is_dir doesn't follow symlinks, and the error that stopped the read if any'''
+    entries = []
+    try:
+        with os.scandir(directory) as files_list:
+            for item in files_list:
+                try:
+                    item_stat = item.stat()
+                    if stat.S_ISREG(item_stat.st_mode):
+                        kind = ENTRY_FILE
+                    elif stat.S_ISDIR(item_stat.st_mode):
+                        kind = ENTRY_DIR
+                    else:
+                        kind = ENTRY_OTHER
+                    record = (kind, item_stat.st_size, item_stat.st_mtime, item_stat.st_ctime)
+                except OSError: # broken symlink
+                    record = (ENTRY_OTHER, 0, 0.0, 0.0)
+                entries.append((item.path, item.is_dir(follow_symlinks=False)) + record)
+    except Exception as ex:
+        return entries, ex
+    return entries, None
+
+def _zip_target_path(data_folder, member):
+    '''Returns the path ZipFile.extract() would write member to in data_folder'''
+    arcname = member.replace('/', os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    arcname = os.path.sep.join(part for part in arcname.split(os.path.sep) if part not in ('', os.path.curdir, os.path.pardir))
+    if os.path.sep == '\\':
+        arcname = ZipFile._sanitize_windows_name(arcname, os.path.sep) # replaces illegal chars with _
+    return os.path.normpath(os.path.join(data_folder, arcname))
+
+def _relative_path(relative_path):
+    '''Normalizes a path relative to the extraction root to /path/to/item'''
+    relative_path = relative_path.replace('\\', '/')
+    while relative_path.startswith('./'):
+        relative_path = relative_path[2:]
+    return '/' + relative_path.lstrip('/')
+
+def _index_key(relative_path):
+    return normcase(_relative_path(relative_path))
+
+class _SortedKeys:
+    '''Read-only sequence of the index keys of paths in sorted order, computed on access so
+       that only the order (an array of positions) is kept in memory. Works with bisect'''
+    def __init__(self, paths, order, reverse=False):
+        self.paths = paths
+        self.order = order
+        self.reverse = reverse
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, index):
+        key = normcase(self.paths[self.order[index]])
+        return key[::-1] if self.reverse else key
+
+    @classmethod
+    def build(cls, paths, reverse=False):
+        keys = list(paths.iter_normcase())
+        if reverse:
+            keys = [key[::-1] for key in keys]
+        order = array('I', sorted(range(len(keys)), key=keys.__getitem__))
+        return cls(paths, order, reverse)
+
+def _archive_signature(archive_path):
+    archive_stat = os.stat(archive_path)
+    return [archive_stat.st_size, archive_stat.st_mtime_ns]
+
+def save_tar_member_index(index_path, archive_path, members):
+    '''Saves the header fields and offsets of the tar members to index_path'''
+    records = [[member.name, member.mode, member.uid, member.gid, member.size, member.mtime,
+                member.type.decode('latin-1'), member.linkname, member.uname, member.gname,
+                member.devmajor, member.devminor, member.offset, member.offset_data, member.pax_headers]
+               for member in members]
+    with gzip.open(index_path, 'wt', encoding='utf-8') as f:
+        json.dump({'version': 1, 'archive': _archive_signature(archive_path), 'members': records}, f)
+
+def load_tar_member_index(index_path, archive_path):
+    '''Returns the TarInfo objects saved by save_tar_member_index, None if the index
+       was made for another version of the archive'''
+    with gzip.open(index_path, 'rt', encoding='utf-8') as f:
+        index = json.load(f)
+    if index.get('version') != 1 or index.get('archive') != _archive_signature(archive_path):
+        return None
+    members = []
+    for record in index['members']:
+        member = tarfile.TarInfo(record[0])
+        (member.mode, member.uid, member.gid, member.size, member.mtime, member_type,
+         member.linkname, member.uname, member.gname, member.devmajor, member.devminor,
+         member.offset, member.offset_data, member.pax_headers) = record[1:]
+        member.type = member_type.encode('latin-1')
+        members.append(member)
+    return members
+
+def _mbfile_properties(file_blob):
+    '''Returns the Birth, LastModified, Size, ProtectionClass and EncryptionKey of the
+       NSKeyedArchiver MBFile blob of a Manifest.db row, reading the archive with plistlib
+       instead of deserializing the whole object graph'''
+    if not file_blob:
+        return {'Birth': 0, 'LastModified': 0, 'Size': None, 'ProtectionClass': None, 'EncryptionKey': None}
+    try:
+        archive = plistlib.loads(file_blob)
+        objects = archive['$objects']
+        mbfile = objects[archive['$top']['root'].data]
+        properties = {}
+        for key in _MBFILE_PROPERTIES:
+            value = mbfile.get(key)
+            if isinstance(value, plistlib.UID):
+                value = objects[value.data]
+            if isinstance(value, dict): # NSData
+                value = value.get('NS.data')
+            properties[key] = value
+    except Exception:
+        metadata = get_plist_content(file_blob) or {}
+        properties = {key: metadata.get(key) for key in _MBFILE_PROPERTIES}
+    properties['Birth'] = properties['Birth'] or 0
+    properties['LastModified'] = properties['LastModified'] or 0
+    return properties
+
+_MBDB_FIXED_FIELDS = struct.Struct('>HQIIIIIQBB') # mode, inode, uid, gid, mtime, atime, ctime, size, protection class, property count
+
+def read_manifest_mbdb(mbdb_path):
+    '''Returns (hash filename, domain, relative path, mode, size, mtime, ctime) for every record
+       of a Manifest.mbdb (iOS 5 to 9 backups)'''
+    with open(mbdb_path, 'rb') as f:
+        data = f.read()
+    if data[0:4] != b'mbdb':
+        raise Exception("This does not look like an MBDB file")
+    unpack_length = struct.Struct('>H').unpack_from
+    unpack_fixed = _MBDB_FIXED_FIELDS.unpack_from
+    fixed_size = _MBDB_FIXED_FIELDS.size
+    data_size = len(data)
+    records = []
+    offset = 6 # magic and version (5.0)
+    while offset < data_size:
+        # A string is a 2 byte length and its bytes, a length of 0xFFFF is a blank string
+        length, = unpack_length(data, offset)
+        domain = data[offset + 2:offset + 2 + length] if length != 0xFFFF else b''
+        offset += 2 + len(domain)
+        length, = unpack_length(data, offset)
+        path = data[offset + 2:offset + 2 + length] if length != 0xFFFF else b''
+        offset += 2 + len(path)
+        for _ in range(3): # link target, data hash, encryption key
+            length, = unpack_length(data, offset)
+            offset += 2 if length == 0xFFFF else 2 + length
+        mode, _, _, _, mtime, _, ctime, size, _, property_count = unpack_fixed(data, offset)
+        offset += fixed_size
+        for _ in range(2 * property_count): # name and value strings
+            length, = unpack_length(data, offset)
+            offset += 2 if length == 0xFFFF else 2 + length
+        records.append((domain, path, mode, size, mtime, ctime))
+
+    # The backup names each file after the SHA-1 of its "domain-path"
+    return [(hashlib.sha1(domain + b'-' + path).hexdigest(), domain.decode('utf-8', 'surrogateescape'),
+             path.decode('utf-8', 'surrogateescape'), mode, size, mtime, ctime)
+            for domain, path, mode, size, mtime, ctime in records]
+
+class ManifestMetadata:
+    '''Dates of the files of a Manifest.db backup. Manifest.db stays open read-only and the
+       file blob of a fileID is only read (and its dates cached) when that file is extracted'''
+    def __init__(self, db):
+        self._db = db
+        self._dates = {}
+
+    def get_properties(self, file_id):
+        '''Returns the MBFile properties of file_id, see _mbfile_properties()'''
+        row = self._db.execute('SELECT file FROM Files WHERE fileID = ?', (file_id,)).fetchone()
+        properties = _mbfile_properties(row[0] if row else None)
+        self._dates[file_id] = properties['Birth'], properties['LastModified']
+        return properties
+
+    def get_dates(self, file_id):
+        '''Returns (creation date, modification date) of file_id'''
+        dates = self._dates.get(file_id)
+        if dates is None:
+            self.get_properties(file_id)
+            dates = self._dates[file_id]
+        return dates
+
+    def close(self):
+        self._db.close()
+
+class AppContainer:
+    def __init__(self, identifier, container_type, guid, path):
+        self.identifier = identifier          # bundle or group identifier (MCMMetadataIdentifier)
+        self.container_type = container_type  # Data, Bundle, AppGroup, PluginKitPlugin, ...
+        self.guid = guid
+        self.path = path                      # relative to the extraction root, e.g. /private/var/mobile/Containers/Data/Application/<guid>
+
+    def __repr__(self):
+        return f'AppContainer({self.identifier!r}, {self.container_type!r}, {self.path!r})'
 
 class FileInfo:
-    def __init__(self, source_path, creation_date, modification_date):
+    def __init__(self, source_path, creation_date, modification_date, size=None, md5=None, sha256=None):
         self.source_path = source_path
         self.creation_date = creation_date
         self.modification_date = modification_date
+        self.size = size
+        self.md5 = md5
+        self.sha256 = sha256
 
 class FileSeekerBase:
     # This is an abstract base class
+    def __init__(self):
+        self._index_items = None
+        self._index_paths = None
+        self._prefix_keys = None
+        self._suffix_keys = None
+        self.containers = None
+        self._copy_executor = None
+
     def search(self, filepattern_to_search, return_on_first_hit=False):
         '''Returns a list of paths for files/folders that matched'''
         pass
 
+    def _list_items(self):
+        '''Returns a list of (relative path, item) for all files/folders, in search order'''
+        return []
+
+    def _extract(self, item, force=False):
+        '''Copies item to the data folder if not done yet, returns its path there'''
+        pass
+
+    def _build_path_index(self):
+        '''Builds the sorted path (prefix) and reversed path (suffix) indexes, once'''
+        self._index_paths = PathTable()
+        items = []
+        for relative_path, item in self._list_items():
+            self._index_paths.append(_relative_path(relative_path))
+            items.append(item)
+        if items and all(type(item) is int for item in items):
+            items = array('q', items) # positions in the seeker's own PathTable
+        self._index_items = items
+        self._prefix_keys = _SortedKeys.build(self._index_paths)
+        self._suffix_keys = _SortedKeys.build(self._index_paths, reverse=True)
+
+    def _find_prefix_positions(self, prefix, exact=False):
+        if self._prefix_keys is None:
+            self._build_path_index()
+        keys = self._prefix_keys
+        positions = []
+        index = bisect_left(keys, prefix)
+        while index < len(keys):
+            key = keys[index]
+            if not key.startswith(prefix) or (exact and key != prefix):
+                break
+            positions.append(keys.order[index])
+            index += 1
+        positions.sort()
+        return positions
+
+    def _find_suffix_positions(self, suffix):
+        if self._suffix_keys is None:
+            self._build_path_index()
+        keys = self._suffix_keys
+        reversed_suffix = normcase(suffix)[::-1]
+        positions = []
+        index = bisect_left(keys, reversed_suffix)
+        while index < len(keys) and keys[index].startswith(reversed_suffix):
+            positions.append(keys.order[index])
+            index += 1
+        positions.sort()
+        return positions
+
+    def _extract_positions(self, positions, return_on_first_hit, force):
+        pathlist = []
+        for position in positions:
+            data_path = self._extract(self._index_items[position], force)
+            if data_path is None:
+                continue
+            if return_on_first_hit:
+                return data_path
+            pathlist.append(data_path)
+        return pathlist
+
+    def find_by_suffix(self, suffix, return_on_first_hit=False, force=False):
+        '''Returns a list of paths for files/folders whose path ends with suffix.
+           Same result as search('*' + suffix) without wildcards in suffix, but
+           looked up in an index instead of matching every path.'''
+        return self._extract_positions(self._find_suffix_positions(suffix), return_on_first_hit, force)
+
+    def find_exact(self, path, return_on_first_hit=False, force=False):
+        '''Returns a list of paths for files/folders at exactly path, relative to the
+           root of the extraction (e.g. /private/var/mobile/Library/SMS/sms.db)'''
+        positions = self._find_prefix_positions(_index_key(path), exact=True)
+        return self._extract_positions(positions, return_on_first_hit, force)
+
+    def search_under(self, directory, filepattern='**', return_on_first_hit=False, force=False):
+        '''Returns a list of paths for files/folders below directory (relative to the root
+           of the extraction) whose path relative to directory matches filepattern.
+           Only the paths below directory are matched, not the whole extraction.'''
+        prefix = _index_key(directory.rstrip('/\\')) + normcase('/')
+        pat = _compile_pattern( normcase(filepattern) )
+        positions = [position for position in self._find_prefix_positions(prefix)
+                     if pat( normcase(self._index_paths[position])[len(prefix):] ) is not None]
+        return self._extract_positions(positions, return_on_first_hit, force)
+
+    def _list_containers(self):
+        '''Returns AppContainer objects for the container manager metadata plists found'''
+        containers = []
+        for position in self._find_suffix_positions('/' + CONTAINER_METADATA_PLIST):
+            container_path = os.path.dirname(self._index_paths[position])
+            parent, guid = os.path.split(container_path)
+            parent, container_type = os.path.split(parent)
+            if container_type == 'Application':
+                container_type = os.path.basename(parent) # Data or Bundle
+            plist_path = self._extract(self._index_items[position])
+            try:
+                with open(plist_path, 'rb') as f:
+                    identifier = plistlib.load(f).get('MCMMetadataIdentifier')
+            except Exception as ex:
+                logfunc(f'Could not read container metadata {self._index_paths[position]} ' + str(ex))
+                continue
+            if identifier:
+                containers.append(AppContainer(identifier, container_type, guid, container_path))
+        return containers
+
+    def build_container_index(self):
+        '''Maps bundle/group identifiers to their app containers, into self.containers'''
+        self.containers = {}
+        for container in self._list_containers():
+            self.containers.setdefault(container.identifier, []).append(container)
+        logfunc(f'App container index complete - {len(self.containers)} identifiers')
+
+    def get_containers(self, identifier, container_type=None):
+        '''Returns the AppContainer objects of identifier, optionally only those of container_type'''
+        if self.containers is None:
+            self.build_container_index()
+        return [container for container in self.containers.get(identifier, [])
+                if container_type is None or container.container_type == container_type]
+
+    def search_in_container(self, identifier, filepattern='**', container_type='Data', return_on_first_hit=False):
+        '''search_under() for every container of identifier, e.g.
+           search_in_container('com.waze.iphone', 'Documents/user', return_on_first_hit=True)'''
+        pathlist = []
+        for container in self.get_containers(identifier, container_type):
+            found = self.search_under(container.path, filepattern, return_on_first_hit)
+            if return_on_first_hit:
+                if found:
+                    return found
+            else:
+                pathlist.extend(found)
+        return pathlist
+
+    def _copy_results(self, jobs, copy_job):
+        '''Runs copy_job(job) for every job, COPY_WORKERS at a time with at most COPY_MAX_IN_FLIGHT
+           queued. Yields (job, get_result) in the order of jobs, get_result() returns what copy_job
+           returned or raises what it raised'''
+        if len(jobs) < 2 or COPY_WORKERS < 2:
+            for job in jobs:
+                yield job, lambda job=job: copy_job(job)
+            return
+        if self._copy_executor is None:
+            self._copy_executor = ThreadPoolExecutor(max_workers=COPY_WORKERS)
+        in_flight = deque()
+        for job in jobs:
+            if len(in_flight) >= COPY_MAX_IN_FLIGHT:
+                yield in_flight.popleft()
+            in_flight.append((job, self._copy_executor.submit(copy_job, job).result))
+        while in_flight:
+            yield in_flight.popleft()
+
+    def get_file_hashes(self):
+        '''Returns (extraction path, source path, size, md5, sha256) for every hashed extracted file'''
+        return [(data_path, file_info.source_path, file_info.size, file_info.md5, file_info.sha256)
+                for data_path, file_info in self.file_infos.items() if file_info.md5]
+
     def cleanup(self):
         '''close any open handles'''
-        pass
+        if self._copy_executor is not None:
+            self._copy_executor.shutdown(wait=True)
+            self._copy_executor = None
 
 class FileSeekerDir(FileSeekerBase):
     def __init__(self, directory, data_folder):
         FileSeekerBase.__init__(self)
         self.directory = directory
-        self._all_files = []
+        self._all_files = PathTable()
+        # Per entry records, aligned with _all_files. Kinds are taken after following symlinks
+        self._kinds = bytearray()      # ENTRY_FILE, ENTRY_DIR or ENTRY_OTHER (special file, broken symlink)
+        self._sizes = array('q')
+        self._mtimes = array('d')
+        self._ctimes = array('d')
         self.data_folder = data_folder
         logfunc('Building files listing...')
         self.build_files_list(directory)
@@ -46,61 +507,129 @@ class FileSeekerDir(FileSeekerBase):
         self.file_infos = {}        
 
     def build_files_list(self, directory):
-        '''Populates all paths in directory into _all_files'''
-        try:
-            files_list = os.scandir(directory)
-            for item in files_list:
-                self._all_files.append(item.path)
-                if item.is_dir(follow_symlinks=False):
-                    self.build_files_list(item.path)
-        except Exception as ex:
-            logfunc(f'Error reading {directory} ' + str(ex))
+        '''Populates all paths in directory into _all_files, and their type, size and dates into the
+           record arrays. Directories are read WALK_WORKERS at a time, the listing keeps the order
+           of a depth-first walk so search results don't depend on which thread finished first'''
+        listings = {}
+        entry_count = 0
+        last_progress = timex.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, WALK_WORKERS)) as executor:
+            pending = {executor.submit(_scan_directory, directory): directory}
+            while pending:
+                done, _ = wait(pending, timeout=WALK_PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    scanned_directory = pending.pop(future)
+                    entries, error = future.result()
+                    if error is not None:
+                        logfunc(f'Error reading {scanned_directory} ' + str(error))
+                    listings[scanned_directory] = entries
+                    entry_count += len(entries)
+                    for entry in entries:
+                        if entry[1]:
+                            pending[executor.submit(_scan_directory, entry[0])] = entry[0]
+                if timex.monotonic() - last_progress >= WALK_PROGRESS_INTERVAL:
+                    logfunc(f'Building files listing... {entry_count:,} entries, {len(pending):,} folders being read')
+                    last_progress = timex.monotonic()
+
+        # Splice the listings back in depth-first order
+        stack = [iter(listings.pop(directory))]
+        while stack:
+            for path, is_dir, kind, size, mtime, ctime in stack[-1]:
+                self._all_files.append(path)
+                self._kinds.append(kind)
+                self._sizes.append(size)
+                self._mtimes.append(mtime)
+                self._ctimes.append(ctime)
+                if is_dir:
+                    stack.append(iter(listings.pop(path, ())))
+                    break
+            else:
+                stack.pop()
 
     def search(self, filepattern, return_on_first_hit=False, force=False):
         if filepattern in self.searched and not force:
             pathlist = self.searched[filepattern]
             return self.searched[filepattern][0] if return_on_first_hit and pathlist else pathlist
-        pathlist = []
-        pat = _compile_pattern( normcase(filepattern) )
-        root = normcase("root/")
-        for item in self._all_files:
-            if pat( root + normcase(item) ) is not None:
-                item_rel_path = item.replace(self.directory, '')
-                data_path = os.path.join(self.data_folder, item_rel_path[1:])
-                if is_platform_windows():
-                    data_path = data_path.replace('/', '\\')
-                if item not in self.copied or force:
-                    try:
-                        if os.path.isdir(item):
-                            pathlist.append(data_path)
-                        elif os.path.isfile(item):
-                            os.makedirs(os.path.dirname(data_path), exist_ok=True)
-                            copyfile(item, data_path)
-                            self.copied[item] = data_path
-                            creation_date = Path(item).stat().st_ctime
-                            modification_date = Path(item).stat().st_mtime
-                            file_info = FileInfo(item, creation_date, modification_date)
-                            self.file_infos[data_path] = file_info
-                        else:
-                            logfunc(f"INFO: Item '{item}' is neither a file nor a directory (e.g. symlink not followed, or broken). Skipped.")
-                    except Exception as ex:
-                        logfunc(f'Could not copy {item} to {data_path} ' + str(ex))
-                else:
-                    data_path = self.copied[item]
-                pathlist.append(data_path)
-                if return_on_first_hit:
-                    self.searched[filepattern] = pathlist
-                    return data_path
+        matches = []
+        for index, _ in self._all_files.match_normcase(normcase(filepattern), normcase("root/")):
+            matches.append(index)
+            if return_on_first_hit:
+                break
+        pathlist = self._extract_many(matches, force)
         self.searched[filepattern] = pathlist
+        if return_on_first_hit and pathlist:
+            return pathlist[0]
+        return pathlist
+
+    def _list_items(self):
+        return [(item[len(self.directory):], index) for index, item in enumerate(self._all_files)]
+
+    def _extract(self, index, force=False):
+        return self._extract_many([index], force)[0]
+
+    def _extract_positions(self, positions, return_on_first_hit, force):
+        if return_on_first_hit:
+            return FileSeekerBase._extract_positions(self, positions, return_on_first_hit, force)
+        return self._extract_many([self._index_items[position] for position in positions], force)
+
+    def _copy_entry(self, job):
+        '''Runs on the copy threads'''
+        index, item, data_path = job
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        return copy_file_hashed(item, data_path)
+
+    def _extract_many(self, indexes, force=False):
+        '''Copies the entries (indexes into _all_files) not copied yet to the data folder,
+           COPY_WORKERS at a time. Returns their paths in the data folder, in the same order'''
+        pathlist = []
+        copies = []
+        for index in indexes:
+            item = self._all_files[index]
+            if item in self.copied and not force:
+                pathlist.append(self.copied[item])
+                continue
+            item_rel_path = item.replace(self.directory, '')
+            data_path = os.path.join(self.data_folder, item_rel_path[1:])
+            if is_platform_windows():
+                data_path = data_path.replace('/', '\\')
+            pathlist.append(data_path)
+            kind = self._kinds[index]
+            if kind == ENTRY_FILE:
+                copies.append((index, item, data_path))
+            elif kind != ENTRY_DIR:
+                logfunc(f"INFO: Item '{item}' is neither a file nor a directory (e.g. symlink not followed, or broken). Skipped.")
+
+        for (index, item, data_path), get_hashes in self._copy_results(copies, self._copy_entry):
+            try:
+                hashes = get_hashes()
+            except Exception as ex:
+                logfunc(f'Could not copy {item} to {data_path} ' + str(ex))
+                continue
+            self.copied[item] = data_path
+            self.file_infos[data_path] = FileInfo(item, self._ctimes[index], self._mtimes[index], **hashes)
         return pathlist
 
 class FileSeekerItunes(FileSeekerBase):
-    def __init__(self, directory, data_folder):
+    def __init__(self, directory, data_folder, password=None):
         FileSeekerBase.__init__(self)
         self.directory = directory
-        self._all_files = {}
-        self.files_metadata = {}
+        self._all_files = PathTable()
+        self._hash_filenames = bytearray() # 40 ASCII hex digits per entry of _all_files
+        # Manifest.mbdb only, aligned with _all_files. Manifest.db dates are read by files_metadata
+        self._sizes = array('q')
+        self._mtimes = array('q')
+        self._ctimes = array('q')
+        self.files_metadata = None
+        self.encryption = None
         self.data_folder = data_folder
+        if is_encrypted_backup(directory):
+            if not os.path.exists(os.path.join(directory, "Manifest.db")):
+                raise BackupPasswordError('Encrypted Manifest.mbdb backups (iOS 9 and older) are not supported')
+            if not password:
+                logfunc('The backup is encrypted, run again with its password (--itunes_password)')
+                raise BackupPasswordError('The backup is encrypted, a password is needed')
+            logfunc('Unlocking the encrypted backup...')
+            self.encryption = EncryptedBackup(directory, password)
         logfunc('Building files listing...')
         if os.path.exists(os.path.join(directory, "Manifest.db")):
             self.build_files_list_from_manifest_db(directory)
@@ -116,11 +645,15 @@ class FileSeekerItunes(FileSeekerBase):
     def build_files_list_from_manifest_db(self, directory):
         '''Populates paths from Manifest.db files into _all_files'''
         try: 
-            db = open_sqlite_db_readonly(os.path.join(directory, "Manifest.db"))
+            all_files = {}
+            if self.encryption is not None:
+                db = self.encryption.open_manifest_db()
+            else:
+                db = open_sqlite_db_readonly(os.path.join(directory, "Manifest.db"))
             cursor = db.cursor()
             cursor.execute(
                 """
-                SELECT fileID, domain, relativePath, file
+                SELECT fileID, domain, relativePath
                 FROM Files
                 WHERE flags=1
                 """
@@ -131,129 +664,213 @@ class FileSeekerItunes(FileSeekerBase):
                 domain = row[1]
                 root_path = get_root_path_from_domain(domain)
                 relative_path = row[2]
-                file_metadata = row[3]
                 full_path = os.path.join(root_path, relative_path)
-                self._all_files[full_path] = hash_filename
-                self.files_metadata[hash_filename] = file_metadata
-            db.close()
+                all_files[full_path] = hash_filename
+            self._add_files(all_files)
+            self.files_metadata = ManifestMetadata(db)
         except Exception as ex:
             logfunc(f'Error opening Manifest.db from {directory}, ' + str(ex))
             raise ex
 
     def build_files_list_from_manifest_mbdb(self, directory):
-        '''Populates paths from Manifest.mbdb files into _all_files'''
-        def getint(data, offset, intsize):
-            """Retrieve an integer (big-endian) and new offset from the current offset"""
-            value = 0
-            while intsize > 0:
-                value = (value<<8) + data[offset]
-                offset = offset + 1
-                intsize = intsize - 1
-            return value, offset
-        
-        def getstring(data, offset, bin=False):
-            """Retrieve a string and new offset from the current offset into the data"""
-            if chr(data[offset]) == chr(0xFF) and chr(data[offset+1]) == chr(0xFF):
-                return '', offset+2 # Blank string
-            length, offset = getint(data, offset, 2) # 2-byte length
-            value = "" if bin else data[offset:offset+length].decode()
-            return value, (offset + length)
-
-        def process_mbdb_file(directory):
-            files = list()
-            with open(os.path.join(directory, "Manifest.mbdb"), 'rb') as f:
-                data = f.read()
-            if data[0:4].decode() != "mbdb": raise Exception("This does not look like an MBDB file")
-            offset = 4
-            offset = offset + 2 # value x05 x00, not sure what this is
-            while offset < len(data):
-                domain, offset = getstring(data, offset)
-                filename, offset = getstring(data, offset)
-                _, offset = getstring(data, offset, True)
-                _, offset = getstring(data, offset, True)
-                _, offset = getstring(data, offset, True)
-                _, offset = getint(data, offset, 2)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 8)
-                _, offset = getint(data, offset, 1)
-                numprops, offset = getint(data, offset, 1)
-                for ii in range(numprops):
-                    _, offset = getstring(data, offset, True)
-                    _, offset = getstring(data, offset, True)
-                hash_filename = hashlib.sha1(f"{domain}-{filename}".encode()).hexdigest()
-                files.append((hash_filename,domain,filename))
-            return files
-
+        '''Populates paths from Manifest.mbdb files into _all_files, with their size and dates'''
         try: 
-            all_rows = process_mbdb_file(directory)
-            for row in all_rows:
-                hash_filename = row[0]
-                domain = row[1]
+            all_files = {}
+            for hash_filename, domain, relative_path, mode, size, mtime, ctime in read_manifest_mbdb(os.path.join(directory, "Manifest.mbdb")):
+                if not stat.S_ISREG(mode):
+                    continue # directories and symlinks have no file in the backup, like flags != 1 in Manifest.db
                 root_path = get_root_path_from_domain(domain)
-                relative_path = row[2]
                 full_path = os.path.join(root_path, relative_path)
-                self._all_files[full_path] = hash_filename
+                all_files[full_path] = hash_filename, size, mtime, ctime
+            self._add_files(all_files)
         except Exception as ex:
             logfunc(f'Error opening Manifest.mbdb from {directory}, ' + str(ex))
             raise ex
 
+    def _add_files(self, all_files):
+        '''Moves the {full path: hash filename or (hash filename, size, mtime, ctime)} listing
+           into the compact tables'''
+        for full_path, entry in all_files.items():
+            if isinstance(entry, tuple):
+                hash_filename, size, mtime, ctime = entry
+                self._sizes.append(size)
+                self._mtimes.append(mtime)
+                self._ctimes.append(ctime)
+            else:
+                hash_filename = entry
+            self._all_files.append(full_path)
+            self._hash_filenames += hash_filename.encode('ascii').ljust(40)[:40]
+
     def search(self, filepattern, return_on_first_hit=False, force=False):
         if filepattern in self.searched and not force:
             pathlist = self.searched[filepattern]
             return self.searched[filepattern][0] if return_on_first_hit and pathlist else pathlist
+        pat = _compile_pattern( normcase(filepattern) )
+        candidates = self._suffix_candidates(filepattern)
+        if candidates is None:
+            matching_keys = (index for index, _ in self._all_files.match_normcase(normcase(filepattern)))
+        else:
+            matching_keys = (index for index in candidates if pat( normcase(self._all_files[index]) ) is not None)
+        if return_on_first_hit:
+            matching_keys = islice(matching_keys, 1)
+        pathlist = self._extract_many(list(matching_keys), force)
+        self.searched[filepattern] = pathlist
+        if return_on_first_hit:
+            return pathlist[0] if pathlist else []
+        return pathlist
+
+    def _suffix_candidates(self, filepattern):
+        '''Returns the sorted indexes of the paths ending with the literal part of a '*/literal/suffix'
+           pattern, looked up in the suffix index. None when the pattern needs a scan of all paths'''
+        suffix = filepattern.lstrip('*')
+        if suffix == filepattern or not suffix or any(char in suffix for char in '*?[\\'):
+            return None
+        return [self._index_items[position] for position in self._find_suffix_positions(suffix)]
+
+    def _list_items(self):
+        return [(relative_path, index) for index, relative_path in enumerate(self._all_files)]
+
+    def _list_containers(self):
+        '''Backups have no container metadata plists, the app domains name the containers instead'''
+        container_roots = ('/private/var/mobile/Containers/Data/Application/',
+                           '/private/var/mobile/Containers/Shared/AppGroup/',
+                           '/private/var/mobile/Containers/Data/PluginKitPlugin/')
+        containers = {}
+        for relative_path in self._all_files:
+            relative_path = _relative_path(relative_path)
+            for container_root in container_roots:
+                if relative_path.startswith(container_root):
+                    identifier = relative_path[len(container_root):].split('/', 1)[0]
+                    container_path = container_root + identifier
+                    if identifier and container_path not in containers:
+                        container_type = container_root.split('/')[-2]
+                        if container_type == 'Application':
+                            container_type = 'Data'
+                        containers[container_path] = AppContainer(identifier, container_type, identifier, container_path)
+                    break
+        return list(containers.values())
+
+    def _extract(self, index, force=False):
+        return self._extract_many([index], force)[0]
+
+    def _extract_positions(self, positions, return_on_first_hit, force):
+        if return_on_first_hit:
+            positions = positions[:1]
+        pathlist = self._extract_many([self._index_items[position] for position in positions], force)
+        if return_on_first_hit:
+            return pathlist[0] if pathlist else []
+        return pathlist
+
+    def _copy_backup_file(self, job):
+        '''Runs on the copy threads, decrypts the file if the backup is encrypted'''
+        original_location, data_path, key, size, dates = job
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        if key is None:
+            return copy_file_hashed(original_location, data_path)
+        with DecryptingReader(original_location, key, size) as fsrc, open(data_path, 'wb') as fdst:
+            if not HASH_EXTRACTED_FILES:
+                copyfileobj(fsrc, fdst, COPY_BUFFER_SIZE)
+                return {}
+            return copy_stream_hashed(fsrc, fdst)
+
+    def _extract_many(self, indexes, force=False):
+        '''Copies (or decrypts) the backup files of the entries (indexes into _all_files) not copied
+           yet to the data folder, COPY_WORKERS at a time. Returns their paths in the data folder,
+           in the same order'''
         pathlist = []
-        matching_keys = fnmatch.filter(self._all_files, filepattern)
-        for relative_path in matching_keys:
-            hash_filename = self._all_files[relative_path]
+        copies = []
+        for index in indexes:
+            relative_path = self._all_files[index]
+            hash_filename = self._hash_filenames[40 * index:40 * index + 40].decode('ascii').rstrip()
+            key = size = None
             if self.backup_type == "Manifest.db":
                 original_location = os.path.join(self.directory, hash_filename[:2], hash_filename)
-                metadata = get_plist_content(self.files_metadata[hash_filename])
-                creation_date = metadata.get('Birth', 0)
-                modification_date = metadata.get('LastModified', 0)
             else:
                 original_location = os.path.join(self.directory, hash_filename)
-                # TO DO: extract creation and modification dates from manifest.mbdb
-                creation_date = 0
-                modification_date = 0
+            if original_location in self.copied and not force:
+                pathlist.append(self.copied[original_location])
+                continue
+            if self.backup_type == "Manifest.db" and self.encryption is not None:
+                properties = self.files_metadata.get_properties(hash_filename)
+                dates = properties['Birth'], properties['LastModified']
+                if properties['EncryptionKey']:
+                    try:
+                        key = self.encryption.file_key(hash_filename, properties['ProtectionClass'],
+                                                       properties['EncryptionKey'])
+                    except Exception as ex:
+                        logfunc(f'Could not get the key of {original_location} ' + str(ex))
+                size = properties['Size'] or None
+            elif self.backup_type == "Manifest.db":
+                dates = self.files_metadata.get_dates(hash_filename)
+            else:
+                dates = self._ctimes[index], self._mtimes[index]
             data_path = os.path.join(self.data_folder, sanitize_file_path(relative_path))
             if is_platform_windows():
                 data_path = data_path.replace('/', '\\')
-            if original_location not in self.copied or force:
-                try:
-                    os.makedirs(os.path.dirname(data_path), exist_ok=True)
-                    copyfile(original_location, data_path)
-                    file_info = FileInfo(original_location, creation_date, modification_date)
-                    self.file_infos[data_path] = file_info
-                    self.copied[original_location] = data_path
-                except Exception as ex:
-                    logfunc(f'Could not copy {original_location} to {data_path} ' + str(ex))
-            else:
-                data_path = self.copied[original_location]
             pathlist.append(data_path)
-            if return_on_first_hit:
-                self.searched[filepattern] = pathlist
-                return data_path
-        self.searched[filepattern] = pathlist
+            copies.append((original_location, data_path, key, size, dates))
+
+        for (original_location, data_path, key, size, dates), get_hashes in self._copy_results(copies, self._copy_backup_file):
+            try:
+                hashes = get_hashes()
+                file_info = FileInfo(original_location, dates[0], dates[1], **hashes)
+                self.file_infos[data_path] = file_info
+                self.copied[original_location] = data_path
+            except Exception as ex:
+                logfunc(f'Could not copy {original_location} to {data_path} ' + str(ex))
         return pathlist
 
+    def cleanup(self):
+        FileSeekerBase.cleanup(self)
+        if self.files_metadata is not None:
+            self.files_metadata.close()
+        if self.encryption is not None:
+            self.encryption.close()
+
 
 class FileSeekerTar(FileSeekerBase):
     def __init__(self, tar_file_path, data_folder):
         FileSeekerBase.__init__(self)
         self.is_gzip = tar_file_path.lower().endswith('gz')
-        mode ='r:gz' if self.is_gzip else 'r'
-        self.tar_file = tarfile.open(tar_file_path, mode)
+        self._gzip_file = None
+        if self.is_gzip:
+            self.tar_file = self._open_indexed_tar(tar_file_path)
+        else:
+            self.tar_file = tarfile.open(tar_file_path, 'r')
         self.data_folder = data_folder
         self.searched = {}
         self.copied = {}
         self.file_infos = {}
 
+    def _open_indexed_tar(self, tar_file_path):
+        '''Opens a tar.gz through a seekable gzip reader, so extracting a member resumes from a
+           checkpoint near it instead of decompressing from the start. The member list (and the
+           indexed_gzip checkpoints) found by the first run are saved beside the archive'''
+        member_index_path = tar_file_path + TAR_MEMBER_INDEX_SUFFIX
+        gzip_index_path = tar_file_path + GZIP_INDEX_SUFFIX
+        members = None
+        if TAR_INDEX_BESIDE_ARCHIVE and os.path.exists(member_index_path):
+            try:
+                members = load_tar_member_index(member_index_path, tar_file_path)
+            except Exception as ex:
+                logfunc(f'Could not read tar member index {member_index_path} ' + str(ex))
+        self._gzip_file = open_indexed_gzip(tar_file_path, gzip_index_path if members is not None else None)
+        tar_file = tarfile.open(fileobj=self._gzip_file, mode='r:')
+        if members is not None:
+            tar_file.members = members
+            tar_file._loaded = True
+            logfunc(f'Loaded the list of {len(members)} tar members from {member_index_path}')
+            return tar_file
+
+        members = tar_file.getmembers() # one pass over the archive, records the gzip checkpoints
+        if TAR_INDEX_BESIDE_ARCHIVE and not any(member.sparse for member in members):
+            try:
+                save_tar_member_index(member_index_path, tar_file_path, members)
+                save_gzip_index(self._gzip_file, gzip_index_path)
+            except Exception as ex:
+                logfunc(f'Could not save the tar member index beside {tar_file_path} ' + str(ex))
+        return tar_file
+
     def search(self, filepattern, return_on_first_hit=False, force=False):
         if filepattern in self.searched and not force:
             pathlist = self.searched[filepattern]
@@ -263,27 +880,7 @@ class FileSeekerTar(FileSeekerBase):
         root = normcase("root/")
         for member in self.tar_file.getmembers():
             if pat( root + normcase(member.name) ) is not None:
-                clean_name = sanitize_file_path(member.name)
-                full_path = os.path.join(self.data_folder, Path(clean_name))
-                if member.name not in self.copied or force:
-                    try:
-                        if member.isdir():
-                            os.makedirs(full_path, exist_ok=True)
-                        else:
-                            parent_dir = os.path.dirname(full_path)
-                            if not os.path.exists(parent_dir):
-                                os.makedirs(parent_dir)
-                            with open(full_path, "wb") as fout:
-                                fout.write(tarfile.ExFileObject(self.tar_file, member).read())
-                                fout.close()
-                                file_info = FileInfo(member.name, 0, member.mtime)
-                                self.file_infos[full_path] = file_info
-                                self.copied[member.name] = full_path
-                            os.utime(full_path, (member.mtime, member.mtime))
-                    except Exception as ex:
-                        logfunc(f'Could not write file to filesystem, path was {member.name} ' + str(ex))
-                else:
-                    full_path = self.copied[member.name]
+                full_path = self._extract(member, force)
                 pathlist.append(full_path)
                 if return_on_first_hit:
                     self.searched[filepattern] = pathlist
@@ -291,18 +888,88 @@ class FileSeekerTar(FileSeekerBase):
         self.searched[filepattern] = pathlist
         return pathlist
 
+    def _list_items(self):
+        return [(member.name, member) for member in self.tar_file.getmembers()]
+
+    def _extract(self, member, force=False):
+        clean_name = sanitize_file_path(member.name)
+        full_path = os.path.join(self.data_folder, Path(clean_name))
+        if member.name not in self.copied or force:
+            try:
+                if member.isdir():
+                    os.makedirs(full_path, exist_ok=True)
+                else:
+                    parent_dir = os.path.dirname(full_path)
+                    if not os.path.exists(parent_dir):
+                        os.makedirs(parent_dir)
+                    with open(full_path, "wb") as fout:
+                        fsrc = tarfile.ExFileObject(self.tar_file, member)
+                        if HASH_EXTRACTED_FILES:
+                            hashes = copy_stream_hashed(fsrc, fout)
+                        else:
+                            fout.write(fsrc.read())
+                            hashes = {}
+                        fout.close()
+                        file_info = FileInfo(member.name, 0, member.mtime, **hashes)
+                        self.file_infos[full_path] = file_info
+                        self.copied[member.name] = full_path
+                    os.utime(full_path, (member.mtime, member.mtime))
+            except Exception as ex:
+                logfunc(f'Could not write file to filesystem, path was {member.name} ' + str(ex))
+        else:
+            full_path = self.copied[member.name]
+        return full_path
+
     def cleanup(self):
         self.tar_file.close()
+        if self._gzip_file is not None:
+            self._gzip_file.close()
 
 class FileSeekerZip(FileSeekerBase):
     def __init__(self, zip_file_path, data_folder):
         FileSeekerBase.__init__(self)
-        self.zip_file = ZipFile(zip_file_path)
-        self.name_list = self.zip_file.namelist()
+        self.zip_file_path = zip_file_path
+        self.name_list = PathTable()
+        # Central directory records, aligned with name_list. ZipInfo objects take ~0.5 KB each,
+        # so they are only kept while the index is built
+        self._header_offsets = array('q')
+        self._compress_sizes = array('q')
+        self._file_sizes = array('q')
+        self._crcs = array('q')
+        self._compress_types = bytearray()
+        self._flag_bits = array('H')
+        self._dos_dates = array('q')    # packed like the MS-DOS date and time of the zip format
+        self._ctimes = array('q')       # extended timestamps, -1 when absent
+        self._mtimes = array('q')
+        self._orig_filenames = {}       # index: name in the local header, when it differs from the listed name
         self.data_folder = data_folder
+        self.build_files_list(zip_file_path)
         self.searched = {}
         self.copied = {}
         self.file_infos = {}
+        self._handles = threading.local()
+        self._open_handles = []
+        self._handles_lock = threading.Lock()
+
+    def build_files_list(self, zip_file_path):
+        '''Reads the central directory once into name_list and the record arrays'''
+        with ZipFile(zip_file_path) as zip_file:
+            for name in zip_file.namelist():
+                info = zip_file.getinfo(name) # the last entry of a duplicated name, like ZipFile.extract()
+                if info.orig_filename != name:
+                    self._orig_filenames[len(self.name_list)] = info.orig_filename
+                self.name_list.append(name)
+                self._header_offsets.append(info.header_offset)
+                self._compress_sizes.append(info.compress_size)
+                self._file_sizes.append(info.file_size)
+                self._crcs.append(info.CRC)
+                self._compress_types.append(info.compress_type)
+                self._flag_bits.append(info.flag_bits)
+                year, month, day, hour, minute, second = info.date_time
+                self._dos_dates.append((year - 1980) << 25 | month << 21 | day << 16 | hour << 11 | minute << 5 | second // 2)
+                creation_time, modification_time = self.decode_extended_timestamp(info.extra) if info.extra else (None, None)
+                self._ctimes.append(-1 if creation_time is None else creation_time)
+                self._mtimes.append(-1 if modification_time is None else modification_time)
 
     def decode_extended_timestamp(self, extra_data):
         offset = 0
@@ -330,34 +997,165 @@ class FileSeekerZip(FileSeekerBase):
         if filepattern in self.searched and not force:
             pathlist = self.searched[filepattern]
             return self.searched[filepattern][0] if return_on_first_hit and pathlist else pathlist
-        pathlist = []
-        pat = _compile_pattern( normcase(filepattern) )
-        root = normcase("root/")
-        for member in self.name_list:
-            if member.startswith("__MACOSX"):
-                continue
-            if pat( root + normcase(member) ) is not None:
-                if member not in self.copied or force:
-                    try:
-                        extracted_path = self.zip_file.extract(member, path=self.data_folder) # already replaces illegal chars with _ when exporting
-                        f = self.zip_file.getinfo(member)
-                        creation_date, modification_date = self.decode_extended_timestamp(f.extra)
-                        file_info = FileInfo(member, creation_date, modification_date)
-                        self.file_infos[extracted_path] = file_info
-                        date_time = f.date_time
-                        date_time = timex.mktime(date_time + (0, 0, -1))
-                        os.utime(extracted_path, (date_time, date_time))
-                        self.copied[member] = extracted_path
-                    except Exception as ex:
-                        logfunc(f'Could not write file to filesystem, path was {member} ' + str(ex))
-                else:
-                    extracted_path = self.copied[member]
-                pathlist.append(extracted_path)
-                if return_on_first_hit:
-                    self.searched[filepattern] = pathlist
-                    return extracted_path
+        skipped = normcase("root/__MACOSX")
+        matches = (index for index, member in self.name_list.match_normcase(normcase(filepattern), normcase("root/"))
+                   if not member.startswith(skipped))
+        if return_on_first_hit:
+            # a member that can't be extracted is left out, the next match is tried instead
+            pathlist = []
+            for index in matches:
+                pathlist = self._extract_many([index], force)
+                if pathlist:
+                    break
+        else:
+            pathlist = self._extract_many(list(matches), force)
         self.searched[filepattern] = pathlist
+        if return_on_first_hit and pathlist:
+            return pathlist[0]
         return pathlist
 
+    def _list_items(self):
+        return [(member, index) for index, member in enumerate(self.name_list) if not member.startswith("__MACOSX")]
+
+    def _extract(self, index, force=False):
+        extracted = self._extract_many([index], force)
+        return extracted[0] if extracted else None
+
+    def _extract_positions(self, positions, return_on_first_hit, force):
+        if return_on_first_hit:
+            return FileSeekerBase._extract_positions(self, positions, return_on_first_hit, force)
+        return self._extract_many([self._index_items[position] for position in positions], force)
+
+    def _extract_many(self, indexes, force=False):
+        '''Extracts the members (indexes into name_list) not extracted yet to the data folder,
+           COPY_WORKERS at a time. Returns their extracted paths in the same order, without
+           the members that could not be extracted'''
+        members = []
+        jobs = []
+        for index in indexes:
+            member = self.name_list[index]
+            members.append(member)
+            if member not in self.copied or force:
+                jobs.append((index, member, _zip_target_path(self.data_folder, member)))
+
+        failed = set()
+        for (index, member, extracted_path), get_hashes in self._copy_results(jobs, self._extract_member):
+            try:
+                hashes = get_hashes()
+            except Exception as ex:
+                logfunc(f'Could not write file to filesystem, path was {member} ' + str(ex))
+                failed.add(member)
+                continue
+            creation_date = self._ctimes[index] if self._ctimes[index] >= 0 else None
+            modification_date = self._mtimes[index] if self._mtimes[index] >= 0 else None
+            self.file_infos[extracted_path] = FileInfo(member, creation_date, modification_date, **hashes)
+            self.copied[member] = extracted_path
+        return [self.copied[member] for member in members if member in self.copied and member not in failed]
+
+    def _member_handle(self):
+        '''Returns the zip file handle of the calling thread, so members are read in parallel
+           without sharing a file position'''
+        handle = getattr(self._handles, 'zip_file', None)
+        if handle is None:
+            handle = self._handles.zip_file = open(self.zip_file_path, 'rb')
+            with self._handles_lock:
+                self._open_handles.append(handle)
+        return handle
+
+    def _extract_member(self, job):
+        '''Runs on the copy threads. STORED members are copied straight from their range of the
+           zip file, the others are decompressed by zipfile.ZipExtFile'''
+        index, member, extracted_path = job
+        if member.endswith('/'):
+            os.makedirs(extracted_path, exist_ok=True)
+            hashes = {}
+        else:
+            if self._flag_bits[index] & 0x1:
+                raise RuntimeError(f'File {member!r} is encrypted, password required for extraction')
+            os.makedirs(os.path.dirname(extracted_path), exist_ok=True)
+            fsrc = self._member_handle()
+            fsrc.seek(self._header_offsets[index])
+            header = fsrc.read(zipfile.sizeFileHeader)
+            if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+                raise zipfile.BadZipFile('Bad magic number for file header')
+            header = struct.unpack(zipfile.structFileHeader, header)
+            fsrc.seek(header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH], os.SEEK_CUR)
+            if self._compress_types[index] == zipfile.ZIP_STORED:
+                hashes = self._copy_stored(index, fsrc, extracted_path)
+            else:
+                info = zipfile.ZipInfo(self._orig_filenames.get(index, member))
+                info.compress_type = self._compress_types[index]
+                info.compress_size = self._compress_sizes[index]
+                info.file_size = self._file_sizes[index]
+                info.CRC = self._crcs[index]
+                info.flag_bits = self._flag_bits[index]
+                with zipfile.ZipExtFile(fsrc, 'r', info, None, False) as fmember, open(extracted_path, 'wb') as fdst:
+                    if HASH_EXTRACTED_FILES:
+                        hashes = copy_stream_hashed(fmember, fdst)
+                    else:
+                        copyfileobj(fmember, fdst, COPY_BUFFER_SIZE)
+                        hashes = {}
+        dos_date = self._dos_dates[index]
+        date_time = timex.mktime((1980 + (dos_date >> 25), dos_date >> 21 & 0xF, dos_date >> 16 & 0x1F,
+                                  dos_date >> 11 & 0x1F, dos_date >> 5 & 0x3F, (dos_date & 0x1F) * 2, 0, 0, -1))
+        os.utime(extracted_path, (date_time, date_time))
+        return hashes
+
+    def _copy_stored(self, index, fsrc, extracted_path):
+        '''Copies a STORED member from the current position of fsrc and checks its CRC-32. When no
+           hash is needed it is copied in the kernel with copy_file_range, then the CRC-32 is
+           computed from the extracted file'''
+        size = self._file_sizes[index]
+        with open(extracted_path, 'w+b') as fdst:
+            if not HASH_EXTRACTED_FILES and hasattr(os, 'copy_file_range'):
+                offset = fsrc.tell()
+                copied = 0
+                try:
+                    while copied < size:
+                        length = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - copied, offset + copied)
+                        if not length:
+                            break
+                        copied += length
+                except OSError:
+                    pass
+                if copied == size:
+                    fdst.seek(0)
+                    crc = 0
+                    while True:
+                        chunk = fdst.read(COPY_BUFFER_SIZE)
+                        if not chunk:
+                            break
+                        crc = zlib.crc32(chunk, crc)
+                    if crc != self._crcs[index]:
+                        raise zipfile.BadZipFile(f'Bad CRC-32 for file {self.name_list[index]!r}')
+                    return {}
+                fdst.seek(0)
+                fdst.truncate()
+                fsrc.seek(offset)
+            md5 = hashlib.md5()
+            sha256 = hashlib.sha256()
+            crc = 0
+            remaining = size
+            while remaining:
+                chunk = fsrc.read(min(remaining, COPY_BUFFER_SIZE))
+                if not chunk:
+                    raise EOFError(f'Zip file ended in the data of {self.name_list[index]}')
+                crc = zlib.crc32(chunk, crc)
+                if HASH_EXTRACTED_FILES:
+                    md5.update(chunk)
+                    sha256.update(chunk)
+                fdst.write(chunk)
+                remaining -= len(chunk)
+        if crc != self._crcs[index]:
+            raise zipfile.BadZipFile(f'Bad CRC-32 for file {self.name_list[index]!r}')
+        if not HASH_EXTRACTED_FILES:
+            return {}
+        return {'size': size, 'md5': md5.hexdigest(), 'sha256': sha256.hexdigest()}
+
     def cleanup(self):
-        self.zip_file.close()
+        FileSeekerBase.cleanup(self)
+        with self._handles_lock:
+            for handle in self._open_handles:
+                handle.close()
+            self._open_handles.clear()
+        self._handles = threading.local()